@@ -0,0 +1,248 @@
+import json
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+
+from settings import *
+
+# Pack layout:
+#   b'APAK' | u32 version | u32 index length | JSON index | padding | pixel blobs
+# Every blob starts on a BLOB_ALIGN boundary so the runtime can hand a
+# zero-copy slice of the memory map straight to pygame.image.frombuffer.
+PACK_MAGIC = b'APAK'
+PACK_VERSION = 2 # 2: the index records the source mtimes and render scales it was baked from
+HEADER = struct.Struct('<4sII')
+BLOB_ALIGN = 16
+
+# Every image the game draws, with the scale it is drawn at given the game's
+# scale_factor and the flip variants it needs. Keep in sync with main.py / sprites.py.
+# Each is baked once per render scale (RENDER_SCALES) for dynamic resolution.
+BAKED_IMAGES = [
+    # (path, scale from scale_factor, has alpha, flip_y variants)
+    ('./graphics/environment/background.png', lambda s: s, False, (False,)),
+    ('./graphics/ground/ground.png', lambda s: s, True, (False,)),
+    *[(f'./graphics/plane/red{i}.png', lambda s: s / 2, True, (False,)) for i in range(3)],
+    ('./graphics/coins/PNG/Coins/coin_32.png', lambda s: s / 3, True, (False,)),
+    *[(f'./graphics/clouds/cloud{i}.png', lambda s: s / 3, True, (False,)) for i in range(1, 9)],
+    *[(f'./graphics/obstacles/{i}.png', lambda s: s, True, (False, True)) for i in range(2)],
+    ('./graphics/pilot/stand.png', lambda s: s * 2, True, (False,)),
+    ('./graphics/pilot/crouch.png', lambda s: s * 2, True, (False,)),
+]
+
+SCALE_REFERENCE_IMAGE = './graphics/environment/background.png'
+
+# Runtime state: the mapped pack (if any) plus caches so each image is only
+# built once per process, whether it comes from the pack or from a PNG.
+_pack = None
+_image_cache = {}
+_mask_cache = {}
+_source_images = {} # decoded PNGs, so building every render scale of an image decodes it once
+
+
+def default_pack_path(window_width=WINDOW_WIDTH):
+    return f'./graphics/baked/assets_{window_width}.pack'
+
+
+def scale_factor_for(window_width=WINDOW_WIDTH):
+    """The game's scale_factor for a given internal width (background fills the window)."""
+    return window_width / source_size(SCALE_REFERENCE_IMAGE)[0]
+
+
+def _image_key(path, size, flip_y):
+    return f"{path}@{size[0]}x{size[1]}{'~flip_y' if flip_y else ''}"
+
+
+def _scaled_size(source, scale):
+    return (int(source[0] * scale), int(source[1] * scale))
+
+
+def _baked_scales(render_scales=RENDER_SCALES):
+    return sorted({1.0, *render_scales}, reverse=True)
+
+
+def _source_mtimes(paths):
+    return {path: os.stat(path).st_mtime_ns for path in paths}
+
+
+def _sources_changed(mtimes):
+    """True if any source PNG was modified, renamed or deleted since these mtimes were recorded."""
+    try:
+        return mtimes != _source_mtimes(mtimes)
+    except OSError:
+        return True
+
+
+def _source_image(path):
+    image = _source_images.get(path)
+    if image is None:
+        image = _source_images[path] = pygame.image.load(path)
+    return image
+
+
+class AssetPack:
+    """Read-only view of a baked pack, memory-mapped for the life of the process."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        magic, version, index_len = HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {PACK_VERSION} asset pack")
+        self.index = json.loads(bytes(self._view[HEADER.size:HEADER.size + index_len]))
+        self.window_width = self.index['window_width']
+        self.scale_factor = self.index['scale_factor']
+        self.sources = self.index['sources']
+        self.images = self.index['images']
+
+    def surface(self, key):
+        """Builds a surface directly on top of the mapped pixels (no decode, no resize)."""
+        entry = self.images.get(key)
+        if entry is None:
+            return None
+        offset, length = entry['offset'], entry['length']
+        return pygame.image.frombuffer(self._view[offset:offset + length], tuple(entry['size']), entry['format'])
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+
+def open_pack(path=None, window_width=WINDOW_WIDTH):
+    """Maps a baked pack for this resolution. Returns False (and keeps using PNGs) if none fits."""
+    global _pack
+    path = path or default_pack_path(window_width)
+    if not os.path.exists(path):
+        return False
+
+    try:
+        pack = AssetPack(path)
+    except ValueError as e:
+        print(f"Ignoring asset pack: {e} (re-bake it with python code/asset_pack.py)")
+        return False
+    problem = None
+    if pack.window_width != window_width:
+        problem = f"baked for width {pack.window_width}, game runs at {window_width}"
+    elif pack.index['render_scales'] != _baked_scales():
+        problem = f"baked for render scales {pack.index['render_scales']}, game uses {_baked_scales()}"
+    elif _sources_changed(pack.index['mtimes']):
+        problem = "images in graphics/ changed since it was baked"
+    if problem is not None:
+        print(f"Ignoring asset pack {path}: {problem} (re-bake it with python code/asset_pack.py)")
+        pack.close()
+        return False
+
+    _pack = pack
+    _image_cache.clear()
+    _mask_cache.clear()
+    return True
+
+
+def source_size(path):
+    """Size of the original PNG, read from the pack index when possible."""
+    if _pack is not None and path in _pack.sources:
+        return tuple(_pack.sources[path])
+    return _source_image(path).get_size()
+
+
+def load_image(path, scale=1, alpha=True, flip_y=False):
+    """Returns the (cached) image at `scale`, from the pack if it was baked, otherwise from the PNG."""
+    # every spawn asks again, so the cache is checked before anything touches the PNG
+    cache_key = (path, scale, alpha, flip_y)
+    image = _image_cache.get(cache_key)
+    if image is not None:
+        return image
+
+    size = _scaled_size(source_size(path), scale)
+    key = _image_key(path, size, flip_y)
+    image = _pack.surface(key) if _pack is not None else None
+    if image is None:
+        image = pygame.transform.scale(_source_image(path), size)
+        if flip_y:
+            image = pygame.transform.flip(image, False, True)
+
+    # convert copies the pixels into the display format, so blits stay fast
+    image = image.convert_alpha() if alpha else image.convert()
+    _image_cache[cache_key] = image
+    return image
+
+
+def load_mask(path, scale=1, flip_y=False):
+    """Cached collision mask for the image returned by load_image with the same arguments."""
+    cache_key = (path, scale, flip_y)
+    mask = _mask_cache.get(cache_key)
+    if mask is None:
+        # pygame masks can't be deserialized in bulk, so the cheapest exact
+        # path is one C pass over the already-mapped alpha channel
+        mask = pygame.mask.from_surface(load_image(path, scale, True, flip_y))
+        _mask_cache[cache_key] = mask
+    return mask
+
+
+def bake(window_width=WINDOW_WIDTH, out_path=None, render_scales=RENDER_SCALES):
+    """Pre-scales, pre-flips and pre-converts every image in BAKED_IMAGES, at every render scale, into one pack file."""
+    out_path = out_path or default_pack_path(window_width)
+    scale_factor = window_width / pygame.image.load(SCALE_REFERENCE_IMAGE).get_width()
+
+    sources = {}
+    images = {}
+    blobs = []
+    for path, scale_fn, alpha, flips in BAKED_IMAGES:
+        original = pygame.image.load(path)
+        sources[path] = list(original.get_size())
+        for render_scale in _baked_scales(render_scales):
+            # same arithmetic as sprites.scaled_images, so the sizes (and keys) match exactly
+            size = _scaled_size(original.get_size(), scale_fn(scale_factor) * render_scale)
+            scaled = pygame.transform.scale(original, size)
+            for flip_y in flips:
+                key = _image_key(path, size, flip_y)
+                if key in images:
+                    continue
+                image = pygame.transform.flip(scaled, False, True) if flip_y else scaled
+                pixel_format = 'RGBA' if alpha else 'RGB'
+                images[key] = {'size': list(size), 'format': pixel_format}
+                blobs.append(pygame.image.tostring(image, pixel_format))
+
+    # Offsets depend on the index length, which depends on the offsets: lay the
+    # blobs out after a generously sized index and pad the index to fit.
+    def align(n):
+        return (n + BLOB_ALIGN - 1) // BLOB_ALIGN * BLOB_ALIGN
+
+    index = {'window_width': window_width, 'scale_factor': scale_factor, 'sources': sources, 'images': images,
+             'render_scales': _baked_scales(render_scales), 'mtimes': _source_mtimes(sources)}
+    reserved = align(HEADER.size + len(json.dumps(index)) + 64 * len(images))
+    offset = reserved
+    for entry, blob in zip(images.values(), blobs):
+        entry['offset'] = offset
+        entry['length'] = len(blob)
+        offset = align(offset + len(blob))
+
+    index_bytes = json.dumps(index).encode()
+    if HEADER.size + len(index_bytes) > reserved:
+        raise RuntimeError("Asset pack index outgrew its reserved space")
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        for entry, blob in zip(images.values(), blobs):
+            f.write(b'\0' * (entry['offset'] - f.tell()))
+            f.write(blob)
+    os.replace(tmp_path, out_path)
+    return out_path, len(images)
+
+
+if __name__ == '__main__':
+    # Run from the repository root, like the game: python code/asset_pack.py [window_width]
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else WINDOW_WIDTH
+    pygame.init()
+    path, count = bake(width)
+    print(f"Baked {count} images for width {width} into {path}")
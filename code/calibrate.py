@@ -0,0 +1,134 @@
+"""
+First-boot calibration: short render and inference micro-benchmarks on this board, then
+the board-type profile (profiles.py) adjusted to what the board actually manages, saved
+to HARDWARE_PROFILE_PATH for settings.py to apply from then on.
+
+The game and the pose service run this by themselves on a board that hasn't been
+calibrated (profiles.calibrate_on_first_boot). To re-calibrate, from the repository root:
+    python code/calibrate.py
+"""
+
+import json
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # the benchmarks draw off-screen
+import pygame
+
+from settings import *
+import camera
+import hardware
+import pose_backends
+import profiles
+
+# Render scales of the logical WINDOW_WIDTH x WINDOW_HEIGHT to try, best first
+RENDER_SCALE_STEPS = (1.0, 0.75, 0.5)
+# (exported model folder, input size), best first; only the ones on disk are tried
+MODEL_VARIANTS = [('yolo11s-pose_ncnn_model', 320), ('yolo11n-pose_ncnn_model', 320)]
+
+RENDER_SHARE = 0.5     # of each frame's time budget; the rest is game logic, pose handling and presenting
+POSE_BUDGET_MS = 100   # at least 10 pose updates a second
+RENDER_SPRITES = 16    # about what a busy moment in the game draws
+
+
+def render_benchmark(window_size, upscale, frames=60):
+    """ms per frame to compose a game-like frame at window_size and scale it up to the screen."""
+    surface = pygame.Surface(window_size)
+    background = pygame.Surface(window_size)
+    background.fill((90, 160, 220))
+    sprite = pygame.Surface((window_size[0] // 8, window_size[1] // 8), pygame.SRCALPHA)
+    sprite.fill((220, 120, 40, 200))
+    screen = pygame.Surface((TARGET_SCREEN_WIDTH, TARGET_SCREEN_HEIGHT))
+    scale = getattr(pygame.transform, upscale)
+
+    start = time.perf_counter()
+    for i in range(frames):
+        surface.fill('black')
+        translucent = background.copy() # the game draws its background at 95% alpha
+        translucent.set_alpha(242)
+        surface.blit(translucent, (0, 0))
+        surface.blits([(sprite, ((i * 7 + k * 97) % window_size[0], (k * 53) % window_size[1])) for k in range(RENDER_SPRITES)])
+        screen.blit(scale(surface, (TARGET_SCREEN_WIDTH, TARGET_SCREEN_HEIGHT)), (0, 0))
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def inference_benchmark(model, imgsz, frames=20, warmup=3):
+    """ms per frame for the pose model on a rendered figure, or None if it can't be loaded here."""
+    try:
+        backend = pose_backends.NcnnBackend(model, imgsz)
+    except (ImportError, FileNotFoundError):
+        try:
+            backend = pose_backends.UltralyticsBackend(model, imgsz)
+        except Exception:
+            return None
+    frame = camera.SyntheticCamera.render(camera.STANDING_POSE[None], (imgsz, imgsz))
+    for _ in range(warmup):
+        backend.detect(frame)
+    start = time.perf_counter()
+    for _ in range(frames):
+        backend.detect(frame)
+    backend.close()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def pick_render(profile):
+    """(settings, benchmarks): the highest frame rate, then render scale, then filtering that fits the budget.
+    The dynamic resolution controller starts at that scale and may step down from it."""
+    benchmarks = {}
+    for framerate in sorted({profile['FRAMERATE'], 30}, reverse=True):
+        budget = 1000 / framerate * RENDER_SHARE
+        for step, render_scale in enumerate(RENDER_SCALE_STEPS):
+            window_size = (round(WINDOW_WIDTH * render_scale), round(WINDOW_HEIGHT * render_scale))
+            for upscale in ('smoothscale', 'scale'):
+                key = f"render {window_size[0]}x{window_size[1]} {upscale}"
+                if key not in benchmarks:
+                    benchmarks[key] = render_benchmark(window_size, upscale)
+                if benchmarks[key] <= budget:
+                    settings = {'RENDER_SCALES': RENDER_SCALE_STEPS[step:], 'UPSCALE_METHOD': upscale, 'FRAMERATE': framerate}
+                    return settings, benchmarks
+    # nothing fits: do the least work there is
+    return {'RENDER_SCALES': RENDER_SCALE_STEPS[-1:], 'UPSCALE_METHOD': 'scale', 'FRAMERATE': 30}, benchmarks
+
+
+def pick_model():
+    """(settings, benchmarks): the best model variant on disk that keeps up with POSE_BUDGET_MS."""
+    benchmarks = {}
+    available = [(model, imgsz) for model, imgsz in MODEL_VARIANTS if os.path.isdir(model)]
+    for model, imgsz in available:
+        ms = inference_benchmark(model, imgsz)
+        if ms is None:
+            continue
+        benchmarks[f"pose {model} {imgsz}"] = ms
+        if ms <= POSE_BUDGET_MS:
+            break
+    measured = [(model, imgsz) for model, imgsz in available if f"pose {model} {imgsz}" in benchmarks]
+    if not measured:
+        return {}, benchmarks # no model runs here (yet): keep the profile's
+    model, imgsz = measured[-1] # the one that fit, or the smallest tried
+    return {'POSE_MODEL': model, 'POSE_IMGSZ': imgsz, 'CAMERA_INFERENCE_SIZE': (imgsz, imgsz)}, benchmarks
+
+
+def calibrate(path=HARDWARE_PROFILE_PATH):
+    board = hardware.board_name()
+    name = profiles.board_profile(board)
+    profile = profiles.PROFILES[name]
+    print(f"calibrating {board} (starting from the '{name}' profile)")
+
+    pygame.init()
+    render_settings, render_benchmarks = pick_render(profile)
+    model_settings, model_benchmarks = pick_model()
+    pygame.quit()
+
+    benchmarks = {key: round(ms, 2) for key, ms in {**render_benchmarks, **model_benchmarks}.items()}
+    for key, ms in benchmarks.items():
+        print(f"  {key:<48}{ms:8.1f} ms")
+    calibration = {'board': board, 'profile': name, 'settings': {**render_settings, **model_settings},
+                   'benchmarks': benchmarks, 'calibrated': time.strftime('%Y-%m-%d %H:%M')}
+    with open(path, 'w') as f:
+        json.dump(calibration, f, indent=2)
+    print(f"settings: {calibration['settings']}, saved to {path}")
+
+
+if __name__ == '__main__':
+    profiles.report() # what runs now; settings.py overrides keep winning over the new calibration too
+    calibrate()
@@ -0,0 +1,229 @@
+"""
+Camera sources for the pose service.
+
+Every source delivers two streams from one capture:
+    inference  BGR frame already at the model's input size (ultralytics takes BGR arrays)
+    preview    RGB frame at display size, only produced when asked for
+
+On the Pi both come out of the ISP (main stream = preview, lores stream = inference),
+so the CPU never resizes a frame. FileCamera emulates the same two streams from a
+video file or a folder of images for testing without camera hardware, and
+SyntheticCamera renders a scripted stick figure whose keypoints it already knows,
+so the whole pipeline (and its latency) can be measured with no camera and no model.
+"""
+
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from settings import *
+import pose
+
+
+def sensor_time(metadata):
+    """Wall-clock time the sensor read the frame out, from libcamera's SensorTimestamp (ns on CLOCK_BOOTTIME).
+
+    Stamping the frame when capture_request() returns would leave out the exposure, the ISP and
+    up to buffer_count frames of queueing: the very latency the latency report is after.
+    """
+    sensor_ns = metadata.get('SensorTimestamp')
+    if sensor_ns is None:
+        return time.time()
+    age = time.clock_gettime(time.CLOCK_BOOTTIME) - sensor_ns / 1e9
+    return time.time() - age
+
+
+class PiCamera:
+    def __init__(self, inference_size=CAMERA_INFERENCE_SIZE, preview_size=CAMERA_PREVIEW_SIZE, lores_format=CAMERA_LORES_FORMAT, fps=CAMERA_FPS):
+        from picamera2 import Picamera2 # only on the Pi; FileCamera works without it
+
+        self.lores_format = lores_format
+        self.preview_size = preview_size
+        self.fps = fps
+        self.picam2 = Picamera2()
+        self.configure(inference_size)
+        self.picam2.start()
+
+    def configure(self, inference_size):
+        self.inference_size = tuple(inference_size)
+        # picamera2 names formats by their little-endian word order: "BGR888" arrays are
+        # R,G,B in memory (what pygame wants), "RGB888" arrays are B,G,R (what the model wants)
+        config = self.picam2.create_preview_configuration(
+            main={'size': self.preview_size, 'format': 'BGR888'},
+            lores={'size': self.inference_size, 'format': self.lores_format},
+            buffer_count=4,
+            controls={'FrameRate': self.fps},
+        )
+        self.picam2.align_configuration(config)
+        self.picam2.configure(config)
+
+    def set_inference_size(self, size):
+        """Has the ISP scale the inference stream to a new model size (a thermal step), so the CPU still never resizes."""
+        if tuple(size) == self.inference_size:
+            return
+        self.picam2.stop()
+        self.configure(size)
+        self.picam2.start()
+
+    def capture(self, want_preview=False):
+        """Returns (inference BGR frame, preview RGB frame or None, capture time)."""
+        request = self.picam2.capture_request()
+        try:
+            t_capture = sensor_time(request.get_metadata())
+            lores = request.make_array('lores')
+            preview = request.make_array('main') if want_preview else None
+        finally:
+            request.release()
+
+        if self.lores_format == 'YUV420':
+            # The Pi 4 ISP only outputs YUV on the lores stream: a colour conversion, no resize
+            lores = cv2.cvtColor(lores, cv2.COLOR_YUV2BGR_I420)
+        return lores, preview, t_capture
+
+    def close(self):
+        self.picam2.stop()
+        self.picam2.close()
+
+
+class FileCamera:
+    """Stand-in camera that plays back a video file or a folder of images, looping, at `fps`."""
+
+    def __init__(self, source, inference_size=CAMERA_INFERENCE_SIZE, preview_size=CAMERA_PREVIEW_SIZE, fps=CAMERA_FPS):
+        self.inference_size = tuple(inference_size)
+        self.preview_size = tuple(preview_size)
+        self.frame_interval = 1 / fps
+        self.last_capture = 0.0
+
+        self.images = None
+        self.video = None
+        if os.path.isdir(source):
+            self.images = sorted(glob.glob(os.path.join(source, '*.jpg')) + glob.glob(os.path.join(source, '*.png')))
+            if not self.images:
+                raise FileNotFoundError(f"No .jpg/.png frames in {source}")
+            self.index = 0
+        else:
+            self.video = cv2.VideoCapture(source)
+            if not self.video.isOpened():
+                raise FileNotFoundError(f"Can't open video {source}")
+
+    def _next_frame(self):
+        """The next BGR frame, or None if there is nothing readable."""
+        if self.images is not None:
+            for _ in range(len(self.images)):
+                path = self.images[self.index]
+                self.index = (self.index + 1) % len(self.images)
+                frame = cv2.imread(path)
+                if frame is not None:
+                    return frame
+                print(f"Skipping unreadable frame {path}")
+            return None
+        ok, frame = self.video.read()
+        if not ok:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, 0) # loop
+            ok, frame = self.video.read()
+        return frame if ok else None
+
+    def set_inference_size(self, size):
+        self.inference_size = tuple(size)
+
+    def capture(self, want_preview=False):
+        """Returns (inference BGR frame, preview RGB frame or None, capture time), paced like a real camera."""
+        wait = self.last_capture + self.frame_interval - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_capture = time.time()
+
+        frame = self._next_frame() # BGR at the file's own size
+        if frame is None:
+            return None, None, self.last_capture
+        # the resizes here stand in for the ISP scaler
+        inference = cv2.resize(frame, self.inference_size, interpolation=cv2.INTER_AREA)
+        preview = None
+        if want_preview:
+            preview = cv2.cvtColor(cv2.resize(frame, self.preview_size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+        return inference, preview, self.last_capture
+
+    def close(self):
+        if self.video is not None:
+            self.video.release()
+
+
+# Normalized keypoints of a person standing in the middle of the target box
+STANDING_POSE = np.array([
+    (0.50, 0.40), (0.48, 0.38), (0.52, 0.38), (0.46, 0.39), (0.54, 0.39), # face
+    (0.44, 0.47), (0.56, 0.47), (0.41, 0.56), (0.59, 0.56), (0.40, 0.64), (0.60, 0.64), # arms
+    (0.46, 0.65), (0.54, 0.65), (0.46, 0.76), (0.54, 0.76), (0.46, 0.87), (0.54, 0.87), # legs
+], dtype=np.float32)
+
+
+class SyntheticCamera:
+    """Stand-in camera that renders a stick figure jumping up (nose above the thrust line)
+    and back down every `period` seconds. The figure moves in a single frame, so each
+    jump is a crisp motion event for latency measurement.
+
+    detect() plays the pose model: it returns the keypoints of the last frame rendered,
+    after `inference_time` seconds, so the service runs without ultralytics too."""
+
+    def __init__(self, inference_size=CAMERA_INFERENCE_SIZE, preview_size=CAMERA_PREVIEW_SIZE, fps=CAMERA_FPS, period=1.0, jump=0.15, inference_time=0.05):
+        self.inference_size = tuple(inference_size)
+        self.preview_size = tuple(preview_size)
+        self.frame_interval = 1 / fps
+        self.period = period
+        self.jump = jump
+        self.inference_time = inference_time
+        self.start_time = time.time()
+        self.last_capture = 0.0
+        self.keypoints = STANDING_POSE[None]
+
+    def pose_at(self, t):
+        """[1,17,2] keypoints the script has the figure in at time t."""
+        up = int((t - self.start_time) / self.period) % 2 == 1
+        return (STANDING_POSE - (0, self.jump if up else 0))[None].astype(np.float32)
+
+    def set_inference_size(self, size):
+        self.inference_size = tuple(size)
+
+    @staticmethod
+    def render(keypoints, size):
+        frame = np.full((size[1], size[0], 3), 40, dtype=np.uint8)
+        points = np.round(keypoints[0] * size).astype(int)
+        thickness = max(2, size[0] // 25) # limbs about as wide as a real body, so motion checks see it
+        for a, b in pose.SKELETON:
+            cv2.line(frame, tuple(points[a]), tuple(points[b]), (230, 230, 230), thickness)
+        cv2.circle(frame, tuple(points[pose.NOSE]), thickness * 2, (230, 230, 230), -1)
+        return frame
+
+    def capture(self, want_preview=False):
+        """Returns (inference BGR frame, preview RGB frame or None, capture time), paced like a real camera."""
+        wait = self.last_capture + self.frame_interval - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_capture = time.time()
+
+        self.keypoints = self.pose_at(self.last_capture)
+        inference = self.render(self.keypoints, self.inference_size)
+        preview = self.render(self.keypoints, self.preview_size) if want_preview else None # grey, so BGR == RGB
+        return inference, preview, self.last_capture
+
+    def detect(self, frame):
+        """Scripted stand-in for the pose model: ([1,17,2] keypoints, [1,4] boxes, [1] scores) of the last frame."""
+        time.sleep(self.inference_time)
+        keypoints = self.keypoints
+        boxes = np.concatenate([keypoints.min(axis=1) - 0.02, keypoints.max(axis=1) + 0.02], axis=1)
+        return keypoints, boxes, np.full(1, 0.9, dtype=np.float32)
+
+    def close(self):
+        pass
+
+
+def open_camera(source=CAMERA_SOURCE):
+    """The Pi camera; a SyntheticCamera for source 'synthetic'; otherwise a FileCamera
+    for the video file or image folder `source` names."""
+    if source is None:
+        return PiCamera()
+    if source == 'synthetic':
+        return SyntheticCamera()
+    return FileCamera(source)
@@ -0,0 +1,35 @@
+import numpy as np
+import pygame
+
+
+def rects_array(sprites):
+    """[N,4] (left, top, right, bottom) array of the sprites' rects."""
+    return np.array([(s.rect.left, s.rect.top, s.rect.right, s.rect.bottom) for s in sprites], dtype=np.int32).reshape(-1, 4)
+
+
+def overlapping_pairs(a, b):
+    """[A,B] bool, True where rect a[i] overlaps rect b[j]."""
+    return ((a[:, None, 0] < b[None, :, 2]) & (b[None, :, 0] < a[:, None, 2]) &
+            (a[:, None, 1] < b[None, :, 3]) & (b[None, :, 1] < a[:, None, 3]))
+
+
+def collide_many(sprites, group, dokill=False):
+    """spritecollide for several sprites at once.
+
+    The rect test for every (sprite, group member) pair is one NumPy pass; only
+    the overlapping pairs go on to the per-pixel mask test. Returns one list of
+    hits per sprite, in the order of `sprites`.
+    """
+    hits = [[] for _ in sprites]
+    members = group.sprites()
+    if not sprites or not members:
+        return hits
+
+    candidates = overlapping_pairs(rects_array(sprites), rects_array(members))
+    for i, j in zip(*np.nonzero(candidates)):
+        member = members[j]
+        if member.alive() and pygame.sprite.collide_mask(sprites[i], member):
+            hits[i].append(member)
+            if dokill:
+                member.kill()
+    return hits
@@ -0,0 +1,139 @@
+"""
+Full-skeleton gesture control.
+
+The pose model finds 17 keypoints per person, but the nose alone used to fly the plane. The
+GestureTracker keeps the last GESTURE_WINDOW poses of every player in a NumPy ring buffer,
+[players, window, 17, 3] (x, y, visible), and computes every feature for every player at once:
+
+    flap frequency  arms going up and down past the shoulders, in flaps per second
+    lean angle      shoulders against hips, in degrees from upright (positive leans to the camera's right)
+    crouch depth    how much shorter hip-to-ankle is than when the player stood up straight, 0-1
+    jump velocity   how fast the hips rise, in torso lengths per second
+
+Lengths are in torso lengths, so the features don't change with the distance to the camera.
+controls() turns them into analogue thrust (nose above the thrust line or flapping), a dive
+(crouching) and two actions counted per player: a boost (jumping) and a dodge (leaning).
+
+The pose thread pushes poses and reads the controls while the game thread resets the tracker
+for a new set of players, so every method that touches the window holds the tracker's lock.
+"""
+
+import threading
+
+import numpy as np
+
+from settings import *
+import pose
+
+# the camera frame's aspect ratio, so that angles come out right on a non-square inference frame
+ASPECT = CAMERA_INFERENCE_SIZE[0] / CAMERA_INFERENCE_SIZE[1]
+
+
+def nanmean(values, axis):
+    """np.nanmean without its per-call overhead (it runs many times per pose update); NaN where all are NaN."""
+    seen = ~np.isnan(values)
+    return np.where(seen, values, 0).sum(axis=axis) / seen.sum(axis=axis)
+
+
+def midpoint(points, pair):
+    """[..., 2] mean of a keypoint pair, NaN where either is unseen."""
+    return points[..., pair, :].mean(axis=-2)
+
+
+class GestureTracker:
+    """Rolling window of poses for MAX_PLAYERS player slots, pushed once per new pose frame."""
+
+    def __init__(self, players=MAX_PLAYERS, window=GESTURE_WINDOW):
+        self.poses = np.full((players, window, pose.NUM_KEYPOINTS, 3), np.nan, dtype=np.float32)
+        self.times = np.full(window, np.nan)
+        self.head = 0 # the slot the next pose goes into
+        self.standing = np.full(players, np.nan) # hip-to-ankle height standing up straight, per player
+        self.boosts = np.zeros(players, dtype=int) # actions so far: the game compares with what it has used
+        self.dodges = np.zeros(players, dtype=int)
+        self.last_boost = np.full(players, -np.inf)
+        self.last_dodge = np.full(players, -np.inf)
+        self.leaning = np.zeros(players, dtype=bool)
+        self.lock = threading.RLock() # controls() holds it around features()
+
+    def reset(self):
+        """Forgets everyone, for a new set of players."""
+        with self.lock:
+            self.poses[:] = np.nan
+            self.times[:] = np.nan
+            self.standing[:] = np.nan
+            self.last_boost[:] = self.last_dodge[:] = -np.inf
+            self.leaning[:] = False
+
+    def push(self, keypoints, t):
+        """Adds one pose frame: [players,17,2] keypoints (NaN for empty slots) captured at time t."""
+        seen = pose.visible(keypoints) # unseen keypoints come as (0, 0): NaN them so they drop out of every mean
+        with self.lock:
+            self.poses[:, self.head, :, :2] = np.where(seen[..., None], keypoints, np.nan)
+            self.poses[:, self.head, :, 2] = seen
+            self.times[self.head] = t
+            self.head = (self.head + 1) % len(self.times)
+
+    def window(self):
+        """([players, window, 17, 3] poses, [window] times), oldest first."""
+        order = (self.head + np.arange(len(self.times))) % len(self.times)
+        return self.poses[:, order], self.times[order]
+
+    def features(self):
+        """{'flap_hz', 'lean', 'crouch', 'jump'}: one value per player, NaN where there isn't enough of them to tell."""
+        with self.lock:
+            poses, times = self.window()
+            points = poses[..., :2]
+            shoulders, hips = midpoint(points, pose.SHOULDERS), midpoint(points, pose.HIPS) # [P, W, 2]
+            # slots nobody is in are all NaN; their features stay NaN without a warning for every one
+            with np.errstate(invalid='ignore', divide='ignore'):
+                torso = nanmean(np.linalg.norm(shoulders - hips, axis=-1), axis=1) # [P]
+
+                # arm flaps: wrists relative to the shoulders, counted as crossings of the middle of their swing
+                arms = (points[..., pose.WRISTS, 1].mean(axis=-1) - shoulders[..., 1]) / torso[:, None] # [P, W]
+                highest, lowest = np.fmin.reduce(arms, axis=1), np.fmax.reduce(arms, axis=1) # fmin/fmax skip NaNs
+                middle = ((highest + lowest) / 2)[:, None]
+                swing = lowest - highest
+                side = np.where(arms > middle + GESTURE_FLAP_DEADBAND, 1, np.where(arms < middle - GESTURE_FLAP_DEADBAND, -1, 0))
+                # carry the last side through the dead band (and gaps), so jitter around the middle isn't a flap
+                last_set = np.maximum.accumulate(np.where(side != 0, np.arange(side.shape[1]), 0), axis=1)
+                side = np.take_along_axis(side, last_set, axis=1)
+                crossings = ((side[:, 1:] * side[:, :-1]) < 0).sum(axis=1)
+                span = np.fmax.reduce(times) - np.fmin.reduce(times)
+                flap_hz = np.where(swing >= GESTURE_FLAP_SWING, crossings / 2 / span, 0.0) if span > 0 else np.zeros(len(torso))
+
+                # lean: the newest few poses, hips to shoulders
+                recent = slice(-GESTURE_RECENT, None)
+                spine = nanmean(shoulders[:, recent] - hips[:, recent], axis=1) # [P, 2]
+                lean = np.degrees(np.arctan2(spine[:, 0] * ASPECT, -spine[:, 1]))
+
+                # crouch: hip-to-ankle height against the tallest it has been
+                legs = nanmean(midpoint(points[:, recent], pose.ANKLES)[..., 1] - hips[:, recent, 1], axis=1)
+                self.standing = np.fmax(self.standing, legs)
+                crouch = np.clip(1 - legs / self.standing, 0, 1)
+
+                # jump: least-squares slope of the hip height over the newest poses (y grows downwards)
+                t = times[recent] - nanmean(times[recent], axis=0)
+                y = hips[:, recent, 1] - nanmean(hips[:, recent, 1], axis=1)[:, None]
+                seen = ~np.isnan(y)
+                jump = -np.where(seen, t * y, 0).sum(axis=1) / np.where(seen, t * t, 0).sum(axis=1) / torso
+            return {'flap_hz': flap_hz, 'lean': lean, 'crouch': crouch, 'jump': jump}
+
+    def controls(self, nose_y, now):
+        """(thrust 0-1, dive 0-1) per player from the features and the newest nose heights; counts boosts and dodges."""
+        with self.lock:
+            features = self.features()
+            # fmin/fmax turn a NaN feature into no thrust or dive; comparisons with NaN are False, so no action either
+            flap = np.fmin(np.fmax((features['flap_hz'] - GESTURE_FLAP_MIN_HZ) / (GESTURE_FLAP_FULL_HZ - GESTURE_FLAP_MIN_HZ), 0), 1)
+            thrust = np.where(nose_y < THRUST_NOSE_THRESHOLD, 1.0, flap)
+            dive = np.fmin(np.fmax((features['crouch'] - GESTURE_CROUCH_DEADZONE) / (1 - GESTURE_CROUCH_DEADZONE), 0), 1)
+
+            boost = (features['jump'] >= GESTURE_JUMP_SPEED) & (now - self.last_boost >= GESTURE_COOLDOWN)
+            self.last_boost[boost] = now
+            self.boosts += boost
+            # a dodge per lean: leaning over the line again needs standing up straight in between
+            leaning = np.abs(features['lean']) >= GESTURE_LEAN_ANGLE
+            dodge = leaning & ~self.leaning & (now - self.last_dodge >= GESTURE_COOLDOWN)
+            self.leaning = leaning
+            self.last_dodge[dodge] = now
+            self.dodges += dodge
+            return thrust, dive
@@ -0,0 +1,14 @@
+"""
+What board the game is running on, so tuned settings can be kept per board type.
+"""
+
+import platform
+
+
+def board_name():
+    """The device-tree model on a Pi ('Raspberry Pi 5 Model B Rev 1.0'), otherwise OS and CPU architecture."""
+    try:
+        with open('/proc/device-tree/model') as f:
+            return f.read().rstrip('\x00\n')
+    except OSError:
+        return f"{platform.system()} {platform.machine()}"
@@ -0,0 +1,71 @@
+"""
+Motion-to-photon latency: how long from the camera capturing a pose change to the
+screen showing the plane react to it.
+
+Each pose frame carries timestamps (time.time(), shared by every process on the box)
+as it moves through the pipeline:
+    capture    camera frame the keypoints were inferred from captured (pose service)
+    inference  keypoints ready (pose service)
+    received   frame arrived in the game's pose client
+    applied    game's pose thread published the new nose positions
+    tick       simulation tick where that data changed some Plane.is_thrusting
+    display    pygame.display.update that showed the tick
+"""
+
+import numpy as np
+
+STAGES = ('capture', 'inference', 'received', 'applied', 'tick', 'display')
+HOPS = [(a, b) for a, b in zip(STAGES, STAGES[1:])] + [('capture', 'display')]
+
+
+class LatencyHistogram:
+    """Fixed-bin histogram in milliseconds; anything past max_ms lands in the last bin."""
+
+    def __init__(self, max_ms=500, bin_ms=5):
+        self.bin_ms = bin_ms
+        self.counts = np.zeros(max_ms // bin_ms + 1, dtype=int)
+        self.samples = []
+
+    def add(self, ms):
+        self.counts[min(int(max(ms, 0) // self.bin_ms), len(self.counts) - 1)] += 1
+        self.samples.append(ms)
+
+    def percentiles(self, q=(50, 90, 99)):
+        return np.percentile(self.samples, q) if self.samples else np.zeros(len(q))
+
+    def bars(self, width=40):
+        """Text histogram, one line per non-empty bin."""
+        if not self.samples:
+            return []
+        scale = width / self.counts.max()
+        lines = []
+        for i in np.flatnonzero(self.counts):
+            label = f"{i * self.bin_ms:>4}-{(i + 1) * self.bin_ms:<4}ms"
+            lines.append(f"  {label} {'#' * int(round(self.counts[i] * scale)):<{width}} {self.counts[i]}")
+        return lines
+
+
+class LatencyReport:
+    """Collects one set of stage timestamps per thrust change and reports per-hop and total latency."""
+
+    def __init__(self):
+        self.hops = {hop: LatencyHistogram() for hop in HOPS}
+
+    def record(self, stamps):
+        for (start, end), histogram in self.hops.items():
+            if start in stamps and end in stamps:
+                histogram.add((stamps[end] - stamps[start]) * 1000)
+
+    @property
+    def count(self):
+        return len(self.hops[('capture', 'display')].samples)
+
+    def summary(self):
+        lines = [f"Motion-to-photon latency over {self.count} thrust changes (ms):",
+                 f"  {'hop':<24}{'p50':>8}{'p90':>8}{'p99':>8}"]
+        for (start, end), histogram in self.hops.items():
+            p50, p90, p99 = histogram.percentiles()
+            lines.append(f"  {start + ' -> ' + end:<24}{p50:8.1f}{p90:8.1f}{p99:8.1f}")
+        lines.append("Total (capture -> display):")
+        lines += self.hops[('capture', 'display')].bars()
+        return '\n'.join(lines)
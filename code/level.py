@@ -0,0 +1,254 @@
+"""
+Procedural level streaming.
+
+The course is generated on a background thread, LEVEL_CHUNK_SECONDS of play at a time and
+LEVEL_CHUNKS_AHEAD chunks ahead, and the main loop only spawns what the chunks say once play
+time gets there. A chunk is a list of spawn events: (seconds into the game, sprite kind,
+keyword arguments for the sprite).
+
+Every chunk continues one flyable path. Coins, clouds and obstacles scroll at different
+speeds, so the path is planned in arrival time (when things reach the planes) and each spawn
+is moved back by its sprite's lead. Obstacles come in gates the path goes through, and between
+gates the path only moves as far as the planes can climb (thrust) or fall (gravity) in the
+time, less LEVEL_REACTION_TIME for the pose pipeline and the player. Coin arcs follow the path,
+clouds drift past in layers, and gates get closer together, narrower and more often paired
+as play goes on.
+"""
+
+import heapq
+import queue
+import random
+import threading
+
+from settings import *
+from asset_pack import load_image
+from sprites import Coin, Obstacle
+
+# Centre x of new sprites, just off the right edge
+OBSTACLE_SPAWN_X = WINDOW_WIDTH + 70
+COIN_SPAWN_X = WINDOW_WIDTH + 30
+CLOUD_SPAWN_X = WINDOW_WIDTH + 100
+
+# Difficulty: (easy, hard), interpolated with play time over LEVEL_RAMP_SECONDS
+GATE_SPACING = (3.5, 1.5)  # seconds from the planes clearing one gate to reaching the next
+GATE_SLACK = (140, 0)      # px of gap on top of the narrowest flyable one
+PAIR_CHANCE = (0.0, 0.6)   # of a gate having obstacles above and below instead of one
+
+FIRST_GATE = 5.0           # seconds into the game the first obstacle appears
+PATH_SLACK = 0.7           # share of the planes' climb and fall the path asks for
+GAP_MARGIN = 80            # px of gap left over around a plane holding its height
+GATE_DELAY_STEP = 0.25     # seconds a gate moves back at a time while the path can't reach the gap yet
+ARC_COINS = 3
+COIN_SPACING = 0.3         # seconds between the coins of an arc
+CLOUD_LAYERS = (110, 200, 300) # centre y of the cloud layers
+CLOUDS_PER_CHUNK = (0, 2)
+
+
+def flight_envelope(planes, obstacle_scale):
+    """What the generator needs to know about the planes and the obstacles, in logical pixels.
+    Measured on the main thread, since it reads sprites and loads images."""
+    plane = planes[0]
+    obstacle_width = load_image('./graphics/obstacles/0.png', obstacle_scale).get_width() # both obstacles are this wide
+    return {
+        # the horizontal span every player's plane flies in, and the first plane's centre
+        'left': min(p.rect.left for p in planes),
+        'right': max(p.rect.right for p in planes),
+        'center_x': plane.rect.centerx,
+        'start_y': plane.rect.centery,
+        'height': max(p.rect.height for p in planes),
+        'ceiling': plane.ceiling,
+        'floor': plane.floor,
+        'climb': -plane.thrust, # px/s while thrusting
+        'gravity': plane.gravity,
+        'obstacle_width': obstacle_width,
+    }
+
+
+class LevelGenerator:
+    """Builds a course one chunk at a time. Each call to chunk() returns the next chunk's spawn
+    events, the ones spawning in its LEVEL_CHUNK_SECONDS of play, sorted by spawn time."""
+
+    def __init__(self, envelope, seed=None, ramp=LEVEL_RAMP_SECONDS, reaction_time=LEVEL_REACTION_TIME):
+        self.envelope = envelope
+        self.random = random.Random(seed)
+        self.ramp = ramp
+        self.reaction_time = reaction_time
+
+        # a plane holding its height bobs by one thrust pulse's rise (v^2 / 2g)
+        self.min_gap = envelope['height'] + envelope['climb'] ** 2 / (2 * envelope['gravity']) + GAP_MARGIN
+        # seconds from spawning to reaching the planes, and how long a gate takes to pass all of them
+        self.obstacle_lead = (OBSTACLE_SPAWN_X - envelope['obstacle_width'] / 2 - envelope['right']) / Obstacle.speed
+        self.gate_duration = (envelope['obstacle_width'] + envelope['right'] - envelope['left']) / Obstacle.speed
+        self.coin_lead = (COIN_SPAWN_X - envelope['center_x']) / Coin.speed
+
+        # the path: the planes' centre y after the last gate, and when that gate was passed
+        self.path_time = 0.0
+        self.path_y = envelope['start_y']
+        self.next_gate = self.obstacle_lead + FIRST_GATE # arrival of the next gate
+        self.pending = [] # planned events that spawn after the chunks built so far
+        self.index = 0
+
+    def lerp(self, ends, t):
+        """The difficulty setting `ends` (easy, hard) at t seconds into the game."""
+        easy, hard = ends
+        return easy + (hard - easy) * min(1.0, t / self.ramp)
+
+    def reach(self, duration, climbing):
+        """How far the path may move in `duration` seconds: climbing at full thrust, or falling
+        from a standstill, once the reaction time is up."""
+        duration = max(0.0, duration - self.reaction_time)
+        if climbing:
+            return self.envelope['climb'] * duration * PATH_SLACK
+        return self.envelope['gravity'] * duration ** 2 / 2 * PATH_SLACK
+
+    def chunk(self):
+        start = self.index * LEVEL_CHUNK_SECONDS
+        end = start + LEVEL_CHUNK_SECONDS
+        self.index += 1
+
+        # plan gates until nothing still unplanned could spawn before the end of this chunk:
+        # the next gate's obstacles, or the coins on the way to it
+        while min(self.next_gate - self.obstacle_lead, self.path_time - self.coin_lead) < end:
+            self.pending += self.gate()
+        self.pending += self.clouds(start, end)
+
+        self.pending.sort(key=lambda event: event[0])
+        split = next((i for i, event in enumerate(self.pending) if event[0] >= end), len(self.pending))
+        events, self.pending = self.pending[:split], self.pending[split:]
+        return events
+
+    def gate(self):
+        """Plans the next gate and the coins leading up to it."""
+        envelope = self.envelope
+        t_in = self.next_gate
+        # the slack goes first on a flying area too short for the gap; one too short for even
+        # the narrowest flyable gap gets no gates at all
+        gap = min(self.min_gap + self.lerp(GATE_SLACK, t_in), envelope['floor'] - envelope['ceiling'])
+        if gap < self.min_gap:
+            self.path_time = t_in + self.gate_duration # the path holds its height through where the gate would be
+            self.next_gate = self.path_time + self.lerp(GATE_SPACING, t_in)
+            return []
+
+        # somewhere the planes can get to from where the path left off, inside the flying area;
+        # if that's nowhere yet (the path ends outside the area this gap leaves), the gate comes later
+        while True:
+            y_min = max(envelope['ceiling'] + gap / 2, self.path_y - self.reach(t_in - self.path_time, True))
+            y_max = min(envelope['floor'] - gap / 2, self.path_y + self.reach(t_in - self.path_time, False))
+            if y_min <= y_max:
+                break
+            t_in += GATE_DELAY_STEP
+        t_out = t_in + self.gate_duration
+        y = self.random.uniform(y_min, y_max)
+        events = self.coin_arc(self.path_time, self.path_y, t_in, y)
+
+        # the obstacles' tips sit on the gap's edges; a single one blocks the larger side
+        spawn = t_in - self.obstacle_lead
+        pair = self.random.random() < self.lerp(PAIR_CHANCE, t_in)
+        if pair or y > (envelope['ceiling'] + envelope['floor']) / 2:
+            events.append((spawn, 'obstacle', {'orientation': 'down', 'variant': self.random.randint(0, 1),
+                                               'x': OBSTACLE_SPAWN_X, 'tip': y - gap / 2}))
+        if pair or y <= (envelope['ceiling'] + envelope['floor']) / 2:
+            events.append((spawn, 'obstacle', {'orientation': 'up', 'variant': self.random.randint(0, 1),
+                                               'x': OBSTACLE_SPAWN_X, 'tip': y + gap / 2}))
+        # and a coin in the middle of the gap for threading it
+        events.append(((t_in + t_out) / 2 - self.coin_lead, 'coin', {'center': (COIN_SPAWN_X, y)}))
+
+        self.next_gate = t_out + self.lerp(GATE_SPACING, t_in) * self.random.uniform(0.85, 1.15)
+        self.path_time, self.path_y = t_out, y
+        return events
+
+    def coin_arc(self, t0, y0, t1, y1):
+        """An arc of coins bulging up from the path between (t0, y0) and (t1, y1), in arrival time."""
+        envelope = self.envelope
+        t0 = max(t0, self.coin_lead) + COIN_SPACING # nothing spawns before the game starts
+        t1 -= COIN_SPACING
+        count = min(ARC_COINS, int((t1 - t0) / COIN_SPACING) + 1)
+        if count < 2:
+            return []
+        first = t0 + (t1 - t0 - (count - 1) * COIN_SPACING) * self.random.random()
+        length = (count - 1) * COIN_SPACING
+        rise = self.random.uniform(0.3, 1.0) * self.reach(length / 2 + self.reaction_time, True)
+        y_min = envelope['ceiling'] + envelope['height'] / 2
+        y_max = envelope['floor'] - envelope['height'] / 2
+
+        events = []
+        for i in range(count):
+            t = first + i * COIN_SPACING
+            along = (t - t0) / (t1 - t0)
+            bulge = 1 - (2 * i / (count - 1) - 1) ** 2 # 0 at the ends of the arc, 1 in the middle
+            y = min(max(y0 + (y1 - y0) * along - rise * bulge, y_min), y_max)
+            events.append((t - self.coin_lead, 'coin', {'center': (COIN_SPAWN_X, y)}))
+        return events
+
+    def clouds(self, start, end):
+        """A few clouds spawning between start and end, along one of the cloud layers."""
+        count = self.random.randint(*CLOUDS_PER_CHUNK)
+        layer = self.random.choice(CLOUD_LAYERS)
+        return [(start + (i + self.random.uniform(0.2, 0.8)) * (end - start) / count, 'cloud',
+                 {'center': (CLOUD_SPAWN_X, layer + self.random.uniform(-25, 25)), 'variant': self.random.randint(1, 8)})
+                for i in range(count)]
+
+
+class LevelStream:
+    """Plays courses in: a LevelGenerator runs on a background thread keeping LEVEL_CHUNKS_AHEAD
+    chunks built, and update() hands out the spawns that play time has reached."""
+
+    def __init__(self, envelope, seed=LEVEL_SEED):
+        self.envelope = envelope
+        self.seed = seed
+        self.thread = None
+        self.stop_building = None
+        self.chunks = None
+        self.pending = []
+
+    def start(self):
+        """Starts a new course from its beginning."""
+        self.stop()
+        self.time = 0.0           # play seconds streamed so far
+        self.loaded_until = 0.0   # play time the chunks taken from the thread cover
+        self.pending = []         # heap of (spawn time, order, kind, kwargs)
+        self.order = 0
+        self.chunks = queue.Queue(maxsize=LEVEL_CHUNKS_AHEAD)
+        self.stop_building = threading.Event()
+        generator = LevelGenerator(self.envelope, self.seed)
+        self.thread = threading.Thread(target=self.build, args=(generator, self.chunks, self.stop_building), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.stop_building.set()
+            self.thread.join()
+            self.thread = None
+        self.pending = []
+
+    @staticmethod
+    def build(generator, chunks, stop_building):
+        while not stop_building.is_set():
+            chunk = generator.chunk()
+            while not stop_building.is_set():
+                try:
+                    chunks.put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def update(self, dt):
+        """Advances play time by dt. Returns the spawns due as (kind, kwargs, late), late being
+        how many seconds ago the sprite should have appeared."""
+        self.time += dt
+        # stay a chunk ahead of play; the thread has normally built it long before
+        while self.loaded_until <= self.time + LEVEL_CHUNK_SECONDS:
+            try:
+                chunk = self.chunks.get_nowait()
+            except queue.Empty:
+                break
+            for spawn_time, kind, kwargs in chunk:
+                heapq.heappush(self.pending, (spawn_time, self.order, kind, kwargs))
+                self.order += 1
+            self.loaded_until += LEVEL_CHUNK_SECONDS
+
+        due = []
+        while self.pending and self.pending[0][0] <= self.time:
+            spawn_time, _, kind, kwargs = heapq.heappop(self.pending)
+            due.append((kind, kwargs, self.time - spawn_time))
+        return due
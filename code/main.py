@@ -1,13 +1,23 @@
 import threading
-import cv2
-from picamera2 import Picamera2
-from ultralytics import YOLO
 import numpy as np
 import pygame, sys, time
 from enum import Enum, auto
 
 from settings import *
 from sprites import BG, Ground, Plane, Coin, Cloud, Pilot, Obstacle
+import asset_pack
+import collisions
+import pose
+import gestures
+import profiles
+import hardware
+from pose_client import PoseClient
+from latency import LatencyReport
+from resolution import ResolutionController
+from particles import ParticleSystem
+from level import LevelStream, flight_envelope
+from spectator import SpectatorOutput
+from sessions import SessionStore
 
 
 class GameState(Enum):
@@ -21,10 +31,17 @@ class Game:
         pygame.init()
         # Create the actual screen at target resolution
         self.screen = pygame.display.set_mode((TARGET_SCREEN_WIDTH, TARGET_SCREEN_HEIGHT), pygame.FULLSCREEN)
-        # Create an internal surface for rendering the game at its native resolution
-        self.display_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)) 
+        # Internal surfaces for rendering the game, one per render scale of its logical
+        # WINDOW_WIDTH x WINDOW_HEIGHT resolution; the controller picks one each frame
+        self.render_surfaces = {render_scale: pygame.Surface((round(WINDOW_WIDTH * render_scale), round(WINDOW_HEIGHT * render_scale)))
+                                for render_scale in RENDER_SCALES}
+        self.resolution = ResolutionController()
+        self.render_scale = self.resolution.scale
+        self.display_surface = self.render_surfaces[self.render_scale]
+        self.upscale = pygame.transform.smoothscale if UPSCALE_METHOD == 'smoothscale' else pygame.transform.scale
         pygame.display.set_caption('AI Plane Game')
         self.clock = pygame.time.Clock()
+        self.framerate = FRAMERATE # lower while the pose service's thermal governor caps it
         self.active = True 
 
         # Game State
@@ -39,148 +56,300 @@ class Game:
         self.coin_sprites = pygame.sprite.Group() 
         self.obstacle_sprites = pygame.sprite.Group() 
 
+        # baked sprites (python code/asset_pack.py); falls back to decoding PNGs if missing
+        asset_pack.open_pack(ASSET_PACK_PATH)
+
         # scale factor (remains based on original WINDOW_WIDTH for game logic)
-        bg_image_for_scale = pygame.image.load('./graphics/environment/background.png').convert()
-        bg_width = bg_image_for_scale.get_width()
-        self.scale_factor = WINDOW_WIDTH / bg_width
+        self.scale_factor = asset_pack.scale_factor_for(WINDOW_WIDTH)
 
         # sprite setup
         self.bg_sprite = BG(None, self.scale_factor) 
         self.ground_sprite = Ground(self.all_sprites, self.scale_factor)
-        self.plane = Plane(self.all_sprites, self.scale_factor / 2)
-        self.pilot_indicator = Pilot(None, self.scale_factor) 
-
-        # timers
-        self.coin_timer = pygame.USEREVENT + 1
-        self.cloud_timer = pygame.USEREVENT + 2
-        self.obstacle_timer = pygame.USEREVENT + 3 # New timer for obstacles
-        
-        # text
-        self.font = pygame.font.Font('./graphics/font/Kenney Pixel.ttf', 30)
-        self.status_font = pygame.font.Font('./graphics/font/Kenney Pixel.ttf', 24) 
-        self.game_over_font = pygame.font.Font('./graphics/font/Kenney Pixel.ttf', 50) 
+        # one plane and pilot indicator per player slot; slots that don't join a game sit it out
+        self.planes = [Plane(self.all_sprites, self.scale_factor / 2, i) for i in range(MAX_PLAYERS)]
+        self.pilot_indicators = [Pilot(None, self.scale_factor, i) for i in range(MAX_PLAYERS)]
+        self.players_joined = np.zeros(MAX_PLAYERS, dtype=bool)
+        self.players_alive = np.zeros(MAX_PLAYERS, dtype=bool)
+        self.particles = ParticleSystem()
+
+        # the course: coins, clouds and obstacles streamed in from a generator thread
+        self.level = LevelStream(flight_envelope(self.planes, self.scale_factor))
+
+        # mirror of the game for a second screen, encoded in another process
+        self.spectator = SpectatorOutput() if SPECTATOR_STREAM else None
+
+        # session telemetry and the leaderboard, written to disk by a background thread
+        self.sessions = SessionStore()
+        self.leaderboard = []
+        self.session_started = 0.0
+        self.session_frame_ms = []  # frame times while playing, for the percentiles
+        self.session_pose_frames = 0  # new pose results while playing
+        self.session_render_scale = self.render_scale # the lowest it went
+        self.crash_causes = np.full(MAX_PLAYERS, 'time_up', dtype=object)
+
+        # text (one font variant per render scale, sizes in logical pixels)
+        self.fonts = {name: {render_scale: pygame.font.Font('./graphics/font/Kenney Pixel.ttf', round(size * render_scale))
+                             for render_scale in RENDER_SCALES}
+                      for name, size in (('score', 30), ('status', 24), ('game_over', 50))}
         self.time_score = 0 
-        self.coin_score = 0
+        self.coin_scores = np.zeros(MAX_PLAYERS, dtype=int)
+        self.player_times = np.zeros(MAX_PLAYERS, dtype=int) # seconds each player stayed in the air
 
         # Game Timer
         self.game_play_start_ticks = 0 
         self.game_duration_limit = 30.0 
+        self.final_scores = np.zeros(MAX_PLAYERS, dtype=int)
         self.final_total_score = 0
 
         # Game Over Timer
         self.game_over_start_ticks = 0
         self.game_over_display_duration = 10.0
 
-        # camera setup for YOLO
-        self.model = YOLO('yolo11n-pose_ncnn_model')
-        self.picam2 = Picamera2()
-        self.picam2.preview_configuration.main.size = (320, 320)
-        self.picam2.preview_configuration.main.format = "RGB888"
-        self.picam2.preview_configuration.align()
-        self.picam2.configure("preview")
-        self.picam2.start()
-        self.latest_nose_position = 0.5
+        # pose input comes from the shared pose service (python code/pose_service.py)
+        self.pose_client = PoseClient(*self.pose_subscription())
+        self.player_assigner = pose.PlayerAssigner(MAX_PLAYERS, PLAYER_ASSIGNMENT)
+        self.player_track_age = np.zeros(MAX_PLAYERS, dtype=int)            # frames each player has been tracked
+        self.player_track_confidence = np.zeros(MAX_PLAYERS, dtype=np.float32)
+        self.latest_nose_positions = np.full(MAX_PLAYERS, 0.5)
+        # gesture control: the last poses of every player, and the thrust and dive they make
+        self.gestures = gestures.GestureTracker()
+        self.gesture_capture = None # capture time of the camera frame last pushed
+        self.gesture_thrust = np.zeros(MAX_PLAYERS)
+        self.gesture_dive = np.zeros(MAX_PLAYERS)
+        self.boosts_used = np.zeros(MAX_PLAYERS, dtype=int)
+        self.dodges_used = np.zeros(MAX_PLAYERS, dtype=int)
+        self.players_in_box = np.zeros(MAX_PLAYERS, dtype=bool)
         self.latest_camera_frame = None
+        # motion-to-photon latency: pipeline timestamps of the pose frame behind latest_nose_positions
+        self.latest_pose_stamps = None
+        self.measured_pose_stamps = None # the stamps already credited with a thrust change
+        self.pending_latency = None # a thrust change waiting for its display update
+        self.latency_report = LatencyReport()
         self.pose_thread_running = True
-        self.pose_thread = threading.Thread(target=self.pose_detection_thread)
+        # a daemon, so an exception anywhere in the game still lets the interpreter exit
+        self.pose_thread = threading.Thread(target=self.pose_detection_thread, daemon=True)
         self.pose_thread.start()
     
 
+    def pose_subscription(self):
+        """What the current state needs from the pose service: (fields, rate mode)."""
+        player_fields = ('keypoints', 'track_ids', 'track_age', 'track_confidence')
+        if self.state == GameState.WAITING_FOR_PLAYER:
+            return player_fields + ('preview',), 'idle' # nobody around: the service may idle
+        if self.state == GameState.PLAYER_IN_BOX_TIMER_ACTIVE:
+            return player_fields + ('preview',), 'full'
+        if self.state == GameState.PLAYING:
+            return player_fields, 'full'
+        return player_fields, 'paused' # game over: no pose needed
+
     def pose_detection_thread(self):
         while self.pose_thread_running:
-            # If the game is over, skip camera capture and pose detection
-            if self.state == GameState.GAME_OVER:
-                time.sleep(0.05)  # Sleep briefly to prevent busy-looping and yield CPU
-                continue  # Skip the rest of the loop for this iteration
+            self.pose_client.subscribe(*self.pose_subscription())
+            pose_frame = self.pose_client.wait_frame(timeout=0.1)
 
-            try:
-                frame = self.picam2.capture_array()
-                if frame is None: # Basic check
-                    time.sleep(0.05)
-                    continue
+            # If the game is over (or the service is quiet), skip pose processing
+            if pose_frame is None or self.state == GameState.GAME_OVER:
+                continue
 
-                results = self.model.predict(frame, imgsz=320, verbose=False)
-                
-                # Conditional plotting based on whether the camera feed is shown
+            try:
+                # Camera feed is only subscribed to while it is shown
+                if 'preview' in pose_frame:
+                    self.latest_camera_frame = pose_frame['preview']
+                if 'keypoints' not in pose_frame:
+                    continue # preview-only frame while the service idles
+
+                # Everyone the service found, as one [N,17,2] array with stable track IDs, reordered into player slots
+                keypoints, track_ids = pose_frame['keypoints'], pose_frame['track_ids']
+                slots = self.player_assigner.assign(keypoints, track_ids)
+                player_keypoints = pose.gather_players(keypoints, slots) # NaN rows for empty slots
+                detected = slots != pose.NO_PLAYER
+                self.player_track_age = pose.gather_slots(pose_frame['track_age'], slots, 0)
+                self.player_track_confidence = pose.gather_slots(pose_frame['track_confidence'], slots, 0.0)
+
+                # Logic for players_in_box (used in WAITING/TIMER_ACTIVE states), one pass for all players
+                players_in_box = np.zeros(MAX_PLAYERS, dtype=bool)
                 if self.state == GameState.WAITING_FOR_PLAYER or self.state == GameState.PLAYER_IN_BOX_TIMER_ACTIVE:
-                    if results and hasattr(results[0], 'plot'): # Check if results and plot method exist
-                        annotated_frame_bgr = results[0].plot(boxes=False, labels=False)
-                        annotated_frame_rgb = cv2.cvtColor(annotated_frame_bgr, cv2.COLOR_BGR2RGB)
-                        self.latest_camera_frame = annotated_frame_rgb.copy()
-                # else: self.latest_camera_frame is not updated if not in these states, which is intended.
-                
-                current_all_in_box = False
-                # Default nose position if no keypoints are found or processed.
-                # This ensures self.latest_nose_position always has a valid float.
-                nose_y_val = 0.5 
-
-                if results and results[0].keypoints and results[0].keypoints.xyn.nelement() > 0:
-                    keypoints_normalized = results[0].keypoints.xyn[0] 
-                    if len(keypoints_normalized) > 0: 
-                        # Logic for all_keypoints_in_target_box (used in WAITING/TIMER_ACTIVE states)
-                        if self.state == GameState.WAITING_FOR_PLAYER or self.state == GameState.PLAYER_IN_BOX_TIMER_ACTIVE:
-                            all_inside = True
-                            for kx_tensor, ky_tensor in keypoints_normalized:
-                                kx, ky = kx_tensor.item(), ky_tensor.item()
-                                if not (self.target_box_norm['x_min'] <= kx <= self.target_box_norm['x_max'] and
-                                        self.target_box_norm['y_min'] <= ky <= self.target_box_norm['y_max']):
-                                    all_inside = False
-                                    break
-                            current_all_in_box = all_inside
-                        
-                        # Logic for latest_nose_position (keypoint 0 is typically the nose)
-                        # Ensure at least one keypoint (nose) exists to get its Y-coordinate
-                        nose_keypoint_y_tensor = keypoints_normalized[0][1] 
-                        nose_y_val = float(nose_keypoint_y_tensor.item())
-
-                self.all_keypoints_in_target_box = current_all_in_box
-                self.latest_nose_position = nose_y_val
+                    players_in_box = pose.keypoints_in_box(player_keypoints, self.target_box_norm)
+
+                # Nose Y per player (keypoint 0), 0.5 (no thrust) for slots with nobody in them
+                nose_y = np.where(detected, player_keypoints[:, pose.NOSE, 1], 0.5)
+
+                self.players_in_box = players_in_box
+                self.all_keypoints_in_target_box = bool(players_in_box.any())
+                self.latest_nose_positions = nose_y
+                if GESTURE_CONTROL and pose_frame['t_capture'] != self.gesture_capture:
+                    # every camera frame counts, reused keypoints too: the frame barely changed, and that is a pose at that time
+                    self.gesture_capture = pose_frame['t_capture']
+                    self.gestures.push(player_keypoints, self.gesture_capture)
+                    self.gesture_thrust, self.gesture_dive = self.gestures.controls(nose_y, self.gesture_capture)
+                if self.state == GameState.PLAYING and not pose_frame['reused']:
+                    self.session_pose_frames += 1 # inferences only: the motion gate's reused keypoints aren't new results
+                self.framerate = min(FRAMERATE, pose_frame.get('max_framerate') or FRAMERATE)
+                self.latest_pose_stamps = {'capture': pose_frame['t_source'], 'inference': pose_frame['t_inference'],
+                                           'received': pose_frame['t_received'], 'applied': time.time()}
             
             except Exception as e:
-                # print(f"Error in pose_detection_thread: {e}") # Uncomment for debugging
+                print(f"Error in pose_detection_thread: {e!r}")
                 # Set safe defaults in case of an unexpected error during processing
-                self.latest_nose_position = 0.5 
+                self.latest_nose_positions = np.full(MAX_PLAYERS, 0.5)
+                self.players_in_box = np.zeros(MAX_PLAYERS, dtype=bool)
                 self.all_keypoints_in_target_box = False
                 # self.latest_camera_frame could remain or be cleared
                 time.sleep(0.1) # Pause briefly after an error
 
 
+    def set_thrust(self, thrusting, dive=0.0):
+        """Sets every player's plane and pilot; thrusting is one bool or 0-1 amount per player (or one for all), dive likewise."""
+        for plane, pilot, amount, dive_amount in zip(self.planes, self.pilot_indicators, np.broadcast_to(thrusting, (MAX_PLAYERS,)),
+                                                     np.broadcast_to(dive, (MAX_PLAYERS,))):
+            plane.set_thrust(amount, dive_amount)
+            pilot.set_state(bool(amount > 0))
+
+    def apply_gesture_actions(self):
+        """Boosts and dodges the players made since the last frame."""
+        boosts, dodges = self.gestures.boosts.copy(), self.gestures.dodges.copy() # the pose thread keeps counting
+        for i in np.flatnonzero((boosts > self.boosts_used) & self.players_alive):
+            self.planes[i].boost()
+        for i in np.flatnonzero((dodges > self.dodges_used) & self.players_alive):
+            self.planes[i].dodge()
+        self.boosts_used, self.dodges_used = boosts, dodges
+
+    def start_players(self):
+        """Everyone standing in the box when the countdown ends gets a plane."""
+        self.players_joined = self.players_in_box.copy()
+        if not self.players_joined.any():
+            self.players_joined[0] = True
+        self.players_alive = self.players_joined.copy()
+        # from now on only the calibrated people control the planes
+        self.player_assigner.lock(self.players_joined)
+        # their gestures start from here; jumps into the box don't boost
+        self.gestures.reset()
+        self.boosts_used, self.dodges_used = self.gestures.boosts.copy(), self.gestures.dodges.copy()
+        for plane, joined in zip(self.planes, self.players_joined):
+            if not joined:
+                plane.kill()
+
+    def crash_players(self, crashed):
+        """Takes crashed planes out of the game. The last one stays on screen for the game over frame."""
+        crashed = crashed & self.players_alive
+        self.player_times[crashed] = self.time_score
+        self.players_alive &= ~crashed
+        for i in np.flatnonzero(crashed):
+            self.particles.emit('crash', self.planes[i].rect.center)
+        if self.players_alive.any():
+            for i in np.flatnonzero(crashed):
+                self.planes[i].kill()
+
     def check_coin_collisions(self):
-        collided_coins = pygame.sprite.spritecollide(self.plane, self.coin_sprites, True, pygame.sprite.collide_mask)
-        self.coin_score += len(collided_coins)
+        # every flying plane against every coin in one batched rect pass, masks only for overlaps
+        flying = np.flatnonzero(self.players_alive)
+        hits = collisions.collide_many([self.planes[i] for i in flying], self.coin_sprites, True)
+        self.coin_scores[flying] += [len(collided_coins) for collided_coins in hits]
+        for collided_coins in hits:
+            for coin in collided_coins:
+                self.particles.emit('coin', coin.rect.center)
 
     def check_obstacle_collisions(self):
-        if pygame.sprite.spritecollide(self.plane, self.obstacle_sprites, False, pygame.sprite.collide_mask):
-            return True
-        return False
-
+        """Returns one bool per player, True where a flying plane hit an obstacle. Dodging planes pass through."""
+        crashed = np.zeros(MAX_PLAYERS, dtype=bool)
+        flying = np.flatnonzero(self.players_alive & ~np.array([plane.dodging for plane in self.planes]))
+        hits = collisions.collide_many([self.planes[i] for i in flying], self.obstacle_sprites)
+        crashed[flying] = [len(collided) > 0 for collided in hits]
+        for i, collided in zip(flying, hits):
+            if collided: # for the session store: crashed into one on the ground or one hanging down
+                self.crash_causes[i] = f"obstacle_{collided[0].orientation}"
+        return crashed
+
+
+    def stream_level(self, dt):
+        """Spawns whatever the course has reached, moved on by however late it is."""
+        for kind, kwargs, late in self.level.update(dt):
+            if kind == 'coin':
+                sprite = Coin([self.all_sprites, self.coin_sprites], self.scale_factor / 3, **kwargs)
+            elif kind == 'cloud':
+                sprite = Cloud(self.all_sprites, self.scale_factor / 3, **kwargs)
+            else:
+                sprite = Obstacle([self.all_sprites, self.obstacle_sprites], self.scale_factor, **kwargs)
+            sprite.update(late)
+
+
+    def record_session(self):
+        """Hands the game that just ended to the session store and takes the leaderboard it makes."""
+        frame_ms = np.percentile(self.session_frame_ms, (50, 90, 99)).round(2).tolist() if self.session_frame_ms else [None] * 3
+        duration = time.time() - self.session_started
+        players = np.flatnonzero(self.players_joined)
+        self.sessions.record({
+            'started': self.session_started, 'board': hardware.board_name(), 'duration': round(duration, 2),
+            'players': len(players), 'pose_hz': round(self.session_pose_frames / duration, 1) if duration > 0 else None,
+            'frame_ms_p50': frame_ms[0], 'frame_ms_p90': frame_ms[1], 'frame_ms_p99': frame_ms[2],
+            'render_scale': self.session_render_scale,
+            'scores': [{'player': int(player), 'score': int(self.final_scores[player]), 'coins': int(self.coin_scores[player]),
+                        'air_time': int(self.player_times[player]), 'cause': self.crash_causes[player]} for player in players]})
+        self.leaderboard = self.sessions.leaderboard()
+
+    def display_leaderboard(self):
+        x = WINDOW_WIDTH * 3 // 4
+        self.draw_text('status', "Top scores", (255, 215, 0), center=(x, WINDOW_HEIGHT // 2 - 50))
+        for row, entry in enumerate(self.leaderboard):
+            # this game's scores stand out
+            color = (255, 69, 0) if entry['started'] == self.session_started else (255, 255, 255)
+            self.draw_text('status', f"{row + 1}. {entry['score']}", color, center=(x, WINDOW_HEIGHT // 2 - 10 + row * 30))
+
+
+    def to_render(self, pos):
+        """A logical (WINDOW_WIDTH x WINDOW_HEIGHT) position on the current render surface."""
+        return round(pos[0] * self.render_scale), round(pos[1] * self.render_scale)
+
+    def draw_sprites(self, sprites):
+        """Draws logical-space sprites with their variants for the current render scale, in one blits call."""
+        self.display_surface.blits([(sprite.render_image(self.render_scale), self.to_render(sprite.rect.topleft)) for sprite in sprites])
+
+    def draw_text(self, font, text, color, **anchor):
+        """Renders text in the current render scale's variant of `font`, e.g. draw_text('score', ..., topleft=(50, 50)) in logical pixels."""
+        text_surface = self.fonts[font][self.render_scale].render(text, True, color)
+        (anchor_name, pos), = anchor.items()
+        self.display_surface.blit(text_surface, text_surface.get_rect(**{anchor_name: self.to_render(pos)}))
 
     def display_score(self):
         # self.time_score is updated in the PLAYING state logic
-        time_score_surface = self.font.render(f"Time: {self.time_score}", True, 'white')
-        time_score_rect = time_score_surface.get_rect(topleft = (50, 50))
+        self.draw_text('score', f"Time: {self.time_score}", 'white', topleft=(50, 50))
 
-        coin_score_surface = self.font.render(f"Coins: {self.coin_score}", True, 'white')
-        coin_score_rect = coin_score_surface.get_rect(topleft = (50, 100))
-
-        self.display_surface.blit(time_score_surface, time_score_rect)
-        self.display_surface.blit(coin_score_surface, coin_score_rect)
+        for row, player in enumerate(np.flatnonzero(self.players_joined)):
+            label = "Coins" if MAX_PLAYERS == 1 else f"P{player + 1} Coins"
+            self.draw_text('score', f"{label}: {self.coin_scores[player]}", 'white', topleft=(50, 100 + row * 40))
 
 
     def reset_game_for_restart(self):
         """Resets variables for a new game session."""
         self.time_score = 0
-        self.coin_score = 0
+        self.coin_scores[:] = 0
+        self.player_times[:] = 0
+        self.final_scores[:] = 0
         self.final_total_score = 0
         self.player_in_box_duration = 0.0
+        self.session_frame_ms = []
+        self.session_pose_frames = 0
+        self.session_render_scale = self.render_scale
+        self.crash_causes[:] = 'time_up'
         self.active = True 
         
+        self.particles.clear()
+
         # Clear existing coins and obstacles
         for sprite in self.coin_sprites:
             sprite.kill() 
         for sprite in self.obstacle_sprites:
             sprite.kill()
 
+        # Bring back planes that crashed or sat out, and let new people take the slots
+        for plane in self.planes:
+            if not plane.alive():
+                self.all_sprites.add(plane)
+            plane.boost_time = plane.dodge_time = 0.0
+        self.players_joined[:] = False
+        self.players_alive[:] = False
+        self.player_assigner.reset()
+
         # Reset plane position (optional)
         # self.plane.reset_position() 
 
@@ -190,6 +359,7 @@ class Game:
         while True:
             dt = time.time() - last_time
             last_time = time.time()
+            frame_start = time.perf_counter()
 
             # --- Event Handling ---
             for event in pygame.event.get():
@@ -197,16 +367,15 @@ class Game:
                     self.pose_thread_running = False
                     if self.pose_thread.is_alive():
                         self.pose_thread.join()
-                    self.picam2.stop()
+                    self.pose_client.close()
+                    self.level.stop()
+                    if self.spectator is not None:
+                        self.spectator.close()
+                    self.sessions.close() # writes out any game still queued
+                    if LATENCY_REPORT and self.latency_report.count:
+                        print(self.latency_report.summary())
                     pygame.quit()
                     sys.exit()
-                if self.state == GameState.PLAYING:
-                    if event.type == self.coin_timer:
-                        Coin([self.all_sprites, self.coin_sprites], self.scale_factor / 3)
-                    if event.type == self.cloud_timer: 
-                        Cloud(self.all_sprites, self.scale_factor / 3)
-                    if event.type == self.obstacle_timer:
-                        Obstacle([self.all_sprites, self.obstacle_sprites], self.scale_factor)
 
 
             # --- State Management ---
@@ -214,8 +383,7 @@ class Game:
                 if self.all_keypoints_in_target_box:
                     self.state = GameState.PLAYER_IN_BOX_TIMER_ACTIVE
                     self.player_in_box_duration = 0.0 
-                self.plane.set_thrust(False) 
-                self.pilot_indicator.set_state(False)
+                self.set_thrust(False)
             elif self.state == GameState.PLAYER_IN_BOX_TIMER_ACTIVE:
                 if self.all_keypoints_in_target_box:
                     self.player_in_box_duration += dt
@@ -223,86 +391,109 @@ class Game:
                         self.state = GameState.PLAYING
                         self.game_play_start_ticks = pygame.time.get_ticks() 
                         self.time_score = 0 
-                        self.coin_score = 0 
-                        pygame.time.set_timer(self.coin_timer, 3000) 
-                        pygame.time.set_timer(self.cloud_timer, 7000) 
-                        pygame.time.set_timer(self.obstacle_timer, 5000) 
+                        self.coin_scores[:] = 0
+                        self.start_players()
+                        self.level.start()
+                        self.session_started = time.time()
                         self.active = True 
                 else: 
                     self.state = GameState.WAITING_FOR_PLAYER
                     self.player_in_box_duration = 0.0
-                self.plane.set_thrust(False) 
-                self.pilot_indicator.set_state(False)
+                self.set_thrust(False)
             
             elif self.state == GameState.PLAYING:
                 current_elapsed_play_time = (pygame.time.get_ticks() - self.game_play_start_ticks) // 1000
                 self.time_score = current_elapsed_play_time 
-
-                is_thrusting_now = self.latest_nose_position < 0.3
-                self.plane.set_thrust(is_thrusting_now)
-                self.pilot_indicator.set_state(is_thrusting_now)
+                self.session_frame_ms.append(dt * 1000)
+                self.session_render_scale = min(self.session_render_scale, self.render_scale)
+
+                # thrust for every player at once: analogue from gestures, or the nose above the line
+                pose_stamps = self.latest_pose_stamps
+                if GESTURE_CONTROL:
+                    thrust, dive = self.gesture_thrust * self.players_alive, self.gesture_dive * self.players_alive
+                    self.apply_gesture_actions()
+                else:
+                    thrust, dive = (self.latest_nose_positions < THRUST_NOSE_THRESHOLD) & self.players_alive, 0.0
+                is_thrusting_now = thrust > 0
+                was_thrusting = np.array([plane.is_thrusting for plane in self.planes])
+                self.set_thrust(thrust, dive)
+                # the first tick a new pose frame flips a plane's thrust starts a latency sample
+                if pose_stamps is not None and pose_stamps is not self.measured_pose_stamps and (is_thrusting_now != was_thrusting).any():
+                    self.pending_latency = dict(pose_stamps, tick=time.time())
+                    self.measured_pose_stamps = pose_stamps
 
                 game_over_triggered = False
                 if current_elapsed_play_time >= self.game_duration_limit:
                     game_over_triggered = True
                 
-                if self.active and self.check_obstacle_collisions(): 
-                    game_over_triggered = True
+                if self.active:
+                    self.crash_players(self.check_obstacle_collisions())
+                    if not self.players_alive.any():
+                        game_over_triggered = True
 
                 if game_over_triggered:
                     self.state = GameState.GAME_OVER
-                    self.final_total_score = self.time_score + self.coin_score 
+                    self.player_times[self.players_alive] = self.time_score
+                    self.final_scores = np.where(self.players_joined, self.player_times + self.coin_scores, 0)
+                    self.final_total_score = int(self.final_scores.max())
                     self.active = False 
-                    pygame.time.set_timer(self.coin_timer, 0) 
-                    pygame.time.set_timer(self.cloud_timer, 0)
-                    pygame.time.set_timer(self.obstacle_timer, 0) 
+                    self.level.stop()
                     self.game_over_start_ticks = pygame.time.get_ticks() 
-                    self.plane.set_thrust(False) 
-                    self.pilot_indicator.set_state(False)
+                    self.set_thrust(False)
+                    for i in np.flatnonzero(self.players_alive): # made it to the end
+                        self.particles.emit('game_over', self.planes[i].rect.center)
+                    self.record_session()
+                    if LATENCY_REPORT and self.latency_report.count:
+                        print(self.latency_report.summary())
                 else:
                     if self.active:
                         self.check_coin_collisions()
             
             elif self.state == GameState.GAME_OVER:
-                self.plane.set_thrust(False) 
-                self.pilot_indicator.set_state(False) 
+                self.set_thrust(False)
                 game_over_elapsed_time = (pygame.time.get_ticks() - self.game_over_start_ticks) / 1000.0
                 if game_over_elapsed_time >= self.game_over_display_duration:
                     self.reset_game_for_restart()
                     self.state = GameState.WAITING_FOR_PLAYER
-                    self.pilot_indicator.set_state(False)
+                    self.set_thrust(False)
 
-            # --- Drawing Start (on self.display_surface) ---
+            # --- Drawing Start (on self.display_surface, at the current render scale) ---
+            self.display_surface = self.render_surfaces[self.render_scale]
+            render_width, render_height = self.display_surface.get_size()
             self.display_surface.fill('black')
 
             # 1. Update and Draw BG sprite
             if self.state == GameState.PLAYING:
                 self.bg_sprite.update(dt)
-            bg_image_to_draw = self.bg_sprite.image.copy()
+            bg_image_to_draw = self.bg_sprite.render_image(self.render_scale).copy()
             bg_image_to_draw.set_alpha(int(255 * 0.95)) 
-            self.display_surface.blit(bg_image_to_draw, self.bg_sprite.rect)
+            self.display_surface.blit(bg_image_to_draw, self.to_render(self.bg_sprite.rect.topleft))
 
             # 2. Conditionally Draw Camera Feed and related UI
             if self.state == GameState.WAITING_FOR_PLAYER or self.state == GameState.PLAYER_IN_BOX_TIMER_ACTIVE:
                 # ... (camera feed drawing logic remains the same, blitting to self.display_surface) ...
-                blit_x, blit_y, scaled_width, scaled_height = 0, 0, WINDOW_WIDTH, WINDOW_HEIGHT 
+                blit_x, blit_y, scaled_width, scaled_height = 0, 0, render_width, render_height 
                 if self.latest_camera_frame is not None:
                     cam_height, cam_width = self.latest_camera_frame.shape[0], self.latest_camera_frame.shape[1]
                     frame_surface = pygame.image.frombuffer(self.latest_camera_frame.tobytes(), (cam_width, cam_height), "RGB")
-                    win_aspect = WINDOW_WIDTH / WINDOW_HEIGHT
+                    win_aspect = render_width / render_height
                     cam_aspect = cam_width / cam_height
                     if win_aspect > cam_aspect:
-                        scaled_height = WINDOW_HEIGHT
+                        scaled_height = render_height
                         scaled_width = int(scaled_height * cam_aspect)
                     else:
-                        scaled_width = WINDOW_WIDTH
+                        scaled_width = render_width
                         scaled_height = int(scaled_width / cam_aspect)
-                    scaled_camera_frame = pygame.transform.scale(frame_surface, (scaled_width, scaled_height))
+                    # the pose service already delivers the preview at display size; only scale if it doesn't fit
+                    if (cam_width, cam_height) == (scaled_width, scaled_height):
+                        scaled_camera_frame = frame_surface
+                    else:
+                        scaled_camera_frame = pygame.transform.scale(frame_surface, (scaled_width, scaled_height))
                     scaled_camera_frame.set_alpha(int(255 * 0.30)) 
-                    blit_x = (WINDOW_WIDTH - scaled_width) // 2
-                    blit_y = (WINDOW_HEIGHT - scaled_height) // 2
+                    blit_x = (render_width - scaled_width) // 2
+                    blit_y = (render_height - scaled_height) // 2
                     self.display_surface.blit(scaled_camera_frame, (blit_x, blit_y))
-                    line_y_threshold = blit_y + (0.3 * scaled_height) 
+                    line_y_threshold = blit_y + (THRUST_NOSE_THRESHOLD * scaled_height) 
                     line_color = (255, 255, 0)
                     dash_length, gap_length, line_thickness = 5, 5, 2
                     current_x_line = blit_x
@@ -320,11 +511,16 @@ class Game:
             # 3. Update and Draw all other game sprites
             if self.state == GameState.PLAYING and self.active: 
                 self.all_sprites.update(dt)
-            self.all_sprites.draw(self.display_surface) 
+                self.stream_level(dt)
+            self.draw_sprites(self.all_sprites)
+
+            # 3.25 Particles keep moving after the game ends, so crashes play out on the game over screen
+            self.particles.update(dt)
+            self.particles.draw(self.display_surface, self.render_scale)
 
-            # 3.5 Draw Pilot Indicator
+            # 3.5 Draw Pilot Indicators
             if self.state == GameState.PLAYING:
-                self.display_surface.blit(self.pilot_indicator.image, self.pilot_indicator.rect)
+                self.draw_sprites([self.pilot_indicators[player] for player in np.flatnonzero(self.players_joined)])
             
             # --- Text and UI Messages (drawn last to be on top, on self.display_surface) ---
             # 4. Display Score
@@ -333,35 +529,46 @@ class Game:
 
             # 5. Display State-Specific Messages
             if self.state == GameState.WAITING_FOR_PLAYER:
-                msg_surf = self.status_font.render("Align your body within the box", True, (255,255,255))
-                msg_rect = msg_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 60))
-                self.display_surface.blit(msg_surf, msg_rect)
+                self.draw_text('status', "Align your body within the box", (255,255,255), center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 60))
             elif self.state == GameState.PLAYER_IN_BOX_TIMER_ACTIVE:
                 remaining_time = max(0, self.required_in_box_time - self.player_in_box_duration)
                 timer_text = f"Starting in: {remaining_time:.1f}s"
                 if not self.all_keypoints_in_target_box: 
                     timer_text = "Hold position in the box!"
-                msg_surf = self.status_font.render(timer_text, True, (255,255,255))
-                msg_rect = msg_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 60))
-                self.display_surface.blit(msg_surf, msg_rect)
+                self.draw_text('status', timer_text, (255,255,255), center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 60))
             elif self.state == GameState.GAME_OVER:
-                game_over_text_surf = self.game_over_font.render("GAME OVER", True, (255, 69, 0)) 
-                game_over_text_rect = game_over_text_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 50))
-                self.display_surface.blit(game_over_text_surf, game_over_text_rect)
-                final_score_str = f"Final Score: {self.final_total_score}"
-                final_score_surf = self.font.render(final_score_str, True, (255,255,255))
-                final_score_rect = final_score_surf.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 20))
-                self.display_surface.blit(final_score_surf, final_score_rect)
+                self.draw_text('game_over', "GAME OVER", (255, 69, 0), center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 50))
+                if MAX_PLAYERS == 1:
+                    final_score_lines = [f"Final Score: {self.final_total_score}"]
+                else:
+                    final_score_lines = [f"P{player + 1} Score: {self.final_scores[player]}" for player in np.flatnonzero(self.players_joined)]
+                for row, final_score_str in enumerate(final_score_lines):
+                    self.draw_text('score', final_score_str, (255,255,255), center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 20 + row * 40))
+                self.display_leaderboard()
             
             # --- Final Scaling and Display Update ---
             # Scale the internal display_surface to the target screen size
-            scaled_surface = pygame.transform.scale(self.display_surface, (TARGET_SCREEN_WIDTH, TARGET_SCREEN_HEIGHT))
+            scaled_surface = self.upscale(self.display_surface, (TARGET_SCREEN_WIDTH, TARGET_SCREEN_HEIGHT))
             self.screen.blit(scaled_surface, (0, 0)) # Blit the scaled surface to the actual screen
 
             pygame.display.update() # Update the actual screen
-            self.clock.tick(FRAMERATE)
+            if self.pending_latency is not None:
+                self.pending_latency['display'] = time.time()
+                self.latency_report.record(self.pending_latency)
+                self.pending_latency = None
+            if self.spectator is not None:
+                self.spectator.submit(self.display_surface) # a blit into shared memory, when someone watches
+
+            # Dynamic resolution: frame time without the frame cap's wait decides the next frame's render scale
+            self.resolution.budget_ms = 1000 / self.framerate
+            if self.resolution.update((time.perf_counter() - frame_start) * 1000):
+                self.render_scale = self.resolution.scale
+            self.clock.tick(self.framerate)
 
 
 if __name__ == '__main__':
+    if HARDWARE_PROFILE is None:
+        profiles.calibrate_on_first_boot(HARDWARE_PROFILE_PATH)
+    profiles.report()
     game = Game()
     game.run()
\ No newline at end of file
@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+
+
+def downsample_gray(frame, step):
+    """Cheap small grayscale copy of a camera frame: strided sampling of the green channel."""
+    return frame[::step, ::step, 1].astype(np.int16)
+
+
+class MotionGate:
+    """Decides when the pose model can idle because nothing in front of the camera moves.
+
+    Each frame is reduced to a tiny grayscale image and compared with the
+    previous one. Motion above wake_threshold switches to full rate straight
+    away; the gate only drops back to idle after the scene stayed below
+    sleep_threshold for idle_after seconds (the gap between the two thresholds
+    plus the delay is the hysteresis that keeps it from flapping).
+    """
+
+    def __init__(self, wake_threshold, sleep_threshold, idle_after, downsample=8):
+        self.wake_threshold = wake_threshold
+        self.sleep_threshold = sleep_threshold
+        self.idle_after = idle_after
+        self.downsample = downsample
+
+        self.previous = None
+        self.awake = True
+        self.last_activity = time.time()
+        self.motion_score = 0.0
+
+    def wake(self):
+        """Something else (a detected person, a state change) says the kiosk is in use."""
+        self.awake = True
+        self.last_activity = time.time()
+
+    def update(self, frame):
+        """Feeds the next camera frame. Returns True while the model should run at full rate."""
+        small = downsample_gray(frame, self.downsample)
+        if self.previous is not None and self.previous.shape == small.shape:
+            self.motion_score = float(np.abs(small - self.previous).mean())
+        self.previous = small
+
+        now = time.time()
+        if self.motion_score >= self.wake_threshold:
+            self.wake()
+        elif self.awake and self.motion_score >= self.sleep_threshold:
+            self.last_activity = now
+        elif self.awake and now - self.last_activity >= self.idle_after:
+            self.awake = False
+        return self.awake
+
+
+def block_change(a, b, block):
+    """Largest mean absolute difference over any block x block tile of two small grayscale images."""
+    h = a.shape[0] // block * block
+    w = a.shape[1] // block * block
+    diff = np.abs(a[:h, :w] - b[:h, :w]).reshape(h // block, block, w // block, block)
+    return float(diff.mean(axis=(1, 3)).max()) if diff.size else 0.0
+
+
+class FrameChangeEstimator:
+    """Spots frames that are near-duplicates of the last one the model actually saw.
+
+    The change is measured as block-SAD on a tiny grayscale copy, against the
+    frame the last inference ran on (not the previous frame, so slow drift
+    still adds up). The worst block is what counts, so a moving hand in an
+    otherwise still picture isn't averaged away. A result is never reused for
+    longer than max_reuse_age seconds.
+    """
+
+    def __init__(self, threshold, max_reuse_age, downsample=8, block=4):
+        self.threshold = threshold
+        self.max_reuse_age = max_reuse_age
+        self.downsample = downsample
+        self.block = block
+
+        self.reference = None
+        self.reference_time = 0.0
+        self.change = 0.0
+
+        # statistics
+        self.frames = 0
+        self.reused = 0
+
+    def reset(self):
+        """Forces the next frame to be inferred."""
+        self.reference = None
+
+    def can_reuse(self, frame):
+        """True if the previous inference still describes this frame. Otherwise it becomes the new reference."""
+        self.frames += 1
+        small = downsample_gray(frame, self.downsample)
+        now = time.time()
+        if self.reference is not None and self.reference.shape == small.shape:
+            self.change = block_change(small, self.reference, self.block)
+            if self.change < self.threshold and now - self.reference_time < self.max_reuse_age:
+                self.reused += 1
+                return True
+        self.reference = small
+        self.reference_time = now
+        return False
+
+    @property
+    def reuse_ratio(self):
+        return self.reused / self.frames if self.frames else 0.0
+
+    def stats(self):
+        return {'frames': self.frames, 'reused': self.reused, 'reuse_ratio': self.reuse_ratio, 'last_change': self.change}
@@ -0,0 +1,166 @@
+"""
+Finds the fastest NCNN runtime options for this board and saves them as its profile.
+
+Every combination of thread count, core affinity, FP16 storage/arithmetic, light mode,
+allocators (and Vulkan, if the board has a GPU) runs the pose model over a recorded set
+of camera frames. Combinations whose detections drift from the reference (ultralytics if
+installed, otherwise plain FP32 NCNN) are rejected; the fastest of the rest is written to
+NCNN_PROFILE_PATH under this board's name, where the pose service picks it up at startup.
+
+Run from the repository root:
+    python code/ncnn_tune.py frames/ --record 60    # capture 60 frames from the camera first
+    python code/ncnn_tune.py frames/                # tune against an existing frame set
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from settings import *
+import camera
+import hardware
+import pose
+import pose_backends
+from tracker import box_iou
+
+KEYPOINT_TOLERANCE = 0.02 # mean normalized keypoint error allowed against the reference
+MIN_AGREEMENT = 0.95      # share of frames that must agree with the reference
+MATCH_IOU = 0.5           # box IoU for a detection to be the same person as one in the reference
+
+
+def record_frames(folder, count, interval=0.2):
+    """Saves `count` inference frames from the camera, `interval` seconds apart so the poses vary."""
+    os.makedirs(folder, exist_ok=True)
+    source = camera.open_camera()
+    try:
+        for i in range(count):
+            frame, _, _ = source.capture()
+            cv2.imwrite(os.path.join(folder, f"frame_{i:04d}.png"), frame)
+            time.sleep(interval)
+    finally:
+        source.close()
+
+
+def load_frames(folder):
+    paths = sorted(glob.glob(os.path.join(folder, '*.jpg')) + glob.glob(os.path.join(folder, '*.png')))
+    if not paths:
+        raise FileNotFoundError(f"No .jpg/.png frames in {folder} (record some with --record)")
+    return [cv2.imread(path) for path in paths]
+
+
+def candidate_options():
+    """Every option combination worth trying on this board."""
+    import ncnn
+    cpus = ncnn.get_cpu_count()
+    threads = sorted({n for n in (1, 2, 3, 4, cpus // 2, cpus) if 1 <= n <= cpus})
+    # affinity only matters on big.LITTLE boards; every Pi core is the same
+    powersave = [0, 2] if 0 < ncnn.get_big_cpu_count() < cpus else [0]
+    # FP16 arithmetic needs ARMv8.2 (Pi 5); FP16 storage alone still halves weight bandwidth on a Pi 4
+    fp16 = [(False, False), (True, False)] + ([(True, True)] if ncnn.cpu_support_arm_asimdhp() else [])
+    vulkan = [False, True] if ncnn.get_gpu_count() > 0 else [False]
+    for n, ps, (storage, arithmetic), gpu, light, allocators in itertools.product(
+            threads, powersave, fp16, vulkan, (True, False), ('pool', 'default')):
+        yield {'num_threads': n, 'powersave': ps, 'use_vulkan_compute': gpu, 'lightmode': light,
+               'use_fp16_storage': storage, 'use_fp16_arithmetic': arithmetic,
+               'use_packing_layout': True, 'allocators': allocators}
+
+
+def run(backend, frames, warmup=3):
+    """(per-frame detections, median ms per frame) for one backend over the frame set."""
+    for frame in frames[:warmup]:
+        backend.detect(frame)
+    detections, times = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        detections.append(backend.detect(frame))
+        times.append(time.perf_counter() - start)
+    return detections, float(np.median(times)) * 1000
+
+
+def match_people(boxes, ref_boxes):
+    """(rows, ref_rows) pairing each detection with a reference person by box IoU, best pair first.
+    Runtimes and option sets may list the same people in a different order (NMS ties, tiny score differences)."""
+    iou = box_iou(boxes, ref_boxes)
+    rows, ref_rows = [], []
+    while iou.size and iou.max() >= MATCH_IOU:
+        row, ref_row = np.unravel_index(iou.argmax(), iou.shape)
+        rows.append(row)
+        ref_rows.append(ref_row)
+        iou[row, :] = -1
+        iou[:, ref_row] = -1
+    return np.array(rows, dtype=int), np.array(ref_rows, dtype=int)
+
+
+def agreement(detections, reference):
+    """Share of frames where both found the same people with keypoints within KEYPOINT_TOLERANCE."""
+    agreed = 0
+    for (keypoints, boxes, _), (ref_keypoints, ref_boxes, _) in zip(detections, reference):
+        if len(keypoints) != len(ref_keypoints):
+            continue
+        rows, ref_rows = match_people(boxes, ref_boxes)
+        if len(rows) != len(keypoints):
+            continue # someone in one has no counterpart in the other
+        keypoints, ref_keypoints = keypoints[rows], ref_keypoints[ref_rows]
+        both = pose.visible(keypoints) & pose.visible(ref_keypoints)
+        error = np.abs(keypoints - ref_keypoints).sum(axis=-1)[both]
+        agreed += not len(error) or error.mean() <= KEYPOINT_TOLERANCE
+    return agreed / len(reference)
+
+
+def reference_detections(frames):
+    try:
+        backend = pose_backends.UltralyticsBackend()
+        name = 'ultralytics'
+    except ImportError:
+        backend = pose_backends.NcnnBackend(options={'use_fp16_storage': False, 'use_fp16_arithmetic': False})
+        name = 'fp32 ncnn'
+    detections, ms = run(backend, frames)
+    backend.close()
+    print(f"reference ({name}): {ms:.1f} ms/frame")
+    return detections
+
+
+def tune(frames, path=NCNN_PROFILE_PATH):
+    board = hardware.board_name()
+    print(f"tuning {POSE_MODEL} on {board} over {len(frames)} frames")
+    reference = reference_detections(frames)
+
+    best = None
+    for options in candidate_options():
+        backend = pose_backends.NcnnBackend(options=options)
+        detections, ms = run(backend, frames)
+        backend.close()
+        agree = agreement(detections, reference)
+        verdict = 'rejected' if agree < MIN_AGREEMENT else ''
+        print(f"  {ms:7.1f} ms  agree {agree:4.0%}  {options} {verdict}")
+        if agree >= MIN_AGREEMENT and (best is None or ms < best[1]):
+            best = (options, ms)
+    if best is None:
+        raise RuntimeError("No option combination matched the reference detections")
+
+    profiles = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            profiles = json.load(f)
+    profiles[board] = {'model': POSE_MODEL, 'imgsz': POSE_IMGSZ, 'options': best[0],
+                       'median_ms': round(best[1], 2), 'tuned': time.strftime('%Y-%m-%d %H:%M')}
+    with open(path, 'w') as f:
+        json.dump(profiles, f, indent=2)
+    print(f"best: {best[1]:.1f} ms/frame with {best[0]}, saved to {path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark NCNN runtime options and save the fastest as this board's profile")
+    parser.add_argument('frames', help="folder of recorded camera frames (.jpg/.png)")
+    parser.add_argument('--record', type=int, default=0, metavar='N', help="first record N frames from the camera into the folder")
+    parser.add_argument('--out', default=NCNN_PROFILE_PATH, help="profile file to update")
+    args = parser.parse_args()
+    if args.record:
+        record_frames(args.frames, args.record)
+    tune(load_frames(args.frames), args.out)
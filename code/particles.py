@@ -0,0 +1,118 @@
+"""
+Batched particle effects (coin pickups, crashes, the end of a game).
+
+Particles are rows in fixed-size NumPy arrays, so updating hundreds of them is a
+handful of vectorized operations instead of hundreds of sprite objects. They are
+drawn from textures baked once at startup (one per colour, fade step and render
+scale) with a single blits call per frame, and there are never more than the
+global budget alive at once: emitting into a full system drops the new particles.
+"""
+
+import numpy as np
+import pygame
+
+from settings import *
+
+# Palette every particle colour comes from; effects pick rows by index
+PALETTE = [
+    (255, 215, 0), (255, 240, 130), (255, 255, 255),   # 0-2 coin sparkle
+    (255, 140, 0), (255, 60, 0), (90, 90, 90),          # 3-5 explosion and smoke
+    (120, 170, 255), (130, 255, 140), (255, 120, 200),  # 6-8 confetti
+]
+EFFECTS = {
+    # colours, particles, speed (logical px/s), life (s), gravity (px/s^2), texture radius (logical px)
+    'coin':      {'colors': (0, 1, 2), 'count': 24, 'speed': 160, 'life': 0.5, 'gravity': 250, 'radius': 3},
+    'crash':     {'colors': (3, 4, 4, 5), 'count': 80, 'speed': 260, 'life': 1.2, 'gravity': 150, 'radius': 5},
+    'game_over': {'colors': (0, 6, 7, 8), 'count': 60, 'speed': 220, 'life': 1.5, 'gravity': 300, 'radius': 4},
+}
+FADE_STEPS = 8 # alpha levels baked per colour
+DRAG = 1.5     # per second, slows every particle down
+
+
+def bake_texture(color, radius, alpha):
+    """A soft dot: full colour in the middle, fading out to the edge."""
+    size = radius * 2 + 1
+    texture = pygame.Surface((size, size), pygame.SRCALPHA)
+    texture.fill((*color, 0))
+    y, x = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+    falloff = np.clip(1 - np.hypot(x, y) / (radius + 0.5), 0, 1)
+    alpha_channel = pygame.surfarray.pixels_alpha(texture)
+    alpha_channel[:] = (falloff * alpha).astype(np.uint8)
+    del alpha_channel # unlocks the surface
+    return texture
+
+
+class ParticleSystem:
+    def __init__(self, budget=PARTICLE_BUDGET, render_scales=RENDER_SCALES):
+        self.budget = budget
+        self.count = 0 # particles alive; they are always the first `count` rows
+        self.pos = np.zeros((budget, 2), dtype=np.float32)
+        self.vel = np.zeros((budget, 2), dtype=np.float32)
+        self.life = np.zeros(budget, dtype=np.float32)      # seconds left
+        self.max_life = np.ones(budget, dtype=np.float32)
+        self.gravity = np.zeros(budget, dtype=np.float32)
+        self.color = np.zeros(budget, dtype=np.int32)       # PALETTE index
+        self.radius = np.zeros(budget, dtype=np.int32)
+
+        # textures[render_scale][radius][color, fade step] and the offset that centres them
+        self.radii = sorted({effect['radius'] for effect in EFFECTS.values()})
+        self.textures = {}
+        self.offsets = {}
+        for render_scale in {1.0, *render_scales}:
+            self.textures[render_scale] = {}
+            self.offsets[render_scale] = {}
+            for radius in self.radii:
+                scaled_radius = max(1, round(radius * render_scale))
+                self.textures[render_scale][radius] = [[bake_texture(color, scaled_radius, 255 * (step + 1) / FADE_STEPS)
+                                                        for step in range(FADE_STEPS)] for color in PALETTE]
+                self.offsets[render_scale][radius] = scaled_radius
+
+    def emit(self, effect, position):
+        """Bursts one of the EFFECTS out of a logical position, as far as the budget allows."""
+        spec = EFFECTS[effect]
+        count = min(spec['count'], self.budget - self.count)
+        if count <= 0:
+            return 0
+        rows = slice(self.count, self.count + count)
+        angle = np.random.uniform(0, 2 * np.pi, count)
+        speed = spec['speed'] * np.random.uniform(0.3, 1.0, count)
+        self.pos[rows] = position
+        self.vel[rows] = np.stack([np.cos(angle), np.sin(angle)], axis=1) * speed[:, None]
+        self.life[rows] = self.max_life[rows] = spec['life'] * np.random.uniform(0.6, 1.0, count)
+        self.gravity[rows] = spec['gravity']
+        self.color[rows] = np.random.choice(spec['colors'], count)
+        self.radius[rows] = spec['radius']
+        self.count += count
+        return count
+
+    def update(self, dt):
+        """Moves every particle and drops the expired ones, keeping the alive ones packed at the front."""
+        n = self.count
+        if n == 0:
+            return
+        self.vel[:n, 1] += self.gravity[:n] * dt
+        self.vel[:n] *= max(0.0, 1 - DRAG * dt)
+        self.pos[:n] += self.vel[:n] * dt
+        self.life[:n] -= dt
+
+        alive = np.flatnonzero(self.life[:n] > 0)
+        if len(alive) < n:
+            for array in (self.pos, self.vel, self.life, self.max_life, self.gravity, self.color, self.radius):
+                array[:len(alive)] = array[alive]
+            self.count = len(alive)
+
+    def draw(self, surface, render_scale=1.0):
+        """Blits every particle onto a render surface in one call."""
+        n = self.count
+        if n == 0:
+            return
+        fade = np.minimum((self.life[:n] / self.max_life[:n] * FADE_STEPS).astype(np.int32), FADE_STEPS - 1)
+        textures = self.textures[render_scale]
+        offsets = self.offsets[render_scale]
+        offset = np.array([offsets[radius] for radius in self.radii])[np.searchsorted(self.radii, self.radius[:n])]
+        corners = (np.round(self.pos[:n] * render_scale) - offset[:, None]).astype(np.int32).tolist()
+        surface.blits([(textures[radius][color][step], corner) for radius, color, step, corner in
+                       zip(self.radius[:n].tolist(), self.color[:n].tolist(), fade.tolist(), corners)], doreturn=False)
+
+    def clear(self):
+        self.count = 0
@@ -0,0 +1,203 @@
+"""
+Batched helpers over the [N,17,2] normalized keypoint array the pose model returns.
+
+Keypoint reference:
+    0: nose          5: left_shoulder  10: right_wrist    15: left_ankle
+    1: left_eye      6: right_shoulder 11: left_hip       16: right_ankle
+    2: right_eye     7: left_elbow     12: right_hip
+    3: left_ear      8: right_elbow    13: left_knee
+    4: right_ear     9: left_wrist     14: right_knee
+"""
+
+import threading
+
+import numpy as np
+
+NOSE = 0
+SHOULDERS = [5, 6]
+WRISTS = [9, 10]
+HIPS = [11, 12]
+ANKLES = [15, 16]
+NUM_KEYPOINTS = 17
+
+# Keypoint pairs joined by a bone when drawing a skeleton
+SKELETON = [(15, 13), (13, 11), (16, 14), (14, 12), (11, 12), (5, 11), (6, 12), (5, 6), (5, 7),
+            (6, 8), (7, 9), (8, 10), (1, 2), (0, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6)]
+
+# A player slot that has no person assigned to it this frame
+NO_PLAYER = -1
+
+
+def detections_from_results(results):
+    """Pulls [N,17,2] normalized keypoints, [N,4] normalized boxes and [N] scores out of an ultralytics result."""
+    keypoints = np.zeros((0, NUM_KEYPOINTS, 2), dtype=np.float32)
+    boxes = np.zeros((0, 4), dtype=np.float32)
+    scores = np.zeros(0, dtype=np.float32)
+    if results and results[0].keypoints is not None and results[0].keypoints.xyn.nelement() > 0:
+        keypoints = results[0].keypoints.xyn.cpu().numpy()
+        boxes = results[0].boxes.xyxyn.cpu().numpy()
+        scores = results[0].boxes.conf.cpu().numpy()
+    return keypoints, boxes, scores
+
+
+def visible(keypoints):
+    """[...,17] bool. The model reports undetected keypoints as (0, 0)."""
+    return (keypoints > 0).any(axis=-1)
+
+
+def center_x(keypoints):
+    """[N] mean x of each person's visible keypoints."""
+    vis = visible(keypoints)
+    return (keypoints[..., 0] * vis).sum(axis=-1) / np.maximum(vis.sum(axis=-1), 1)
+
+
+def center(keypoints):
+    """[...,2] mean of each person's visible keypoints, NaN for someone with none visible."""
+    vis = visible(keypoints)[..., None]
+    with np.errstate(invalid='ignore'):
+        return (keypoints * vis).sum(axis=-2) / vis.sum(axis=-2)
+
+
+def keypoints_in_box(keypoints, box):
+    """[N] bool, True where every keypoint of that person lies inside the normalized box."""
+    x, y = keypoints[..., 0], keypoints[..., 1]
+    inside = (x >= box['x_min']) & (x <= box['x_max']) & (y >= box['y_min']) & (y <= box['y_max'])
+    return inside.all(axis=-1)
+
+
+def gather_slots(values, slots, fill):
+    """Reorders per-detection values into player slots, `fill` where a slot has no person."""
+    gathered = np.full(len(slots), fill, dtype=np.asarray(values).dtype)
+    assigned = slots != NO_PLAYER
+    gathered[assigned] = values[slots[assigned]]
+    return gathered
+
+
+def gather_players(keypoints, slots):
+    """Reorders detections into player slots: [P,17,2], NaN where a slot has no person."""
+    players = np.full((len(slots), NUM_KEYPOINTS, 2), np.nan, dtype=np.float32)
+    assigned = slots != NO_PLAYER
+    players[assigned] = keypoints[slots[assigned]]
+    return players
+
+
+class PlayerAssigner:
+    """Maps the people the model detected to player slots.
+
+    'confidence'    slot i is the i-th detection in model order (the original single-player behaviour)
+    'left_to_right' slots follow the people from left to right in the camera image
+    'track'         each slot keeps the track ID it was first given until that person is gone
+
+    Once a game starts, lock() pins every joined slot to the track that was
+    standing in it, whatever the mode: bystanders can't take over a plane and
+    nobody new can claim an empty slot until reset(). A joined player whose
+    track is lost (turned away, hidden behind someone for longer than the
+    tracker waits) gets the nearest new track back if it is within
+    `reacquire_distance` of where they were last seen.
+    """
+
+    def __init__(self, max_players, mode='confidence', lost_frames=15, reacquire_distance=0.3):
+        if mode not in ('confidence', 'left_to_right', 'track'):
+            raise ValueError(f"Unknown player assignment mode: {mode}")
+        self.max_players = max_players
+        self.mode = mode
+        self.lost_frames = lost_frames
+        self.reacquire_distance = reacquire_distance
+        self.locked = False
+        self.lock_guard = threading.Lock() # assign() runs on the pose thread, lock()/reset() on the game loop
+
+        # which track is in each slot, and (track mode) how long it's been missing
+        self.slot_tracks = np.full(max_players, NO_PLAYER)
+        self.slot_missing = np.zeros(max_players, dtype=int)
+        # where each slot's person was last seen, and (locked) which slots have joined the game
+        self.slot_centers = np.full((max_players, 2), np.nan)
+        self.joined = np.zeros(max_players, dtype=bool)
+
+    def reset(self):
+        with self.lock_guard:
+            self.locked = False
+            self.slot_tracks[:] = NO_PLAYER
+            self.slot_missing[:] = 0
+            self.slot_centers[:] = np.nan
+            self.joined[:] = False
+
+    def lock(self, slots_to_keep):
+        """Pins the given slots to their current tracks and empties the rest."""
+        with self.lock_guard:
+            self.slot_tracks[~slots_to_keep] = NO_PLAYER
+            self.joined = np.array(slots_to_keep, dtype=bool)
+            self.locked = True
+
+    def assign(self, keypoints, track_ids):
+        """Returns [max_players] detection indices (NO_PLAYER for an empty slot)."""
+        with self.lock_guard:
+            return self._assign(keypoints, track_ids)
+
+    def _assign(self, keypoints, track_ids):
+        slots = np.full(self.max_players, NO_PLAYER)
+        if self.locked:
+            matches = self.slot_tracks[:, None] == track_ids[None, :]   # [P,N]
+            found = matches.any(axis=1) & (self.slot_tracks != NO_PLAYER)
+            if found.any(): # argmax over no detections at all raises
+                slots[found] = matches[found].argmax(axis=1)
+            self._reacquire(slots, keypoints, track_ids, self.joined & ~found, ~matches.any(axis=0))
+        elif self.mode == 'confidence':
+            n = min(len(keypoints), self.max_players)
+            slots[:n] = np.arange(n)
+        elif self.mode == 'left_to_right':
+            order = np.argsort(center_x(keypoints), kind='stable')[:self.max_players]
+            slots[:len(order)] = order
+        else:
+            slots = self._assign_tracks(keypoints, track_ids)
+
+        assigned = slots != NO_PLAYER
+        if not self.locked and self.mode != 'track':
+            self.slot_tracks[:] = NO_PLAYER
+            self.slot_tracks[assigned] = track_ids[slots[assigned]]
+        self.slot_centers[assigned] = center(keypoints[slots[assigned]])
+        return slots
+
+    def _reacquire(self, slots, keypoints, track_ids, lost, unclaimed):
+        """Gives lost joined slots the nearest unclaimed tracks, closest pair first."""
+        lost, unclaimed = np.flatnonzero(lost), np.flatnonzero(unclaimed)
+        if not len(lost) or not len(unclaimed):
+            return
+        # a slot nobody was ever seen in (the game started with nobody in the box) takes anyone
+        last_seen = self.slot_centers[lost]
+        distance = np.linalg.norm(last_seen[:, None] - center(keypoints[unclaimed])[None], axis=-1) # [L,U]
+        distance = np.where(np.isnan(last_seen).any(axis=1)[:, None], 0.0, distance)
+        distance[np.isnan(distance)] = np.inf
+        while True:
+            i, j = np.unravel_index(np.argmin(distance), distance.shape)
+            if distance[i, j] > self.reacquire_distance:
+                break
+            slots[lost[i]] = unclaimed[j]
+            self.slot_tracks[lost[i]] = track_ids[unclaimed[j]]
+            distance[i, :] = distance[:, j] = np.inf
+
+    def _assign_tracks(self, keypoints, track_ids):
+        slots = np.full(self.max_players, NO_PLAYER)
+
+        # slots whose track is still in view keep pointing at it
+        matches = self.slot_tracks[:, None] == track_ids[None, :]   # [P,N]
+        seen = matches.any(axis=1) & (self.slot_tracks != NO_PLAYER)
+        if seen.any():
+            slots[seen] = matches[seen].argmax(axis=1)
+        self.slot_missing[seen] = 0
+
+        # slots whose track vanished are released after a grace period
+        missing = ~seen & (self.slot_tracks != NO_PLAYER)
+        self.slot_missing[missing] += 1
+        released = missing & (self.slot_missing > self.lost_frames)
+        self.slot_tracks[released] = NO_PLAYER
+        self.slot_missing[released] = 0
+
+        # new tracks fill the free slots, left to right
+        unclaimed = ~matches.any(axis=0)
+        free = np.flatnonzero(self.slot_tracks == NO_PLAYER)
+        if len(free) and unclaimed.any():
+            candidates = np.flatnonzero(unclaimed)
+            candidates = candidates[np.argsort(center_x(keypoints[candidates]), kind='stable')][:len(free)]
+            self.slot_tracks[free[:len(candidates)]] = track_ids[candidates]
+            slots[free[:len(candidates)]] = candidates
+        return slots
@@ -0,0 +1,222 @@
+"""
+Pose model backends for the pose service, so CPU runtimes can be A/B tested on the same board.
+Every backend has estimate(frame), which turns one BGR inference frame into a PoseResult:
+[N,17,3] keypoints (normalized x, y and visibility), [N,4] normalized boxes, [N] scores and
+the time the inference finished. detect(frame) is the compact form the pose service publishes,
+([N,17,2] keypoints with the unseen ones at (0, 0), boxes, scores), the same arrays
+pose.detections_from_results() pulls out of an ultralytics result.
+
+    UltralyticsBackend  YOLO(POSE_MODEL).predict; ultralytics picks the NCNN runtime options
+                        and does its own pre- and post-processing
+    NcnnBackend         the same exported model run directly through pyncnn, with the thread
+                        count, core affinity, Vulkan, light mode, FP16 and allocator options
+                        exposed (NCNN_OPTIONS)
+    OnnxBackend         POSE_ONNX_MODEL through ONNX Runtime's CPU provider
+    OpenCvBackend       POSE_ONNX_MODEL through cv2.dnn
+
+The last three only run the model (infer()); they share PoseBackend's letterbox, decode and
+NMS, so any difference between them is the runtime. code/pose_compare.py times them all.
+"""
+
+import json
+import os
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from settings import *
+import hardware
+import pose
+
+LETTERBOX_COLOR = (114, 114, 114)
+VISIBLE_CONFIDENCE = 0.5 # keypoints less sure than this are reported as (0, 0), like ultralytics does
+
+PoseResult = namedtuple('PoseResult', 'keypoints boxes scores timestamp')
+
+
+def letterbox(frame, size):
+    """Resizes keeping the aspect ratio and pads to size x size. Returns (image, scale, pad_x, pad_y)."""
+    height, width = frame.shape[:2]
+    scale = min(size / width, size / height)
+    new_width, new_height = round(width * scale), round(height * scale)
+    if (new_width, new_height) != (width, height): # the camera's inference stream already is model size
+        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+    if new_width != size or new_height != size:
+        frame = cv2.copyMakeBorder(frame, pad_y, size - new_height - pad_y, pad_x, size - new_width - pad_x,
+                                   cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+    return frame, scale, pad_x, pad_y
+
+
+def decode(output, conf=POSE_CONFIDENCE, iou=POSE_IOU, max_det=300):
+    """Exported YOLO pose output [56, anchors] (cx, cy, w, h, score, 17 x (x, y, visibility), in
+    model pixels) -> ([N,4] xyxy boxes, [N] scores, [N,17,3] keypoints) after NMS, best first."""
+    candidates = output[:, output[4] > conf].T
+    if not len(candidates):
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros((0, pose.NUM_KEYPOINTS, 3), np.float32)
+    top_left = candidates[:, 0:2] - candidates[:, 2:4] / 2
+    keep = cv2.dnn.NMSBoxes(np.concatenate([top_left, candidates[:, 2:4]], axis=1).tolist(),
+                            candidates[:, 4].tolist(), conf, iou, top_k=max_det) # best first
+    keep = np.asarray(keep, dtype=int).reshape(-1)
+    candidates, top_left = candidates[keep], top_left[keep]
+    boxes = np.concatenate([top_left, top_left + candidates[:, 2:4]], axis=1)
+    return boxes, candidates[:, 4], candidates[:, 5:].reshape(-1, pose.NUM_KEYPOINTS, 3)
+
+
+def blob(image):
+    """Letterboxed BGR image -> [1,3,size,size] RGB float32 in 0-1, the exported model's input."""
+    return cv2.dnn.blobFromImage(image, 1 / 255.0, swapRB=True)
+
+
+class PoseBackend:
+    """Letterbox, decode and NMS around a runtime; subclasses implement infer(image) -> [56, anchors]."""
+
+    def __init__(self, imgsz=POSE_IMGSZ):
+        self.imgsz = imgsz # the thermal governor may lower it while the service runs
+
+    def estimate(self, frame):
+        height, width = frame.shape[:2]
+        image, scale, pad_x, pad_y = letterbox(frame, self.imgsz)
+        boxes, scores, keypoints = decode(self.infer(image))
+        timestamp = time.time()
+
+        # model pixels -> normalized camera frame coordinates
+        frame_size = np.array([width, height], dtype=np.float32)
+        pad = np.array([pad_x, pad_y], dtype=np.float32)
+        boxes = (np.clip((boxes.reshape(-1, 2, 2) - pad) / scale, 0, frame_size) / frame_size).reshape(-1, 4)
+        keypoints = keypoints.copy()
+        keypoints[..., :2] = np.clip((keypoints[..., :2] - pad) / scale, 0, frame_size) / frame_size
+        return PoseResult(keypoints.astype(np.float32), boxes.astype(np.float32), scores.astype(np.float32), timestamp)
+
+    def detect(self, frame):
+        keypoints, boxes, scores, _ = self.estimate(frame)
+        xy = keypoints[..., :2].copy()
+        xy[keypoints[..., 2] < VISIBLE_CONFIDENCE] = 0
+        return xy, boxes, scores
+
+    def close(self):
+        pass
+
+
+class UltralyticsBackend(PoseBackend):
+    def __init__(self, model=POSE_MODEL, imgsz=POSE_IMGSZ):
+        from ultralytics import YOLO
+        super().__init__(imgsz)
+        self.model = YOLO(model)
+
+    def estimate(self, frame):
+        results = self.model.predict(frame, imgsz=self.imgsz, verbose=False)
+        timestamp = time.time()
+        xy, boxes, scores = pose.detections_from_results(results)
+        visibility = np.ones(xy.shape[:2], dtype=np.float32)
+        if len(xy) and results[0].keypoints.conf is not None:
+            visibility = results[0].keypoints.conf.cpu().numpy()
+        return PoseResult(np.concatenate([xy, visibility[..., None]], axis=-1), boxes, scores, timestamp)
+
+
+class NcnnBackend(PoseBackend):
+    def __init__(self, model=POSE_MODEL, imgsz=POSE_IMGSZ, options=None):
+        import ncnn
+        super().__init__(imgsz)
+        self.ncnn = ncnn
+        self.options = dict(NCNN_OPTIONS, **(options or {}))
+
+        ncnn.set_cpu_powersave(self.options['powersave'])
+        self.net = ncnn.Net()
+        opt = self.net.opt
+        opt.num_threads = self.options['num_threads']
+        opt.use_vulkan_compute = self.options['use_vulkan_compute']
+        opt.lightmode = self.options['lightmode']
+        opt.use_fp16_storage = opt.use_fp16_packed = self.options['use_fp16_storage']
+        opt.use_fp16_arithmetic = self.options['use_fp16_arithmetic']
+        opt.use_packing_layout = self.options['use_packing_layout']
+        # the pools must outlive every Mat allocated from them, so the backend keeps them
+        self.blob_allocator = self.workspace_allocator = None
+        if self.options['allocators'] == 'pool':
+            self.blob_allocator = ncnn.UnlockedPoolAllocator() # only the inference thread allocates blobs
+            self.workspace_allocator = ncnn.PoolAllocator()
+            opt.blob_allocator = self.blob_allocator
+            opt.workspace_allocator = self.workspace_allocator
+
+        for load, filename in ((self.net.load_param, 'model.ncnn.param'), (self.net.load_model, 'model.ncnn.bin')):
+            if load(os.path.join(model, filename)) != 0:
+                raise FileNotFoundError(f"Can't load {os.path.join(model, filename)}")
+
+    def infer(self, image):
+        """Raw [56, anchors] output for one letterboxed BGR image."""
+        mat = self.ncnn.Mat.from_pixels(image, self.ncnn.Mat.PixelType.PIXEL_BGR2RGB, self.imgsz, self.imgsz)
+        mat.substract_mean_normalize([], [1 / 255.0] * 3)
+        with self.net.create_extractor() as extractor:
+            extractor.input('in0', mat)
+            _, out = extractor.extract('out0')
+            output = np.array(out) # copy, so nothing outlives the pools
+        return output
+
+    def close(self):
+        self.net.clear()
+        if self.blob_allocator is not None:
+            self.blob_allocator.clear()
+            self.workspace_allocator.clear()
+
+
+class OnnxBackend(PoseBackend):
+    def __init__(self, model=POSE_ONNX_MODEL, imgsz=POSE_IMGSZ, threads=POSE_ONNX_THREADS):
+        import onnxruntime
+        super().__init__(imgsz)
+        if not os.path.exists(model):
+            raise FileNotFoundError(f"Can't load {model}")
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads # 0 lets ONNX Runtime pick
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def infer(self, image):
+        return self.session.run(None, {self.input_name: blob(image)})[0][0]
+
+
+class OpenCvBackend(PoseBackend):
+    def __init__(self, model=POSE_ONNX_MODEL, imgsz=POSE_IMGSZ, threads=POSE_ONNX_THREADS):
+        super().__init__(imgsz)
+        if not os.path.exists(model):
+            raise FileNotFoundError(f"Can't load {model}")
+        if threads:
+            cv2.setNumThreads(threads) # process-wide, like everything else cv2 does
+        self.net = cv2.dnn.readNetFromONNX(model)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def infer(self, image):
+        self.net.setInput(blob(image))
+        return self.net.forward()[0]
+
+
+def load_ncnn_profile(path=NCNN_PROFILE_PATH, board=None):
+    """The tuned NCNN profile for this board and POSE_MODEL, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        profiles = json.load(f)
+    profile = profiles.get(board or hardware.board_name())
+    if profile is None or profile.get('model') != POSE_MODEL or profile.get('imgsz') != POSE_IMGSZ:
+        return None
+    return profile
+
+
+BACKENDS = {'ultralytics': UltralyticsBackend, 'ncnn': NcnnBackend, 'onnxruntime': OnnxBackend, 'opencv': OpenCvBackend}
+
+
+def open_backend(name=POSE_BACKEND):
+    """The configured pose backend; the ncnn backend uses this board's tuned profile when there is one."""
+    profile = load_ncnn_profile()
+    if name == 'auto':
+        name = 'ncnn' if profile is not None else 'ultralytics'
+    if name == 'ncnn':
+        if profile is not None:
+            print(f"pose backend: ncnn with the profile tuned on {profile['tuned']} ({profile['median_ms']:.1f} ms/frame)")
+        return NcnnBackend(options=profile['options'] if profile is not None else None)
+    if name in BACKENDS:
+        return BACKENDS[name]()
+    raise ValueError(f"Unknown pose backend: {name}")
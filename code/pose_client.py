@@ -0,0 +1,185 @@
+"""
+Client side of the pose service (pose_service.py), plus the wire format both sides use.
+
+Every message is a little-endian u32 header length, a JSON header, then the raw
+bytes of any NumPy arrays the header describes. Clients send subscription
+messages ({'fields': [...], 'mode': ...}); the service answers with a stream of
+pose frames carrying only the subscribed fields.
+
+Every frame carries 'frame_id', 't_capture', 't_inference' (when its keypoints were
+computed), 't_source' (capture time of the frame they were computed from, earlier than
+'t_capture' when 'reused'), 'reused' and 'max_framerate' (the frame rate cap the thermal
+governor asks the games for, None for no cap); the client adds 't_received'.
+
+Fields a client can subscribe to:
+    nose             [N,2]    normalized nose position per person
+    keypoints        [N,17,2] normalized keypoints per person
+    boxes            [N,4]    normalized x1, y1, x2, y2 per person
+    scores           [N]      detection confidence
+    track_ids        [N]      stable tracker ID per person
+    track_age        [N]      frames each person has been tracked
+    track_confidence [N]      smoothed detection confidence of each track
+    preview          [H,W,3]  RGB camera frame with the skeletons drawn in
+
+Modes: 'full' runs the model at full rate, 'idle' lets the service drop to a low
+duty cycle while nothing moves, 'paused' needs no frames at all. The service runs
+at the highest rate any connected client asks for.
+"""
+
+import json
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from settings import *
+
+FIELDS = ('nose', 'keypoints', 'boxes', 'scores', 'track_ids', 'track_age', 'track_confidence', 'preview')
+MODES = ('paused', 'idle', 'full')
+
+HEADER_LEN = struct.Struct('<I')
+MAX_MESSAGE = 64 * 1024 * 1024 # bytes, header or payload; far above a full-size preview frame
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("pose service connection closed")
+        received += n
+    return buffer
+
+
+def send_message(sock, header, arrays=None):
+    """Sends a JSON header followed by the raw bytes of `arrays` (name -> ndarray)."""
+    layout = {}
+    blobs = []
+    offset = 0
+    for name, array in (arrays or {}).items():
+        array = np.ascontiguousarray(array)
+        layout[name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset}
+        blobs.append(memoryview(array.reshape(-1)).cast('B'))
+        offset += array.nbytes
+    head = json.dumps(dict(header, arrays=layout, payload=offset)).encode()
+    sock.sendall(HEADER_LEN.pack(len(head)) + head)
+    for blob in blobs:
+        sock.sendall(blob)
+
+
+def recv_message(sock):
+    """Receives one message. Returns the header dict with the arrays filled in as NumPy views."""
+    head_len = HEADER_LEN.unpack(_recv_exact(sock, HEADER_LEN.size))[0]
+    if head_len > MAX_MESSAGE:
+        raise ValueError(f"pose message header of {head_len} bytes") # not a peer speaking this protocol
+    header = json.loads(_recv_exact(sock, head_len))
+    payload_len = header.pop('payload')
+    if not 0 <= payload_len <= MAX_MESSAGE:
+        raise ValueError(f"pose message payload of {payload_len} bytes")
+    payload = _recv_exact(sock, payload_len)
+    for name, spec in header.pop('arrays').items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+        header[name] = np.frombuffer(payload, dtype, count, spec['offset']).reshape(spec['shape'])
+    return header
+
+
+class PoseClient:
+    """Subscribes to the pose service and keeps the newest pose frame.
+
+    A background thread receives frames (and reconnects if the service restarts),
+    so reading `latest` never blocks; wait_frame() blocks until a new one arrives.
+    """
+
+    def __init__(self, fields=('keypoints',), mode='full', socket_path=POSE_SERVICE_SOCKET):
+        self.socket_path = socket_path
+        self.fields = tuple(fields)
+        self.mode = mode
+        self._check(self.fields, self.mode)
+
+        self.latest = None
+        self.connected = False
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._new_frame = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._receive_loop, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _check(fields, mode):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown pose fields: {sorted(unknown)}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown pose mode: {mode}")
+
+    def subscribe(self, fields=None, mode=None):
+        """Changes the subscribed fields and/or rate mode. Only talks to the service if something changed."""
+        fields = self.fields if fields is None else tuple(fields)
+        mode = self.mode if mode is None else mode
+        if fields == self.fields and mode == self.mode:
+            return
+        self._check(fields, mode)
+        self.fields, self.mode = fields, mode
+        self._send_subscription()
+
+    def _send_subscription(self):
+        with self._send_lock:
+            if self._sock is not None:
+                try:
+                    send_message(self._sock, {'fields': list(self.fields), 'mode': self.mode})
+                except OSError:
+                    pass # the receive loop notices and reconnects
+
+    def wait_frame(self, timeout=None):
+        """Blocks until a frame newer than the current `latest` arrives. Returns None on timeout."""
+        with self._new_frame:
+            previous = self.latest
+            self._new_frame.wait_for(lambda: self.latest is not previous or not self._running, timeout)
+            return self.latest if self.latest is not previous else None
+
+    def _receive_loop(self):
+        while self._running:
+            try:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                self.connected = False
+                time.sleep(0.5) # service not up yet
+                continue
+
+            self._sock = sock
+            self.connected = True
+            self._send_subscription()
+            try:
+                while self._running:
+                    frame = recv_message(sock)
+                    frame['t_received'] = time.time() # for the latency report (latency.py)
+                    with self._new_frame:
+                        self.latest = frame
+                        self._new_frame.notify_all()
+            except (OSError, ConnectionError, ValueError):
+                pass
+            finally:
+                with self._send_lock:
+                    self._sock = None
+                self.connected = False
+                sock.close()
+
+    def close(self):
+        self._running = False
+        with self._send_lock:
+            if self._sock is not None:
+                try:
+                    self._sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        with self._new_frame:
+            self._new_frame.notify_all()
+        self._thread.join(timeout=1)
@@ -0,0 +1,72 @@
+"""
+Compares the pose backends on this board: every runtime in pose_backends.BACKENDS runs over
+the same recorded frame set, and the report gives its latency and how well its detections
+agree with the reference (the first backend in the list that loads, ultralytics by default).
+Backends that can't load here (runtime not installed, model not exported) are skipped.
+
+Run from the repository root:
+    python code/pose_compare.py frames/                          # every backend
+    python code/pose_compare.py frames/ --backends ncnn opencv   # just these, the first is the reference
+    python code/pose_compare.py frames/ --record 60              # record 60 camera frames first
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import hardware
+import pose_backends
+from ncnn_tune import MIN_AGREEMENT, agreement, load_frames, record_frames
+
+
+def benchmark(backend, frames, warmup=3):
+    """(per-frame detections, [frames] ms) for one backend over the frame set."""
+    for frame in frames[:warmup]:
+        backend.estimate(frame)
+    detections, times = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        detections.append(backend.detect(frame))
+        times.append((time.perf_counter() - start) * 1000)
+    return detections, np.array(times)
+
+
+def compare(frames, names):
+    print(f"comparing pose backends on {hardware.board_name()} over {len(frames)} frames")
+    reference = None
+    results = []
+    for name in names:
+        try:
+            backend = pose_backends.BACKENDS[name]()
+        except (ImportError, FileNotFoundError, cv2.error) as e:
+            print(f"  {name:<12} skipped: {e}")
+            continue
+        detections, times = benchmark(backend, frames)
+        backend.close()
+        if reference is None:
+            reference = (name, detections)
+        agree = agreement(detections, reference[1])
+        people = np.mean([len(keypoints) for keypoints, _, _ in detections])
+        print(f"  {name:<12} {np.median(times):7.1f} ms median  {np.percentile(times, 90):7.1f} ms p90  "
+              f"agree {agree:4.0%} with {reference[0]}  {people:.1f} people/frame")
+        results.append((name, float(np.median(times)), agree))
+
+    # held to the same agreement as ncnn_tune.py holds its option sets to
+    agreeing = [result for result in results if result[2] >= MIN_AGREEMENT]
+    if agreeing:
+        name, ms, _ = min(agreeing, key=lambda result: result[1])
+        print(f"fastest that agrees: {name} ({ms:.1f} ms/frame), set POSE_BACKEND = '{name}' in code/settings.py")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time every pose backend over a recorded frame set and check they agree")
+    parser.add_argument('frames', help="folder of recorded camera frames (.jpg/.png)")
+    parser.add_argument('--backends', nargs='+', default=list(pose_backends.BACKENDS), choices=list(pose_backends.BACKENDS),
+                        help="backends to run; the first that loads is the reference")
+    parser.add_argument('--record', type=int, default=0, metavar='N', help="first record N frames from the camera into the folder")
+    args = parser.parse_args()
+    if args.record:
+        record_frames(args.frames, args.record)
+    compare(load_frames(args.frames), args.backends)
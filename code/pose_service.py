@@ -0,0 +1,273 @@
+import argparse
+import os
+import socket
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from settings import *
+import camera
+import pose
+import pose_backends
+import profiles
+import thermal
+from tracker import PoseTracker
+from motion import MotionGate, FrameChangeEstimator
+from pose_client import FIELDS, MODES, send_message, recv_message
+
+
+def draw_skeletons(preview, keypoints):
+    """Draws every person's skeleton into the RGB preview frame (in place) from normalized keypoints."""
+    height, width = preview.shape[:2]
+    points = np.round(keypoints * (width, height)).astype(int)
+    visible = pose.visible(keypoints)
+    for person, person_visible in zip(points, visible):
+        for a, b in pose.SKELETON:
+            if person_visible[a] and person_visible[b]:
+                cv2.line(preview, tuple(person[a]), tuple(person[b]), (0, 200, 255), 2)
+        for point in person[person_visible]:
+            cv2.circle(preview, tuple(point), 3, (255, 80, 0), -1)
+    return preview
+
+
+class ClientConnection:
+    """One subscribed client. Only the newest frame is ever queued, so a slow
+    client skips frames instead of holding up inference for everyone."""
+
+    def __init__(self, sock, on_close):
+        self.sock = sock
+        self.on_close = on_close
+        self.fields = ('keypoints',)
+        self.mode = 'full'
+        self.alive = True
+
+        self._pending = None
+        self._has_pending = threading.Condition()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        threading.Thread(target=self._write_loop, daemon=True).start()
+
+    def publish(self, header, fields):
+        """Queues a frame (replacing any unsent one) with just the fields this client subscribed to."""
+        arrays = {name: fields[name] for name in self.fields if fields.get(name) is not None}
+        with self._has_pending:
+            self._pending = (header, arrays)
+            self._has_pending.notify()
+
+    def _read_loop(self):
+        try:
+            while self.alive:
+                message = recv_message(self.sock)
+                fields = tuple(name for name in message.get('fields', self.fields) if name in FIELDS)
+                mode = message.get('mode', self.mode)
+                self.fields, self.mode = fields, mode if mode in MODES else self.mode
+        except (OSError, ConnectionError, ValueError):
+            self.close()
+
+    def _write_loop(self):
+        try:
+            while self.alive:
+                with self._has_pending:
+                    self._has_pending.wait_for(lambda: self._pending is not None or not self.alive)
+                    message, self._pending = self._pending, None
+                if message is not None:
+                    send_message(self.sock, *message)
+        except OSError:
+            self.close()
+
+    def close(self):
+        if not self.alive:
+            return
+        self.alive = False
+        with self._has_pending:
+            self._has_pending.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.on_close(self)
+
+
+class PoseService:
+    """Owns the camera and the pose model and publishes pose frames to every
+    connected game over a Unix socket (see pose_client.py for the protocol)."""
+
+    def __init__(self, socket_path=POSE_SERVICE_SOCKET, source=CAMERA_SOURCE, backend=POSE_BACKEND, thermal_source=THERMAL_SOURCE):
+        self.socket_path = socket_path
+        self.clients = []
+        self.clients_lock = threading.Lock()
+        self.running = True
+
+        # camera setup for YOLO: inference stream at model size, preview stream at display size
+        self.camera = camera.open_camera(source)
+        if isinstance(self.camera, camera.SyntheticCamera):
+            self.backend = self.camera # the synthetic camera scripts its own keypoints
+        else:
+            self.backend = pose_backends.open_backend(backend)
+
+        self.tracker = PoseTracker()
+        # low-power idle mode: full-rate inference only while something moves
+        self.motion_gate = MotionGate(IDLE_MOTION_WAKE_THRESHOLD, IDLE_MOTION_SLEEP_THRESHOLD, IDLE_AFTER_SECONDS, MOTION_DOWNSAMPLE)
+        # near-duplicate frames (player holding still) reuse the previous inference
+        self.frame_change = FrameChangeEstimator(FRAME_REUSE_THRESHOLD, FRAME_REUSE_MAX_AGE, MOTION_DOWNSAMPLE)
+        # lighter workload while the board runs hot, before the firmware throttles it
+        self.governor = thermal.ThermalGovernor(thermal.open_reader(thermal_source))
+        self.apply_thermal_level()
+
+    def apply_thermal_level(self):
+        """Applies the governor's limits: pose rate and model input here, the frame rate cap in the games."""
+        limits = self.governor.settings
+        self.min_inference_interval = 1 / limits['pose_fps'] if 'pose_fps' in limits else 0.0
+        imgsz = limits.get('imgsz', POSE_IMGSZ)
+        if hasattr(self.backend, 'imgsz'):
+            self.backend.imgsz = imgsz
+        # the camera delivers the inference stream at the new size, so the backend's letterbox doesn't resize on the CPU
+        self.camera.set_inference_size([round(side * imgsz / POSE_IMGSZ) for side in CAMERA_INFERENCE_SIZE])
+        self.max_framerate = limits.get('framerate') # sent to the games with every frame
+
+    def requested(self):
+        """The highest rate any client asks for, and whether anyone wants preview frames."""
+        with self.clients_lock:
+            modes = [client.mode for client in self.clients]
+            wants_preview = any('preview' in client.fields for client in self.clients)
+        mode = max(modes, key=MODES.index) if modes else 'paused'
+        return mode, wants_preview
+
+    def publish(self, header, fields):
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.publish(header, fields)
+
+    def remove_client(self, client):
+        with self.clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def accept_loop(self, server):
+        while self.running:
+            try:
+                sock, _ = server.accept()
+            except OSError:
+                break
+            with self.clients_lock:
+                self.clients.append(ClientConnection(sock, self.remove_client))
+
+    def inference_loop(self):
+        frame_id = 0
+        keypoints, boxes, scores = pose.detections_from_results(None)
+        have_results = False
+        last_inference_time = last_inference_capture = 0.0
+        stats_time, stats_inferences = time.time(), 0
+
+        while self.running:
+            if self.governor.poll():
+                self.apply_thermal_level()
+
+            mode, wants_preview = self.requested()
+            if mode == 'paused':
+                time.sleep(0.05) # nobody needs frames: leave the camera and model alone
+                continue
+
+            # hold the pose rate down while the governor asks for it
+            wait = last_inference_time + self.min_inference_interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+
+            frame, preview_frame, t_capture = self.camera.capture(want_preview=wants_preview)
+            if frame is None: # Basic check
+                time.sleep(0.05)
+                continue
+            frame_id += 1
+
+            # Nobody around the kiosk: only check for motion, with an occasional inference
+            if mode == 'idle':
+                awake = self.motion_gate.update(frame)
+                if not awake and t_capture - last_inference_time < IDLE_INFERENCE_INTERVAL:
+                    if wants_preview:
+                        self.publish({'frame_id': frame_id, 't_capture': t_capture, 't_source': last_inference_capture,
+                                      't_inference': last_inference_time, 'reused': True, 'max_framerate': self.max_framerate},
+                                     {'preview': preview_frame}) # keep the preview live
+                    time.sleep(IDLE_POLL_INTERVAL)
+                    continue
+            else:
+                self.motion_gate.wake()
+
+            # A frame that barely changed since the last inference reuses its keypoints
+            reused = have_results and self.frame_change.can_reuse(frame)
+            if not reused:
+                keypoints, boxes, scores = self.backend.detect(frame)
+                have_results = True
+                last_inference_time = time.time()
+                last_inference_capture = t_capture # a reused frame's keypoints come from this capture
+                stats_inferences += 1
+            # skeletons are only drawn when someone shows the camera feed
+            preview = draw_skeletons(preview_frame, keypoints) if wants_preview else None
+
+            track_ids = self.tracker.update(boxes, keypoints, scores)
+            track_age, track_confidence = self.tracker.track_stats(track_ids)
+            if len(keypoints) > 0:
+                self.motion_gate.wake() # people in view count as activity even when standing still
+
+            self.publish({'frame_id': frame_id, 't_capture': t_capture, 't_source': last_inference_capture,
+                          't_inference': last_inference_time, 'reused': bool(reused), 'max_framerate': self.max_framerate}, {
+                'nose': keypoints[:, pose.NOSE],
+                'keypoints': keypoints,
+                'boxes': boxes,
+                'scores': scores,
+                'track_ids': track_ids,
+                'track_age': track_age,
+                'track_confidence': track_confidence.astype(np.float32),
+                'preview': preview,
+            })
+
+            if time.time() - stats_time >= 30:
+                elapsed = time.time() - stats_time
+                with self.clients_lock:
+                    client_count = len(self.clients)
+                print(f"pose service: {stats_inferences / elapsed:.1f} inferences/s, mode {mode}, "
+                      f"reuse ratio {self.frame_change.reuse_ratio:.2f}, {client_count} client(s), "
+                      f"thermal level {self.governor.level}")
+                stats_time, stats_inferences = time.time(), 0
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path) # left over from a previous run
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen()
+        threading.Thread(target=self.accept_loop, args=(server,), daemon=True).start()
+        print(f"pose service listening on {self.socket_path}")
+
+        try:
+            self.inference_loop()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.running = False
+            server.close()
+            with self.clients_lock:
+                clients = list(self.clients)
+            for client in clients:
+                client.close()
+            os.remove(self.socket_path)
+            self.backend.close()
+            self.camera.close()
+
+
+if __name__ == '__main__':
+    # Run from the repository root before starting a game: python code/pose_service.py
+    parser = argparse.ArgumentParser(description="Shared camera + pose model service for the games")
+    parser.add_argument('--socket', default=POSE_SERVICE_SOCKET, help="Unix socket to listen on")
+    parser.add_argument('--source', default=CAMERA_SOURCE,
+                        help="video file or image folder to use instead of the Pi camera, or 'synthetic' for a scripted figure")
+    parser.add_argument('--backend', default=POSE_BACKEND, choices=['auto'] + list(pose_backends.BACKENDS), help="pose model backend")
+    parser.add_argument('--thermal', default=THERMAL_SOURCE,
+                        help="'sysfs' for the board's sensors, or a JSON file of made-up readings for the thermal governor")
+    args = parser.parse_args()
+    if HARDWARE_PROFILE is None:
+        profiles.calibrate_on_first_boot(HARDWARE_PROFILE_PATH)
+    profiles.report()
+    PoseService(args.socket, args.source, args.backend, args.thermal).serve_forever()
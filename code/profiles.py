@@ -0,0 +1,127 @@
+"""
+Hardware profiles: the performance settings (settings.py names) that suit a kind of board.
+
+settings.py applies one of them on import, so the same image runs on every kiosk:
+    1. HARDWARE_PROFILE, if set, forces a named profile
+    2. otherwise the calibration file code/calibrate.py wrote on this board's first boot
+       (a profile plus the values its benchmarks derived)
+    3. otherwise the profile for the board type, until calibration has run
+A calibration file that can't be read (a power cut during calibration) counts as missing.
+The profile only fills in the settings settings.py leaves at None, so a value set there always
+wins. The game, the pose service and calibrate.py print where each one came from on start.
+"""
+
+import fcntl
+import json
+import os
+import subprocess
+import sys
+
+import hardware
+
+PROFILES = {
+    'pi4': {
+        'RENDER_SCALES': (1.0, 0.75, 0.5),
+        'UPSCALE_METHOD': 'scale',
+        'FRAMERATE': 30,
+        'POSE_MODEL': 'yolo11n-pose_ncnn_model', 'POSE_IMGSZ': 320,
+        'CAMERA_INFERENCE_SIZE': (320, 320), 'CAMERA_PREVIEW_SIZE': (540, 540),
+        'CAMERA_LORES_FORMAT': 'YUV420', # the only lores format the Pi 4 ISP has
+        'CAMERA_FPS': 30,
+    },
+    'pi5': {
+        'RENDER_SCALES': (1.0, 0.75, 0.5),
+        'UPSCALE_METHOD': 'scale',
+        'FRAMERATE': 60,
+        'POSE_MODEL': 'yolo11n-pose_ncnn_model', 'POSE_IMGSZ': 320,
+        'CAMERA_INFERENCE_SIZE': (320, 320), 'CAMERA_PREVIEW_SIZE': (540, 540),
+        'CAMERA_LORES_FORMAT': 'RGB888', # no colour conversion on the CPU
+        'CAMERA_FPS': 30,
+    },
+    'desktop': {
+        'RENDER_SCALES': (1.0,),
+        'UPSCALE_METHOD': 'smoothscale',
+        'FRAMERATE': 60,
+        'POSE_MODEL': 'yolo11n-pose_ncnn_model', 'POSE_IMGSZ': 320,
+        'CAMERA_INFERENCE_SIZE': (320, 320), 'CAMERA_PREVIEW_SIZE': (540, 540),
+        'CAMERA_LORES_FORMAT': 'RGB888',
+        'CAMERA_FPS': 30,
+    },
+}
+
+# what apply_profile() did, for report(): {name: value} from the profile, {name: (settings.py value, profile value)}
+applied = {}
+overridden = {}
+
+
+def board_profile(board=None):
+    """The profile name for a board type."""
+    board = board or hardware.board_name()
+    if board.startswith('Raspberry Pi 4'):
+        return 'pi4'
+    if board.startswith('Raspberry Pi 5'):
+        return 'pi5'
+    return 'desktop'
+
+
+def load_calibration(path, board=None):
+    """The calibration saved for this board, or None if it hasn't been calibrated."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            calibration = json.load(f)
+        if calibration['profile'] not in PROFILES or not isinstance(calibration['settings'], dict):
+            raise ValueError(f"unknown profile {calibration['profile']!r}")
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Ignoring hardware calibration {path}: {e!r}; re-run python code/calibrate.py")
+        return None
+    if calibration.get('board') != (board or hardware.board_name()):
+        return None # copied over from another kind of board
+    return calibration
+
+
+def profile_settings(name=None, calibration_path=None):
+    """The settings to apply: a forced profile, this board's calibration, or its board-type profile."""
+    if name is not None:
+        if name in PROFILES:
+            return dict(PROFILES[name])
+        print(f"Unknown HARDWARE_PROFILE {name!r} (one of {', '.join(PROFILES)}), using the board's profile")
+    calibration = load_calibration(calibration_path) if calibration_path else None
+    if calibration is None:
+        return dict(PROFILES[board_profile()])
+    values = dict(PROFILES[calibration['profile']], **calibration['settings'])
+    # JSON has no tuples; the sizes are tuples everywhere else
+    return {key: tuple(value) if isinstance(value, list) else value for key, value in values.items()}
+
+
+def apply_profile(namespace, name=None, calibration_path=None):
+    """Fills in the settings the settings module's namespace leaves at None from profile_settings()."""
+    applied.clear()
+    overridden.clear()
+    for key, value in profile_settings(name, calibration_path).items():
+        if namespace.get(key) is None:
+            namespace[key] = applied[key] = value
+        elif namespace[key] != value:
+            overridden[key] = (namespace[key], value)
+
+
+def report():
+    """Prints which performance settings came from the hardware profile and which settings.py sets itself."""
+    print(f"hardware profile: {', '.join(f'{key}={value!r}' for key, value in applied.items()) or 'nothing left to set'}")
+    if overridden:
+        print(f"settings.py overrides it: {', '.join(f'{key}={value!r} (profile {default!r})' for key, (value, default) in overridden.items())}")
+
+
+def calibrate_on_first_boot(path):
+    """Runs code/calibrate.py if this board hasn't been calibrated yet, then restarts the
+    running program so settings.py applies the result."""
+    if load_calibration(path) is not None:
+        return
+    # the game and the pose service may both start on first boot: only one calibrates
+    with open(path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if load_calibration(path) is None:
+            subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calibrate.py')])
+    if load_calibration(path) is not None:
+        os.execv(sys.executable, [sys.executable] + sys.argv)
@@ -0,0 +1,49 @@
+"""
+Dynamic internal render resolution.
+
+The game simulates in logical WINDOW_WIDTH x WINDOW_HEIGHT coordinates no matter what;
+only the surface it draws into shrinks. Each render scale in RENDER_SCALES has its own
+pre-scaled sprite and font variants, so a step changes how many pixels get drawn and
+upscaled, never where things are or what collides.
+"""
+
+import numpy as np
+
+from settings import *
+
+
+class ResolutionController:
+    """Watches recent frame times and steps through `scales` (best first): down when the
+    90th percentile runs over `down_at` of the frame budget, back up when it stays under
+    `up_at`. After every step it waits for a full window of fresh frame times."""
+
+    def __init__(self, scales=RENDER_SCALES, budget_ms=1000 / FRAMERATE, window=RESOLUTION_WINDOW,
+                 down_at=RESOLUTION_DOWN_AT, up_at=RESOLUTION_UP_AT):
+        self.scales = tuple(scales)
+        self.budget_ms = budget_ms
+        self.down_at = down_at
+        self.up_at = up_at
+        self.frame_times = np.zeros(window)
+        self.count = 0
+        self.step = 0
+
+    @property
+    def scale(self):
+        return self.scales[self.step]
+
+    def update(self, frame_ms):
+        """Records one frame's work time. Returns True if the render scale changed."""
+        self.frame_times[self.count % len(self.frame_times)] = frame_ms
+        self.count += 1
+        if self.count < len(self.frame_times):
+            return False
+
+        p90 = np.percentile(self.frame_times, 90)
+        if p90 > self.budget_ms * self.down_at and self.step < len(self.scales) - 1:
+            self.step += 1
+        elif p90 < self.budget_ms * self.up_at and self.step > 0:
+            self.step -= 1
+        else:
+            return False
+        self.count = 0
+        return True
@@ -0,0 +1,187 @@
+"""
+Session telemetry and the leaderboard.
+
+Every game is stored in an SQLite database (WAL mode, so reading it for an export never
+blocks the writer): the session's duration, pose rate, frame-time percentiles and lowest
+render scale, plus one row per player with their score, coins, time in the air and what
+ended their game. Only a background thread touches the database. The game hands it finished
+sessions through a bounded queue, and if the disk can't keep up, sessions are dropped rather
+than blocking the game loop. The top LEADERBOARD_SIZE scores are kept in memory for the
+game over screen.
+
+To pull the data off a kiosk for fleet-wide analysis, from the repository root:
+    python code/sessions.py export sessions.jsonl.gz   # one JSON line per session, gzipped for .gz
+    python code/sessions.py top                         # the leaderboard
+"""
+
+import argparse
+import gzip
+import json
+import queue
+import sqlite3
+import threading
+
+from settings import *
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,      -- unix time the game started
+    board TEXT,
+    duration REAL,              -- seconds played
+    players INTEGER,
+    pose_hz REAL,               -- new pose results per second while playing
+    frame_ms_p50 REAL,
+    frame_ms_p90 REAL,
+    frame_ms_p99 REAL,
+    render_scale REAL           -- lowest render scale the game dropped to
+);
+CREATE TABLE IF NOT EXISTS scores (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    player INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    coins INTEGER,
+    air_time INTEGER,           -- seconds in the air
+    cause TEXT                  -- what ended the game: 'time_up', 'obstacle_up' (from the ground), 'obstacle_down' (hanging)
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores(score DESC);
+"""
+SESSION_COLUMNS = ('started', 'board', 'duration', 'players', 'pose_hz', 'frame_ms_p50', 'frame_ms_p90', 'frame_ms_p99', 'render_scale')
+SCORE_COLUMNS = ('player', 'score', 'coins', 'air_time', 'cause')
+
+
+def connect(path=SESSION_DB_PATH):
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL') # a power cut may lose the last game, never the database
+    db.executescript(SCHEMA)
+    return db
+
+
+def top_scores(db, count=LEADERBOARD_SIZE):
+    """The best `count` scores: dicts of score, coins, air_time and the session's start time."""
+    rows = db.execute('SELECT score, coins, air_time, started FROM scores JOIN sessions ON sessions.id = scores.session_id '
+                      'ORDER BY score DESC, started LIMIT ?', (count,))
+    return [dict(zip(('score', 'coins', 'air_time', 'started'), row)) for row in rows]
+
+
+class SessionStore:
+    """Records finished games on a background thread and keeps the leaderboard in memory.
+
+    record() and leaderboard() never touch the disk, so both are safe to call from the game loop.
+    """
+
+    def __init__(self, path=SESSION_DB_PATH, top_n=LEADERBOARD_SIZE, queue_size=SESSION_QUEUE_SIZE):
+        self.path = path
+        self.top_n = top_n
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.dropped = 0 # sessions the writer was too far behind to take
+        self.failed = 0 # sessions the database refused
+        self.top = []
+        self.top_lock = threading.Lock()
+        self.loaded = threading.Event() # set once the leaderboard has been read from the database
+        self.stopping = threading.Event() # set by close(): the writer stops once the queue is empty
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.thread.start()
+
+    def record(self, session):
+        """Queues a finished game: a dict with the SESSION_COLUMNS and a 'scores' list of dicts
+        with the SCORE_COLUMNS. Returns False if it had to be dropped because the writer is behind."""
+        with self.top_lock:
+            entries = [{'score': score['score'], 'coins': score['coins'], 'air_time': score['air_time'],
+                        'started': session['started']} for score in session['scores']]
+            self.top = sorted(self.top + entries, key=lambda entry: (-entry['score'], entry['started']))[:self.top_n]
+        try:
+            self.pending.put_nowait(session)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def leaderboard(self):
+        """The best scores so far, best first."""
+        with self.top_lock:
+            return list(self.top)
+
+    def writer(self):
+        # a database that can't be opened or written (disk full, read-only, corrupt) costs the
+        # telemetry, never the game: the leaderboard carries on in memory
+        try:
+            db = connect(self.path)
+            stored = top_scores(db, self.top_n)
+        except sqlite3.Error as e:
+            print(f"session store: can't open {self.path}, sessions won't be saved: {e}")
+            db, stored = None, []
+        with self.top_lock:
+            # games recorded before the database was read are already in self.top
+            self.top = sorted(stored + self.top, key=lambda entry: (-entry['score'], entry['started']))[:self.top_n]
+        self.loaded.set()
+
+        while True:
+            try:
+                session = self.pending.get(timeout=0.5)
+            except queue.Empty:
+                if self.stopping.is_set():
+                    break
+                continue
+            if session is None:
+                break
+            if db is None:
+                self.failed += 1
+                continue
+            try:
+                with db:
+                    cursor = db.execute(f"INSERT INTO sessions ({', '.join(SESSION_COLUMNS)}) VALUES ({', '.join('?' * len(SESSION_COLUMNS))})",
+                                        [session[column] for column in SESSION_COLUMNS])
+                    db.executemany(f"INSERT INTO scores (session_id, {', '.join(SCORE_COLUMNS)}) VALUES (?, {', '.join('?' * len(SCORE_COLUMNS))})",
+                                   [[cursor.lastrowid] + [score[column] for column in SCORE_COLUMNS] for score in session['scores']])
+            except sqlite3.Error as e:
+                self.failed += 1
+                print(f"session store: couldn't save the session started at {session['started']}: {e}")
+        if db is not None:
+            db.close()
+
+    def close(self):
+        """Writes whatever is still queued, then stops the writer. Waits at most 5 seconds."""
+        self.stopping.set()
+        try:
+            self.pending.put_nowait(None)
+        except queue.Full:
+            pass # no room to say so: the writer stops when it finds the queue empty
+        self.thread.join(timeout=5) # a writer still behind after that dies with the game
+
+
+def export(db, out_path, since=None):
+    """Writes every session (with its scores) as one JSON line, gzipped if out_path ends in .gz. Returns the count."""
+    opener = gzip.open if out_path.endswith('.gz') else open
+    sessions = db.execute(f"SELECT id, {', '.join(SESSION_COLUMNS)} FROM sessions WHERE started >= ? ORDER BY started", (since or 0,))
+    count = 0
+    with opener(out_path, 'wt') as f:
+        for row in sessions.fetchall():
+            session = dict(zip(SESSION_COLUMNS, row[1:]))
+            session['scores'] = [dict(zip(SCORE_COLUMNS, score)) for score in
+                                 db.execute(f"SELECT {', '.join(SCORE_COLUMNS)} FROM scores WHERE session_id = ? ORDER BY player", (row[0],))]
+            f.write(json.dumps(session) + '\n')
+            count += 1
+    return count
+
+
+if __name__ == '__main__':
+    # Run from the repository root, like the game
+    parser = argparse.ArgumentParser(description="Session store: export it or show the leaderboard")
+    parser.add_argument('--db', default=SESSION_DB_PATH, help="session database")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help="every session as JSON lines, for fleet-wide analysis")
+    export_parser.add_argument('out', help="output file; gzipped if it ends in .gz")
+    export_parser.add_argument('--since', type=float, help="only sessions started after this unix time")
+    top_parser = commands.add_parser('top', help="print the leaderboard")
+    top_parser.add_argument('-n', type=int, default=LEADERBOARD_SIZE)
+    args = parser.parse_args()
+
+    db = connect(args.db)
+    if args.command == 'export':
+        print(f"exported {export(db, args.out, args.since)} sessions to {args.out}")
+    else:
+        for rank, entry in enumerate(top_scores(db, args.n), 1):
+            print(f"{rank:>3}. {entry['score']:>5}  ({entry['coins']} coins, {entry['air_time']} s)")
+    db.close()
@@ -3,4 +3,159 @@ WINDOW_HEIGHT=540
 
 TARGET_SCREEN_WIDTH=1920
 TARGET_SCREEN_HEIGHT=1080
-FRAMERATE = 60
\ No newline at end of file
+# Settings left at None here come from the hardware profile (see the end of this file); a value
+# set here wins over the profile.
+FRAMERATE = None # e.g. 60
+# How the internal surface is scaled up to the screen: 'scale' (nearest, cheap) or 'smoothscale' (filtered)
+UPSCALE_METHOD = None
+
+# Dynamic resolution (resolution.py): WINDOW_WIDTH x WINDOW_HEIGHT is the logical space the game
+# plays in; it is drawn at one of these scales of it, best first, stepping down while frames run
+# over budget. The controller decides on the 90th percentile of the last RESOLUTION_WINDOW frames.
+RENDER_SCALES = None # e.g. (1.0, 0.75, 0.5)
+RESOLUTION_WINDOW = 60
+RESOLUTION_DOWN_AT = 0.9 # share of the frame budget (1 / FRAMERATE) that makes it step down
+RESOLUTION_UP_AT = 0.5   # and that it has to stay under to step back up
+
+# Most particles (particles.py) alive at once, across every effect
+PARTICLE_BUDGET = 400
+
+# Procedural level (level.py): the course is built LEVEL_CHUNK_SECONDS of play at a time on a background
+# thread, LEVEL_CHUNKS_AHEAD chunks ahead, and gets from easy to hard over LEVEL_RAMP_SECONDS.
+LEVEL_CHUNK_SECONDS = 4.0
+LEVEL_CHUNKS_AHEAD = 3
+LEVEL_RAMP_SECONDS = 30.0
+LEVEL_REACTION_TIME = 0.5 # seconds the path allows for pose latency and the player before it asks for a climb or a dive
+LEVEL_SEED = None         # a number replays the same course every game
+
+# Pre-baked sprites, see asset_pack.py. None picks ./graphics/baked/assets_<WINDOW_WIDTH>.pack
+ASSET_PACK_PATH = None
+
+# Multi-player: up to MAX_PLAYERS people in front of the camera each fly their own plane.
+MAX_PLAYERS = 1
+# How detected people map to players before a game: 'confidence' (model order), 'left_to_right' or 'track'
+# (stable tracker IDs). Once a game starts, control is locked to the tracked people who calibrated.
+PLAYER_ASSIGNMENT = 'confidence'
+# Tint multiplied into each player's plane (None keeps the original red)
+PLAYER_TINTS = [None, (120, 170, 255), (130, 255, 140), (255, 235, 120)]
+
+# Nose above this normalized camera height means thrust
+THRUST_NOSE_THRESHOLD = 0.3
+
+# Gesture control (gestures.py): besides the nose above the line, flapping the arms gives analogue
+# thrust, crouching dives, jumping boosts and leaning dodges. Off by default: the game flies on the nose alone.
+GESTURE_CONTROL = False
+GESTURE_WINDOW = 32           # poses kept per player, about a second at the full pose rate
+GESTURE_RECENT = 4            # newest poses that lean, crouch and jump are measured over
+GESTURE_FLAP_SWING = 0.5      # wrists must swing this far (in torso lengths) to count as flapping
+GESTURE_FLAP_DEADBAND = 0.15  # torso lengths around the middle of the swing that don't count as a side
+GESTURE_FLAP_MIN_HZ = 0.5     # flaps per second for the first bit of thrust ...
+GESTURE_FLAP_FULL_HZ = 2.0    # ... and for full thrust
+GESTURE_CROUCH_DEADZONE = 0.2 # crouch depth (0-1) that is still just standing
+GESTURE_JUMP_SPEED = 2.0      # torso lengths per second upwards for a boost
+GESTURE_LEAN_ANGLE = 20       # degrees from upright for a dodge
+GESTURE_COOLDOWN = 2.0        # seconds between two boosts or two dodges
+PLANE_DIVE_GRAVITY = 2.0      # extra gravity at a full crouch, as a multiple of normal gravity
+PLANE_BOOST_TIME = 0.4        # seconds of double climb after a boost
+PLANE_DODGE_TIME = 0.8        # seconds a dodging plane passes through obstacles
+
+# Low-power attract screen: while nothing moves in front of the camera in WAITING_FOR_PLAYER,
+# only frame differencing runs and the pose model runs once every IDLE_INFERENCE_INTERVAL seconds.
+IDLE_MOTION_WAKE_THRESHOLD = 6.0   # mean pixel change (0-255) on the downsampled frame that ramps to full rate
+IDLE_MOTION_SLEEP_THRESHOLD = 2.0  # the scene has to stay below this ...
+IDLE_AFTER_SECONDS = 20.0          # ... for this long before going idle
+IDLE_INFERENCE_INTERVAL = 2.0      # seconds between inferences while idle
+IDLE_POLL_INTERVAL = 0.1           # seconds between motion checks while idle
+MOTION_DOWNSAMPLE = 8              # frame differencing looks at every Nth pixel in each direction
+
+# Near-duplicate frames: if no block of the downsampled frame changed by more than this (0-255)
+# since the last inference, reuse its keypoints, for at most FRAME_REUSE_MAX_AGE seconds.
+FRAME_REUSE_THRESHOLD = 4.0
+FRAME_REUSE_MAX_AGE = 0.25
+
+# Shared pose service (pose_service.py) that owns the camera and the model for every game
+POSE_SERVICE_SOCKET = '/tmp/ai-plane-game-pose.sock'
+POSE_MODEL = None # e.g. 'yolo11n-pose_ncnn_model'
+POSE_IMGSZ = None # e.g. 320
+POSE_CONFIDENCE = 0.25 # same detection thresholds ultralytics uses by default
+POSE_IOU = 0.7
+
+# Pose backend (pose_backends.py): 'ultralytics' lets ultralytics pick the NCNN runtime options,
+# 'ncnn' runs the same exported model through pyncnn with NCNN_OPTIONS, 'auto' picks 'ncnn'
+# when code/ncnn_tune.py has written a profile for this board and 'ultralytics' otherwise.
+# 'onnxruntime' and 'opencv' (cv2.dnn) run POSE_ONNX_MODEL instead; code/pose_compare.py times them all.
+POSE_BACKEND = 'auto'
+NCNN_OPTIONS = {
+    'num_threads': 4,
+    'powersave': 0,              # 0 all cores, 1 little cores only, 2 big cores only
+    'use_vulkan_compute': False,
+    'lightmode': True,           # free intermediate blobs as soon as they are consumed
+    'use_fp16_storage': False,
+    'use_fp16_arithmetic': False,
+    'use_packing_layout': True,
+    'allocators': 'pool',        # 'pool' reuses blob/workspace memory between frames, 'default' mallocs
+}
+# Tuned NCNN_OPTIONS per board, written by code/ncnn_tune.py and applied by the pose service at startup
+NCNN_PROFILE_PATH = './ncnn_profiles.json'
+# The model for the 'onnxruntime' and 'opencv' backends: yolo export model=yolo11n-pose.pt format=onnx imgsz=320
+# (add dynamic=True if the thermal governor's THERMAL_LEVELS lower 'imgsz')
+POSE_ONNX_MODEL = 'yolo11n-pose.onnx'
+POSE_ONNX_THREADS = 4       # 0 lets the runtime pick
+
+# Thermal governor (thermal.py), run by the pose service: it polls the SoC temperature and the firmware's
+# throttle flags and steps through THERMAL_LEVELS (full workload first) before the board throttles, and
+# back once it has cooled down. 'pose_fps' caps inferences per second, 'framerate' caps the games' frame
+# rate and 'imgsz' shrinks the model input (a multiple of 32; the camera's inference stream shrinks with it,
+# so nothing is resized on the CPU). Every step is logged to THERMAL_LOG_PATH.
+THERMAL_SOURCE = 'sysfs'    # or the path of a JSON file with made-up readings, see thermal.FileThermalReader
+THERMAL_POLL_INTERVAL = 2.0 # seconds
+THERMAL_HOT_AT = 75.0       # degrees C, projected on the current trend; the Pi 4 and 5 throttle from 80
+THERMAL_COOL_AT = 65.0
+THERMAL_LOOKAHEAD = 30.0    # seconds ahead the temperature trend is projected
+THERMAL_SETTLE = 20.0       # seconds after a step before the next one
+THERMAL_LEVELS = [
+    {},
+    {'pose_fps': 15},
+    {'pose_fps': 15, 'framerate': 30},
+    {'pose_fps': 10, 'framerate': 30, 'imgsz': 256},
+]
+THERMAL_LOG_PATH = './thermal_log.jsonl'
+
+# Camera streams (camera.py): the ISP delivers the inference stream at model size and
+# the preview stream at display size. The Pi 4 lores stream must be 'YUV420'; a Pi 5 can use 'RGB888'.
+CAMERA_INFERENCE_SIZE = None # e.g. (320, 320)
+CAMERA_PREVIEW_SIZE = None   # e.g. (540, 540)
+CAMERA_LORES_FORMAT = None   # e.g. 'YUV420'
+CAMERA_FPS = None            # e.g. 30
+# None uses the Pi camera; a video file or a folder of images plays back through camera.FileCamera instead,
+# 'synthetic' renders a scripted figure (camera.SyntheticCamera) with no camera or pose model
+CAMERA_SOURCE = None
+
+# Print the motion-to-photon latency report (latency.py) after every game and on exit
+LATENCY_REPORT = False
+
+# Spectator stream (spectator.py): the game mirrored as MJPEG on http://<kiosk>:SPECTATOR_PORT/ for a
+# second screen or a tablet. A separate process encodes it, and frames only leave the game while someone watches.
+SPECTATOR_STREAM = False
+SPECTATOR_HOST = '127.0.0.1' # only the kiosk itself; '0.0.0.0' opens it to every network interface (it has no login)
+SPECTATOR_PORT = 8080
+SPECTATOR_FPS = 15
+SPECTATOR_SIZE = (WINDOW_WIDTH, WINDOW_HEIGHT) # frames drawn at a reduced render scale are scaled back up to this
+SPECTATOR_QUALITY = 75      # JPEG quality, 0-100
+SPECTATOR_SLOTS = 3         # frames in the shared-memory ring between the game and the encoder
+
+# Session telemetry (sessions.py): every game's scores, pose rate and frame times go into an SQLite
+# database, written by a background thread; the best LEADERBOARD_SIZE scores show on the game over screen
+SESSION_DB_PATH = './sessions.db'
+SESSION_QUEUE_SIZE = 64     # finished games waiting for the writer; more than this are dropped, never waited on
+LEADERBOARD_SIZE = 5
+
+# Hardware profile (profiles.py): a named bundle of the performance settings above for a
+# kind of board ('pi4', 'pi5', 'desktop'), filling in the ones left at None. None uses what
+# code/calibrate.py measured on this board (HARDWARE_PROFILE_PATH) or, before calibration,
+# the profile for the board type.
+HARDWARE_PROFILE = None
+HARDWARE_PROFILE_PATH = './hardware_profile.json'
+
+import profiles as _profiles
+_profiles.apply_profile(globals(), HARDWARE_PROFILE, HARDWARE_PROFILE_PATH)
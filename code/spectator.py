@@ -0,0 +1,241 @@
+"""
+Spectator stream: mirrors the game to a second screen or a tablet on the local network.
+
+The game never encodes anything itself. At most SPECTATOR_FPS times a second, and only while
+someone is watching, it blits its render surface into one slot of a shared-memory ring (a
+pygame surface backed by the shared memory, so handing a frame over is a single blit). A
+separate encoder process JPEG-encodes the newest slot and serves it as MJPEG:
+
+    http://<kiosk>:SPECTATOR_PORT/             a page showing the stream
+    http://<kiosk>:SPECTATOR_PORT/stream.mjpg  the MJPEG stream itself
+    http://<kiosk>:SPECTATOR_PORT/frame.jpg    a single frame
+
+Nobody ever waits on anybody: the game overwrites the oldest slot, the encoder skips straight
+to the newest frame, and a slow viewer gets whichever frame is newest when it's ready for one.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pygame
+
+from settings import *
+
+# Shared memory layout: a header of int64s, then SPECTATOR_SLOTS frames of BGRA pixels
+# at the largest render size. Header: latest slot (-1 before the first frame), viewers
+# connected, stop flag, then per slot its sequence number (odd while being written), width, height.
+LATEST, VIEWERS, STOP = 0, 1, 2
+SLOT_FIELDS = 3
+HEADER_SIZE = 3 + SLOT_FIELDS * SPECTATOR_SLOTS
+FRAME_SIZE = (WINDOW_WIDTH, WINDOW_HEIGHT) # render surfaces are never bigger than the logical size
+
+BOUNDARY = 'spectatorframe'
+PAGE = """<html><head><title>AI Plane Game</title></head>
+<body style="margin:0;background:#000"><img src="/stream.mjpg" style="width:100%;height:100%;object-fit:contain"></body></html>"""
+
+
+def ring_views(buffer):
+    """(header, [slot pixel arrays]) over the shared memory buffer."""
+    header = np.ndarray(HEADER_SIZE, np.int64, buffer)
+    width, height = FRAME_SIZE
+    slot_bytes = width * height * 4
+    slots = [np.ndarray((height, width, 4), np.uint8, buffer, header.nbytes + i * slot_bytes) for i in range(SPECTATOR_SLOTS)]
+    return header, slots
+
+
+class SpectatorOutput:
+    """Game side: starts the encoder process and hands it frames through the shared-memory ring."""
+
+    def __init__(self, fps=SPECTATOR_FPS, host=SPECTATOR_HOST, port=SPECTATOR_PORT):
+        width, height = FRAME_SIZE
+        self.interval = 1 / fps
+        self.last_submit = 0.0
+        self.shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE * 8 + SPECTATOR_SLOTS * width * height * 4)
+        self.header, _ = ring_views(self.shm.buf)
+        self.header[:] = 0
+        self.header[LATEST] = -1
+        # the slots as pygame surfaces, so a frame goes straight into shared memory with one blit
+        self.slot_surfaces = [pygame.image.frombuffer(self.shm.buf[HEADER_SIZE * 8 + i * width * height * 4:][:width * height * 4],
+                                                      (width, height), 'BGRA') for i in range(SPECTATOR_SLOTS)]
+        self.frame_number = 0
+
+        # a fresh interpreter rather than a fork: the encoder wants nothing of the game's SDL state
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), self.shm.name, '--host', host, '--port', str(port)])
+        print(f"spectator stream on http://{host}:{port}/")
+
+    def submit(self, surface):
+        """Offers the frame just drawn. Copies it only if a viewer is connected and the stream is due a frame."""
+        now = time.perf_counter()
+        if self.header[VIEWERS] == 0 or now - self.last_submit < self.interval:
+            return False
+        self.last_submit = now
+
+        slot = (self.header[LATEST] + 1) % SPECTATOR_SLOTS # the oldest frame
+        base = 3 + slot * SLOT_FIELDS
+        self.frame_number += 1
+        self.header[base] = 2 * self.frame_number - 1 # odd: being written
+        self.slot_surfaces[slot].blit(surface, (0, 0))
+        self.header[base + 1], self.header[base + 2] = surface.get_size()
+        self.header[base] = 2 * self.frame_number
+        self.header[LATEST] = slot
+        return True
+
+    def close(self):
+        self.header[STOP] = 1
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+        # the views have to go before the shared memory can be closed
+        del self.slot_surfaces, self.header
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FrameEncoder:
+    """Encoder side: JPEG-encodes the newest frame in the ring whenever there is a new one."""
+
+    def __init__(self, shm, size=SPECTATOR_SIZE, quality=SPECTATOR_QUALITY):
+        import cv2 # only the encoder process needs OpenCV
+        self.cv2 = cv2
+        self.header, self.slots = ring_views(shm.buf)
+        self.size = tuple(size)
+        self.quality = quality
+        self.jpeg = None
+        self.sequence = 0 # of the frame in self.jpeg
+        self.new_jpeg = threading.Condition()
+        self.viewers = 0
+        self.viewers_lock = threading.Lock()
+
+    def add_viewer(self, count):
+        with self.viewers_lock:
+            self.viewers += count
+            if self.header is not None:
+                self.header[VIEWERS] = self.viewers
+
+    def release(self):
+        """Lets go of the shared memory views so it can be closed."""
+        with self.viewers_lock:
+            self.header = self.slots = None
+
+    def encode_latest(self):
+        """Encodes the newest complete frame if it hasn't been yet. Returns False if there was none."""
+        slot = int(self.header[LATEST])
+        if slot < 0:
+            return False
+        base = 3 + slot * SLOT_FIELDS
+        sequence = int(self.header[base])
+        if sequence % 2 or sequence <= self.sequence:
+            return False # being written, or already encoded
+        width, height = int(self.header[base + 1]), int(self.header[base + 2])
+        frame = self.slots[slot][:height, :width].copy()
+        if self.header[base] != sequence:
+            return False # the game came round and overwrote it while we copied: drop it
+
+        frame = self.cv2.cvtColor(frame, self.cv2.COLOR_BGRA2BGR)
+        if (width, height) != self.size: # drawn at a reduced render scale
+            frame = self.cv2.resize(frame, self.size, interpolation=self.cv2.INTER_LINEAR)
+        ok, jpeg = self.cv2.imencode('.jpg', frame, [self.cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if ok:
+            with self.new_jpeg:
+                self.jpeg, self.sequence = jpeg.tobytes(), sequence
+                self.new_jpeg.notify_all()
+        return True
+
+    def wait_jpeg(self, after, timeout=1.0):
+        """(sequence, jpeg) of a frame newer than `after`, or (after, None) on timeout."""
+        with self.new_jpeg:
+            if not self.new_jpeg.wait_for(lambda: self.sequence > after, timeout):
+                return after, None
+            return self.sequence, self.jpeg
+
+
+def handler_for(encoder):
+    class SpectatorHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/':
+                self.send_body('text/html', PAGE.encode())
+            elif self.path == '/frame.jpg':
+                # a viewer for as long as it takes the game to send a fresh frame
+                encoder.add_viewer(1)
+                try:
+                    _, jpeg = encoder.wait_jpeg(encoder.sequence, timeout=2.0)
+                finally:
+                    encoder.add_viewer(-1)
+                jpeg = jpeg or encoder.jpeg
+                if jpeg is None:
+                    self.send_error(503, "no frame yet")
+                else:
+                    self.send_body('image/jpeg', jpeg)
+            elif self.path == '/stream.mjpg':
+                self.stream()
+            else:
+                self.send_error(404)
+
+        def send_body(self, content_type, body):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream(self):
+            self.send_response(200)
+            self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            encoder.add_viewer(1)
+            try:
+                sequence = 0
+                while True:
+                    # always the newest frame: whatever came in while this viewer was busy is dropped
+                    sequence, jpeg = encoder.wait_jpeg(sequence)
+                    if jpeg is None:
+                        continue
+                    self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode())
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass # viewer went away
+            finally:
+                encoder.add_viewer(-1)
+
+        def log_message(self, format, *args):
+            pass # one line per request would flood the game's console
+
+    return SpectatorHandler
+
+
+def serve(shm_name, host=SPECTATOR_HOST, port=SPECTATOR_PORT):
+    """The encoder process: encodes frames from the ring and serves them over HTTP until the game stops."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    resource_tracker.unregister(shm._name, 'shared_memory') # the game owns it and unlinks it
+    encoder = FrameEncoder(shm)
+    server = ThreadingHTTPServer((host, port), handler_for(encoder))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    parent = os.getppid()
+    while not encoder.header[STOP] and os.getppid() == parent: # the game closed the stream, or died
+        if not encoder.encode_latest():
+            time.sleep(0.005)
+    server.shutdown()
+    encoder.release()
+    shm.close()
+
+
+if __name__ == '__main__':
+    # started by SpectatorOutput; not meant to be run by hand
+    parser = argparse.ArgumentParser(description="Spectator stream encoder")
+    parser.add_argument('shm_name', help="shared memory ring the game writes frames into")
+    parser.add_argument('--host', default=SPECTATOR_HOST)
+    parser.add_argument('--port', type=int, default=SPECTATOR_PORT)
+    args = parser.parse_args()
+    serve(args.shm_name, args.host, args.port)
@@ -1,24 +1,42 @@
 import pygame
 from settings import *
 from random import randint, choice
+from asset_pack import load_image, load_mask
 
 
-class BG(pygame.sprite.Sprite):
+def scaled_images(path, scale_factor, **kwargs):
+    """The image at every render scale (RENDER_SCALES, plus the logical 1.0), for drawing at a reduced internal resolution."""
+    return {render_scale: load_image(path, scale_factor * render_scale, **kwargs) for render_scale in {1.0, *RENDER_SCALES}}
+
+
+class ScaledSprite(pygame.sprite.Sprite):
+    """A sprite that lives in logical (WINDOW_WIDTH x WINDOW_HEIGHT) coordinates: rect and mask
+    are logical, and render_image() gives the pre-scaled variant to draw at a render scale."""
+    render_images = None # render scale -> image
+
+    def render_image(self, render_scale):
+        return self.render_images[render_scale]
+
+
+def double_width(image, flags=0):
+    """Two copies of a tileable image side by side, for seamless scrolling."""
+    width, height = image.get_size()
+    doubled = pygame.Surface((width * 2, height), flags)
+    doubled.blit(image, (0, 0))
+    doubled.blit(image, (width, 0))
+    return doubled
+
+
+class BG(ScaledSprite):
     def __init__(self, groups, scale_factor):
         if groups is None:
             super().__init__()  # Initialize without adding to any groups
         else:
             super().__init__(groups) # Initialize and add to the specified group(s)
         
-        bg_image = pygame.image.load('./graphics/environment/background.png').convert()
-
-        full_height = bg_image.get_height() * scale_factor
-        full_width = bg_image.get_width() * scale_factor
-        full_sized_image = pygame.transform.scale(bg_image, (full_width, full_height))
-
-        self.image = pygame.Surface((full_width * 2, full_height))
-        self.image.blit(full_sized_image, (0,0))
-        self.image.blit(full_sized_image, (full_width, 0))
+        self.render_images = {render_scale: double_width(image) for render_scale, image in
+                              scaled_images('./graphics/environment/background.png', scale_factor, alpha=False).items()}
+        self.image = self.render_images[1.0]
         self.rect = self.image.get_rect(topleft = (0,0))
         self.pos = pygame.math.Vector2(self.rect.topleft)
 
@@ -31,20 +49,14 @@ class BG(pygame.sprite.Sprite):
         
         self.rect.x = round(self.pos.x)
 
-class Ground(pygame.sprite.Sprite):
+class Ground(ScaledSprite):
     def __init__(self, groups, scale_factor):
         super().__init__(groups) # Initialize and add to the specified group(s)
         
-        ground_image = pygame.image.load('./graphics/ground/ground.png').convert_alpha()
-
-        full_height = ground_image.get_height() * scale_factor
-        full_width = ground_image.get_width() * scale_factor
-        full_sized_image = pygame.transform.scale(ground_image, (full_width, full_height))
-
         # MODIFIED: Create the surface with per-pixel alpha
-        self.image = pygame.Surface((full_width * 2, full_height), pygame.SRCALPHA) 
-        self.image.blit(full_sized_image, (0,0))
-        self.image.blit(full_sized_image, (full_width, 0))
+        self.render_images = {render_scale: double_width(image, pygame.SRCALPHA) for render_scale, image in
+                              scaled_images('./graphics/ground/ground.png', scale_factor).items()}
+        self.image = self.render_images[1.0]
         
         self.rect = self.image.get_rect(bottomleft = (0, WINDOW_HEIGHT)) 
         self.pos = pygame.math.Vector2(self.rect.topleft) # Use topleft for self.pos consistency
@@ -59,17 +71,18 @@ class Ground(pygame.sprite.Sprite):
         self.rect.x = round(self.pos.x)
         # self.rect.y = round(self.pos.y) # Ensure y position is also updated from self.pos if it changes
 
-class Plane(pygame.sprite.Sprite):
-    def __init__(self, groups, scale_factor):
+class Plane(ScaledSprite):
+    def __init__(self, groups, scale_factor, player_index=0):
         super().__init__(groups)
+        self.player_index = player_index
 
         # image
         self.import_frames(scale_factor)
         self.frame_image = 0
         self.image = self.frames[self.frame_image]
 
-        # rect
-        self.rect = self.image.get_rect(midleft=(WINDOW_WIDTH / 20, WINDOW_HEIGHT / 2))
+        # rect (extra players start staggered to the right so the planes don't overlap)
+        self.rect = self.image.get_rect(midleft=(WINDOW_WIDTH / 20 + player_index * WINDOW_WIDTH / 12, WINDOW_HEIGHT / 2))
         self.pos = pygame.math.Vector2(self.rect.topleft)
 
         # movement
@@ -77,6 +90,12 @@ class Plane(pygame.sprite.Sprite):
         self.direction = 0
         self.thrust = -200
         self.is_thrusting = False  # New attribute to track mouse press state
+        self.thrust_amount = 0.0   # 0-1, how much of self.thrust (gesture control flaps in between)
+        self.dive = 0.0            # 0-1, extra gravity from crouching
+        self.boost_time = 0.0      # seconds of boost left
+        self.dodge_time = 0.0      # seconds left passing through obstacles
+        self.ceiling = 50                  # highest the top of the plane goes
+        self.floor = WINDOW_HEIGHT - 50    # lowest the bottom of the plane goes
 
         # rotation
         self.current_rotation = 0  # Current rotation of the plane
@@ -87,28 +106,45 @@ class Plane(pygame.sprite.Sprite):
         self.mask = pygame.mask.from_surface(self.image)
 
     def update(self, dt):
-        if self.is_thrusting:  # Apply thrust when the mouse is pressed
+        self.boost_time = max(0.0, self.boost_time - dt)
+        self.dodge_time = max(0.0, self.dodge_time - dt)
+        if self.is_thrusting or self.boost_time > 0:  # Apply thrust when the mouse is pressed
             self.apply_thrust()
         self.apply_gravity(dt)
         self.animate(dt)
         self.lerp_rotation(dt)  # Smoothly interpolate rotation
         self.rotate()           # Apply the interpolated rotation to the image
 
-    def set_thrust(self, new_thrust_bool):
-        self.is_thrusting = new_thrust_bool
+    def set_thrust(self, amount, dive=0.0):
+        """amount: True/False or 0-1 of full thrust; dive: 0-1 of PLANE_DIVE_GRAVITY extra gravity."""
+        self.thrust_amount = float(amount)
+        self.is_thrusting = self.thrust_amount > 0
+        self.dive = dive
+
+    def boost(self):
+        """Double climb for PLANE_BOOST_TIME seconds."""
+        self.boost_time = PLANE_BOOST_TIME
+
+    def dodge(self):
+        """Passes through obstacles for PLANE_DODGE_TIME seconds."""
+        self.dodge_time = PLANE_DODGE_TIME
+
+    @property
+    def dodging(self):
+        return self.dodge_time > 0
 
     def apply_gravity(self, dt):
-        self.direction += self.gravity * dt
+        self.direction += self.gravity * (1 + self.dive * PLANE_DIVE_GRAVITY) * dt
         self.pos.y += self.direction * dt
 
         # Prevent the plane from going above the top of the screen
-        if self.pos.y < 50:
-            self.pos.y = 50
+        if self.pos.y < self.ceiling:
+            self.pos.y = self.ceiling
             self.direction = 0  # Reset direction to prevent further upward movement
 
         # Prevent the plane from falling below the bottom of the screen
-        if self.pos.y + self.rect.height > WINDOW_HEIGHT - 50:
-            self.pos.y = WINDOW_HEIGHT - self.rect.height - 50
+        if self.pos.y + self.rect.height > self.floor:
+            self.pos.y = self.floor - self.rect.height
             self.direction = 0  # Reset direction to prevent further downward movement
 
         self.rect.y = round(self.pos.y)
@@ -117,7 +153,7 @@ class Plane(pygame.sprite.Sprite):
         self.target_rotation = -self.direction * 0.06
 
     def apply_thrust(self):
-        self.direction = self.thrust
+        self.direction = self.thrust * (2 if self.boost_time > 0 else self.thrust_amount)
 
     def lerp_rotation(self, dt):
         self.current_rotation += (self.target_rotation - self.current_rotation) * self.rotation_speed * dt
@@ -133,38 +169,55 @@ class Plane(pygame.sprite.Sprite):
         rotated_plane = pygame.transform.rotozoom(self.image, self.current_rotation, 1)
         self.image = rotated_plane
         self.mask = pygame.mask.from_surface(self.image)
+
+    def render_image(self, render_scale):
+        if render_scale == 1.0:
+            image = self.image
+        else:
+            # rotate the smaller variant rather than shrinking the rotated logical image
+            image = pygame.transform.rotozoom(self.render_frames[render_scale][int(self.frame_image)], self.current_rotation, 1)
+        if self.dodging:
+            image.set_alpha(110) # a fresh rotozoom every frame, so the frames themselves stay opaque
+        return image
     
     def import_frames(self, scale_factor):
-        self.frames = []
+        self.render_frames = {render_scale: [] for render_scale in {1.0, *RENDER_SCALES}}
+        tint = PLAYER_TINTS[self.player_index % len(PLAYER_TINTS)]
         for i in range(3):
-            surface = pygame.image.load(f'./graphics/plane/red{i}.png').convert_alpha()
-            scaled_surface = pygame.transform.scale(surface, pygame.math.Vector2(surface.get_size()) * scale_factor)
-            self.frames.append(scaled_surface)
-
-class Coin(pygame.sprite.Sprite):
-    def __init__(self, groups, scale_factor):
+            for render_scale, frame in scaled_images(f'./graphics/plane/red{i}.png', scale_factor).items():
+                if tint is not None:
+                    # load_image surfaces are shared, so tint a copy
+                    frame = frame.copy()
+                    frame.fill(tint, special_flags=pygame.BLEND_RGB_MULT)
+                self.render_frames[render_scale].append(frame)
+        self.frames = self.render_frames[1.0]
+
+class Coin(ScaledSprite):
+    speed = 200 # px/s to the left
+
+    def __init__(self, groups, scale_factor, center=None):
         super().__init__(groups)
-        surface = pygame.image.load('./graphics/coins/PNG/Coins/coin_32.png').convert_alpha()
-        self.image = pygame.transform.scale(surface, pygame.math.Vector2(surface.get_size()) * scale_factor)
+        self.render_images = scaled_images('./graphics/coins/PNG/Coins/coin_32.png', scale_factor)
+        self.image = self.render_images[1.0]
         
-        coin_x_pos = WINDOW_WIDTH + randint(10, 50)
-        coin_y_pos = WINDOW_HEIGHT / 2 + randint(-200, 200) 
-        self.rect = self.image.get_rect(center = (coin_x_pos, coin_y_pos))
+        if center is None: # somewhere just off the right edge
+            center = (WINDOW_WIDTH + randint(10, 50), WINDOW_HEIGHT / 2 + randint(-200, 200))
+        self.rect = self.image.get_rect(center = center)
 
         self.pos = pygame.math.Vector2(self.rect.topleft)
 
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = load_mask('./graphics/coins/PNG/Coins/coin_32.png', scale_factor)
 
     def update(self, dt):
-        self.pos.x -= 200 * dt
+        self.pos.x -= self.speed * dt
         self.rect.x = round(self.pos.x)
 
         if self.rect.right <= -100:
             self.kill()
 
 
-class Pilot(pygame.sprite.Sprite):
-    def __init__(self, groups, scale_factor):
+class Pilot(ScaledSprite):
+    def __init__(self, groups, scale_factor, player_index=0):
         if groups is None:
             super().__init__()  # Initialize without adding to any groups
         else:
@@ -173,27 +226,18 @@ class Pilot(pygame.sprite.Sprite):
         
         self.scale_factor = scale_factor
 
-        # Load images
-        self.stand_image_orig = pygame.image.load('./graphics/pilot/stand.png').convert_alpha()
-        self.crouch_image_orig = pygame.image.load('./graphics/pilot/crouch.png').convert_alpha()
-
-        # Scale images (adjust scale_factor as needed for pilot size)
+        # Load pre-scaled images (adjust scale_factor as needed for pilot size)
         pilot_scale = self.scale_factor * 2 # Example: 30% of general scale, adjust as needed
         
-        self.stand_image = pygame.transform.scale(
-            self.stand_image_orig, 
-            (int(self.stand_image_orig.get_width() * pilot_scale), 
-             int(self.stand_image_orig.get_height() * pilot_scale))
-        )
-        self.crouch_image = pygame.transform.scale(
-            self.crouch_image_orig, 
-            (int(self.crouch_image_orig.get_width() * pilot_scale), 
-             int(self.crouch_image_orig.get_height() * pilot_scale))
-        )
+        self.stand_images = scaled_images('./graphics/pilot/stand.png', pilot_scale)
+        self.crouch_images = scaled_images('./graphics/pilot/crouch.png', pilot_scale)
+        self.stand_image = self.stand_images[1.0]
+        self.crouch_image = self.crouch_images[1.0]
 
         # Initial state
         self.image = self.stand_image
         self.rect = self.image.get_rect(topright=(WINDOW_WIDTH - 20, 20)) # Position top-right with padding
+        self.rect.y += player_index * (self.rect.height + 10) # Stack one indicator per player
 
     def set_state(self, is_thrusting):
         """Sets the pilot's image based on crouching (thrusting) state."""
@@ -209,57 +253,69 @@ class Pilot(pygame.sprite.Sprite):
                 # old_topright = self.rect.topright
                 # self.rect = self.image.get_rect(topright=old_topright)
     
+    def render_image(self, render_scale):
+        return (self.stand_images if self.image is self.stand_image else self.crouch_images)[render_scale]
+
     # No update(dt) needed if it only changes image based on external state
 
 
-class Cloud(pygame.sprite.Sprite):
-    def __init__(self, groups, scale_factor):
+class Cloud(ScaledSprite):
+    speed = 180 # px/s to the left
+
+    def __init__(self, groups, scale_factor, center=None, variant=None):
         super().__init__(groups)
-        rand_cloud = randint(1, 8)
-        surface = pygame.image.load(f'./graphics/clouds/cloud{rand_cloud}.png').convert_alpha()
-        self.image = pygame.transform.scale(surface, pygame.math.Vector2(surface.get_size()) * scale_factor)
+        rand_cloud = variant if variant is not None else randint(1, 8)
+        self.render_images = scaled_images(f'./graphics/clouds/cloud{rand_cloud}.png', scale_factor)
+        self.image = self.render_images[1.0]
         
-        coin_x_pos = WINDOW_WIDTH + randint(10, 50)
-        coin_y_pos = WINDOW_HEIGHT / 2 + randint(-200, 200) 
-        self.rect = self.image.get_rect(center = (coin_x_pos, coin_y_pos))
+        if center is None: # somewhere just off the right edge
+            center = (WINDOW_WIDTH + randint(10, 50), WINDOW_HEIGHT / 2 + randint(-200, 200))
+        self.rect = self.image.get_rect(center = center)
 
         self.pos = pygame.math.Vector2(self.rect.topleft)
 
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = load_mask(f'./graphics/clouds/cloud{rand_cloud}.png', scale_factor)
 
     def update(self, dt):
-        self.pos.x -= 180 * dt
+        self.pos.x -= self.speed * dt
         self.rect.x = round(self.pos.x)
 
         if self.rect.right <= -100:
             self.kill()
 
-class Obstacle(pygame.sprite.Sprite):
-	def __init__(self,groups,scale_factor):
+class Obstacle(ScaledSprite):
+	speed = 120 # px/s to the left, with the ground
+
+	def __init__(self,groups,scale_factor,orientation=None,variant=None,x=None,tip=None):
 		super().__init__(groups)
 		self.sprite_type = 'obstacle'
 
-		orientation = choice(('up','down'))
-		surf = pygame.image.load(f'./graphics/obstacles/{choice((0,1))}.png').convert_alpha()
-		self.image = pygame.transform.scale(surf,pygame.math.Vector2(surf.get_size()) * scale_factor)
+		# orientation 'up' stands on the ground, 'down' hangs from the top; tip is the y its point
+		# should reach (the top of an 'up' obstacle, the bottom of a 'down' one), within its length
+		orientation = orientation or choice(('up','down'))
+		self.orientation = orientation
+		path = f'./graphics/obstacles/{variant if variant is not None else choice((0,1))}.png'
+		flip_y = orientation == 'down'
+		self.render_images = scaled_images(path,scale_factor,flip_y = flip_y)
+		self.image = self.render_images[1.0]
 		
-		x = WINDOW_WIDTH + randint(40,100)
+		if x is None:
+			x = WINDOW_WIDTH + randint(40,100)
 
 		if orientation == 'up':
-			y = WINDOW_HEIGHT + randint(10,50)
+			y = WINDOW_HEIGHT + randint(10,50) if tip is None else max(WINDOW_HEIGHT + 10, tip + self.image.get_height())
 			self.rect = self.image.get_rect(midbottom = (x,y))
 		else:
-			y = randint(-50,-10)
-			self.image = pygame.transform.flip(self.image,False,True)
+			y = randint(-50,-10) if tip is None else min(-10, tip - self.image.get_height())
 			self.rect = self.image.get_rect(midtop = (x,y))
 
 		self.pos = pygame.math.Vector2(self.rect.topleft)
 
 		# mask
-		self.mask = pygame.mask.from_surface(self.image)
+		self.mask = load_mask(path,scale_factor,flip_y)
 
 	def update(self,dt):
-		self.pos.x -= 120 * dt
+		self.pos.x -= self.speed * dt
 		self.rect.x = round(self.pos.x)
 		if self.rect.right <= -120:
 			self.kill()
\ No newline at end of file
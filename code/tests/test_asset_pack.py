@@ -0,0 +1,76 @@
+import os
+import shutil
+import sys
+
+import pygame
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy') # load_image converts to the display format
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import asset_pack
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+
+@pytest.fixture
+def pack_env(tmp_path, monkeypatch):
+    """Runs from the repository root (asset paths are relative) with a pack of one copied image,
+    so a test can touch or delete its source; every test starts without a pack mapped."""
+    monkeypatch.chdir(ROOT)
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    source = str(tmp_path / 'coin.png')
+    shutil.copy('./graphics/coins/PNG/Coins/coin_32.png', source)
+    monkeypatch.setattr(asset_pack, 'BAKED_IMAGES', [(source, lambda s: s / 3, True, (False, True))])
+    yield source, str(tmp_path / 'assets.pack')
+    if asset_pack._pack is not None:
+        asset_pack._pack.close()
+    asset_pack._pack = None
+    asset_pack._image_cache.clear()
+    asset_pack._mask_cache.clear()
+    asset_pack._source_images.clear()
+    pygame.display.quit()
+
+
+def test_pack_images_match_the_pngs(pack_env):
+    source, pack_path = pack_env
+    _, count = asset_pack.bake(960, pack_path)
+    assert count == 2 * len(asset_pack._baked_scales()) # plain and flipped at every render scale
+    scale = asset_pack.scale_factor_for(960) / 3 * min(asset_pack._baked_scales()) # what sprites.py asks for at the lowest
+    png = asset_pack.load_image(source, scale, flip_y=True)
+    asset_pack._image_cache.clear()
+
+    assert asset_pack.open_pack(pack_path, 960)
+    assert asset_pack._pack.surface(asset_pack._image_key(source, png.get_size(), True)) is not None # it was baked
+    packed = asset_pack.load_image(source, scale, flip_y=True)
+    assert packed.get_size() == png.get_size()
+    assert pygame.image.tostring(packed, 'RGBA') == pygame.image.tostring(png, 'RGBA')
+    assert asset_pack.load_image(source, scale, flip_y=True) is packed # cached
+    assert asset_pack.load_mask(source, scale, flip_y=True).count() == pygame.mask.from_surface(png).count()
+
+
+def test_pack_for_another_width_is_ignored(pack_env):
+    _, pack_path = pack_env
+    asset_pack.bake(960, pack_path)
+    assert not asset_pack.open_pack(pack_path, 1280)
+
+
+def test_pack_is_stale_when_a_source_changes(pack_env):
+    source, pack_path = pack_env
+    asset_pack.bake(960, pack_path)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not asset_pack.open_pack(pack_path, 960)
+
+
+def test_pack_is_stale_when_a_source_is_gone(pack_env):
+    source, pack_path = pack_env
+    asset_pack.bake(960, pack_path)
+    os.remove(source)
+    assert not asset_pack.open_pack(pack_path, 960)
+
+
+def test_missing_pack_falls_back_to_the_pngs(pack_env):
+    source, pack_path = pack_env
+    assert not asset_pack.open_pack(pack_path, 960)
+    assert asset_pack.load_image(source, 0.25).get_size() == (32, 32) # the coin is 128 px
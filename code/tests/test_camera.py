@@ -0,0 +1,67 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from camera import FileCamera, SyntheticCamera
+
+# not square, so a width/height mix-up shows
+INFERENCE_SIZE = (320, 256)
+PREVIEW_SIZE = (480, 270)
+
+
+@pytest.fixture
+def frames(tmp_path):
+    """A folder of two frames and a file that isn't one."""
+    for i, color in enumerate([(255, 0, 0), (0, 0, 255)]):
+        cv2.imwrite(str(tmp_path / f'{i}.png'), np.full((480, 640, 3), color, dtype=np.uint8))
+    (tmp_path / '1b.jpg').write_bytes(b'not a jpeg')
+    return str(tmp_path)
+
+
+def cameras(frames):
+    return [FileCamera(frames, INFERENCE_SIZE, PREVIEW_SIZE, fps=1000),
+            SyntheticCamera(INFERENCE_SIZE, PREVIEW_SIZE, fps=1000, inference_time=0)]
+
+
+def check_streams(camera, inference_size):
+    inference, preview, t = camera.capture(want_preview=True)
+    assert inference.shape == (inference_size[1], inference_size[0], 3) and inference.dtype == np.uint8
+    assert preview.shape == (PREVIEW_SIZE[1], PREVIEW_SIZE[0], 3) and preview.dtype == np.uint8
+    assert t > 0
+    inference, preview, _ = camera.capture()
+    assert inference.shape == (inference_size[1], inference_size[0], 3)
+    assert preview is None # only produced when asked for
+
+
+def test_both_streams_have_the_configured_shapes(frames):
+    for camera in cameras(frames):
+        check_streams(camera, INFERENCE_SIZE)
+        camera.close()
+
+
+def test_inference_size_follows_the_governor(frames):
+    for camera in cameras(frames):
+        camera.set_inference_size((160, 128))
+        check_streams(camera, (160, 128))
+        camera.close()
+
+
+def test_file_camera_skips_unreadable_frames_and_loops(frames):
+    camera = FileCamera(frames, INFERENCE_SIZE, PREVIEW_SIZE, fps=1000)
+    colors = []
+    for _ in range(4):
+        inference, preview, _ = camera.capture(want_preview=True)
+        colors.append(tuple(int(c) for c in inference[0, 0]))
+        assert tuple(preview[0, 0]) == tuple(reversed(inference[0, 0])) # preview is RGB, inference BGR
+    assert colors == [(255, 0, 0), (0, 0, 255)] * 2
+
+
+def test_file_camera_with_nothing_readable(tmp_path):
+    (tmp_path / 'broken.png').write_bytes(b'not a png')
+    camera = FileCamera(str(tmp_path), INFERENCE_SIZE, PREVIEW_SIZE, fps=1000)
+    inference, preview, t = camera.capture(want_preview=True)
+    assert inference is None and preview is None and t > 0
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pygame
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from collisions import collide_many
+
+
+def square(groups, topleft, size=10, hole=False):
+    """A solid square sprite; with hole=True only its border is solid."""
+    sprite = pygame.sprite.Sprite(*groups)
+    sprite.rect = pygame.Rect(topleft, (size, size))
+    sprite.mask = pygame.mask.Mask((size, size), fill=True)
+    if hole:
+        for x in range(1, size - 1):
+            for y in range(1, size - 1):
+                sprite.mask.set_at((x, y), 0)
+    return sprite
+
+
+def test_matches_spritecollide_per_sprite():
+    group = pygame.sprite.Group()
+    a, b = square([], (0, 0)), square([], (100, 0))
+    near_a, near_both, far = square([group], (5, 5)), square([group], (8, 0), size=95), square([group], (300, 300))
+    hits = collide_many([a, b], group)
+    for sprite, sprite_hits in zip([a, b], hits):
+        assert set(sprite_hits) == set(pygame.sprite.spritecollide(sprite, group, False, pygame.sprite.collide_mask))
+    assert set(hits[0]) == {near_a, near_both} and hits[1] == [near_both]
+    assert far not in hits[0] + hits[1]
+
+
+def test_overlapping_rects_without_overlapping_pixels_dont_hit():
+    group = pygame.sprite.Group()
+    ring = square([group], (0, 0), size=20, hole=True)
+    inside = square([], (5, 5), size=5)
+    assert collide_many([inside], group) == [[]]
+    assert ring.alive()
+
+
+def test_dokill_removes_hit_members_once():
+    group = pygame.sprite.Group()
+    coin = square([group], (0, 0))
+    hits = collide_many([square([], (2, 2)), square([], (4, 4))], group, dokill=True)
+    assert hits == [[coin], []] # the second plane can't collect a coin the first already took
+    assert not coin.alive() and len(group) == 0
+
+
+def test_empty_inputs():
+    group = pygame.sprite.Group()
+    assert collide_many([], group) == []
+    assert collide_many([square([], (0, 0))], group) == [[]]
@@ -0,0 +1,115 @@
+import os
+import sys
+import warnings
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import pose
+from gestures import GestureTracker
+from settings import GESTURE_COOLDOWN, GESTURE_RECENT, GESTURE_WINDOW
+
+RATE = 15 # pose frames per second
+
+
+def body(dx=0.0, dy=0.0, lean=0.0, crouch=0.0, wrists=0.35):
+    """[17, 2] keypoints of someone standing facing the camera, torso length 0.25, legs 0.3."""
+    keypoints = np.zeros((pose.NUM_KEYPOINTS, 2), dtype=np.float32) # (0, 0): not seen
+    keypoints[pose.NOSE] = (0.5 + lean, 0.2 + crouch)
+    keypoints[pose.SHOULDERS] = [(0.45 + lean, 0.35 + crouch), (0.55 + lean, 0.35 + crouch)]
+    keypoints[pose.WRISTS] = [(0.35 + lean, wrists + crouch), (0.65 + lean, wrists + crouch)]
+    keypoints[pose.HIPS] = [(0.46, 0.6 + crouch), (0.54, 0.6 + crouch)]
+    keypoints[pose.ANKLES] = [(0.47, 0.9), (0.53, 0.9)]
+    keypoints += (dx, dy)
+    return keypoints
+
+
+def frame(*players):
+    """[2, 17, 2]: the players given, NaN for the empty slots."""
+    keypoints = np.full((2, pose.NUM_KEYPOINTS, 2), np.nan, dtype=np.float32)
+    keypoints[:len(players)] = players
+    return keypoints
+
+
+@pytest.fixture
+def tracker():
+    return GestureTracker(players=2)
+
+
+def push(tracker, poses, start=0.0):
+    """Pushes one pose per pose frame from `start`; returns the time of the last one."""
+    for i, keypoints in enumerate(poses):
+        t = start + i / RATE
+        tracker.push(frame(keypoints), t)
+    return t
+
+
+def test_flapping_frequency(tracker):
+    # wrists above the shoulders, then below, 1.5 times a second
+    push(tracker, [body(wrists=0.2 if (i * 3 // RATE) % 2 else 0.5) for i in range(GESTURE_WINDOW)])
+    assert tracker.features()['flap_hz'][0] == pytest.approx(1.5, abs=0.3)
+
+
+def test_still_arms_are_not_flapping(tracker):
+    push(tracker, [body(wrists=0.35 + 0.01 * (i % 2)) for i in range(GESTURE_WINDOW)])
+    assert tracker.features()['flap_hz'][0] == 0
+
+
+def test_crouch_dives(tracker):
+    t = push(tracker, [body()] * GESTURE_WINDOW)
+    _, dive = tracker.controls(np.array([0.5, 0.5]), t)
+    assert dive[0] == 0
+    t = push(tracker, [body(crouch=0.15)] * GESTURE_RECENT, start=t + 1 / RATE)
+    assert tracker.features()['crouch'][0] == pytest.approx(0.5, abs=0.01)
+    _, dive = tracker.controls(np.array([0.5, 0.5]), t)
+    assert dive[0] > 0
+
+
+def test_lean_dodges_once_per_lean(tracker):
+    t = push(tracker, [body()] * GESTURE_WINDOW)
+    tracker.controls(np.array([0.5, 0.5]), t)
+    t = push(tracker, [body(lean=0.15)] * GESTURE_RECENT, start=t + 1 / RATE)
+    assert tracker.features()['lean'][0] > 20
+    tracker.controls(np.array([0.5, 0.5]), t)
+    assert tracker.dodges[0] == 1
+    # still leaning after the cooldown: not a new dodge until standing straight in between
+    tracker.controls(np.array([0.5, 0.5]), t + GESTURE_COOLDOWN)
+    assert tracker.dodges[0] == 1
+
+
+def test_jump_boosts_with_a_cooldown(tracker):
+    t = push(tracker, [body()] * GESTURE_WINDOW)
+    t = push(tracker, [body(dy=-0.05 * (i + 1)) for i in range(GESTURE_RECENT)], start=t + 1 / RATE)
+    assert tracker.features()['jump'][0] == pytest.approx(0.05 * RATE / 0.25, rel=0.05) # torso lengths per second
+    tracker.controls(np.array([0.5, 0.5]), t)
+    assert tracker.boosts[0] == 1
+    tracker.controls(np.array([0.5, 0.5]), t + 0.1) # still rising, but within the cooldown
+    assert tracker.boosts[0] == 1
+
+
+def test_nose_above_the_line_is_full_thrust(tracker):
+    t = push(tracker, [body()] * GESTURE_WINDOW)
+    thrust, _ = tracker.controls(np.array([0.1, 0.5]), t)
+    assert thrust[0] == 1 and thrust[1] == 0
+
+
+def test_reset_forgets_everyone(tracker):
+    t = push(tracker, [body()] * GESTURE_WINDOW)
+    tracker.reset()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        features = tracker.features()
+    assert np.isnan(features['lean']).all() and np.isnan(features['crouch']).all()
+    thrust, dive = tracker.controls(np.array([0.5, 0.5]), t)
+    assert not thrust.any() and not dive.any()
+
+
+def test_empty_slots_stay_nan_without_warnings(tracker):
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        t = push(tracker, [body()] * GESTURE_WINDOW)
+        features = tracker.features()
+        thrust, dive = tracker.controls(np.array([0.5, 0.5]), t)
+    assert not np.isnan(features['lean'][0]) and np.isnan(features['lean'][1])
+    assert thrust[1] == 0 and dive[1] == 0 and tracker.boosts[1] == 0 and tracker.dodges[1] == 0
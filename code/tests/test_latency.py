@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from latency import LatencyHistogram, LatencyReport
+
+
+def test_histogram_buckets():
+    histogram = LatencyHistogram(max_ms=50, bin_ms=10)
+    for ms in (0, 9.9, 10, 25, 49, 50, 400, -3):
+        histogram.add(ms)
+    # bins 0-10, 10-20, 20-30, 30-40, 40-50 and everything from 50 up; negatives count as 0
+    assert histogram.counts.tolist() == [3, 1, 1, 0, 1, 2]
+    assert len(histogram.bars()) == 5 # one line per non-empty bin
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    assert histogram.percentiles().tolist() == [0, 0, 0]
+    assert histogram.bars() == []
+    for ms in range(1, 101):
+        histogram.add(ms)
+    assert histogram.percentiles() == pytest.approx([50.5, 90.1, 99.01])
+    # percentiles come from the samples, not the bins, so the clamp doesn't skew them
+    histogram.add(10_000)
+    assert histogram.percentiles((100,))[0] == 10_000
+
+
+def test_report_records_every_hop_it_has_stamps_for():
+    report = LatencyReport()
+    report.record({'capture': 1.000, 'inference': 1.040, 'received': 1.045, 'applied': 1.046, 'tick': 1.050, 'display': 1.066})
+    report.record({'capture': 2.000, 'inference': 2.030}) # the rest never happened
+    assert report.count == 1
+    assert report.hops[('capture', 'inference')].samples == pytest.approx([40, 30])
+    assert report.hops[('capture', 'display')].samples == pytest.approx([66])
+    assert np.isclose(report.hops[('tick', 'display')].percentiles()[0], 16)
+    assert 'capture -> display' in report.summary()
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import level
+from level import LevelGenerator, LevelStream
+
+# roughly what flight_envelope() measures in the game
+ENVELOPE = {'left': 100, 'right': 190, 'center_x': 145, 'start_y': 270, 'height': 60, 'ceiling': 50, 'floor': 490,
+            'climb': 200, 'gravity': 200, 'obstacle_width': 100}
+
+
+def envelope(**changes):
+    return dict(ENVELOPE, **changes)
+
+
+def gates(generator, count):
+    """Plans `count` gates, checking each against where the path could get to. Returns their events."""
+    events = []
+    for _ in range(count):
+        path_time, path_y = generator.path_time, generator.path_y
+        gate = generator.gate()
+        events += gate
+        obstacles = [kwargs for _, kind, kwargs in gate if kind == 'obstacle']
+        if not obstacles:
+            continue
+        y = generator.path_y
+        t_in = generator.path_time - generator.gate_duration
+        # the gap around y, from the obstacles' tips; an open side runs to the ceiling or the floor
+        top = next((o['tip'] for o in obstacles if o['orientation'] == 'down'), None)
+        bottom = next((o['tip'] for o in obstacles if o['orientation'] == 'up'), None)
+        gap = 2 * (bottom - y if bottom is not None else y - top)
+        assert gap >= generator.min_gap - 1e-6
+        assert generator.envelope['ceiling'] + gap / 2 <= y + 1e-6
+        assert y - 1e-6 <= generator.envelope['floor'] - gap / 2
+        assert path_y - generator.reach(t_in - path_time, True) - 1e-6 <= y
+        assert y <= path_y + generator.reach(t_in - path_time, False) + 1e-6
+    return events
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_gates_stay_reachable_and_inside_the_flying_area(seed):
+    gates(LevelGenerator(ENVELOPE, seed=seed), 40)
+
+
+def test_tight_envelope_delays_gates_instead_of_leaving_the_band():
+    # starting right under the ceiling with a long reaction time: the first gap doesn't fit around
+    # the start, and the path can't get down to it by the time the gate would normally come
+    generator = LevelGenerator(envelope(start_y=60, climb=100, gravity=100, floor=450), seed=1, reaction_time=11.0)
+    first_gate = generator.next_gate
+    gates(generator, 1)
+    assert generator.path_time - generator.gate_duration > first_gate # it had to wait for the path
+    gates(generator, 20)
+
+
+def test_no_gates_where_even_the_narrowest_gap_does_not_fit():
+    generator = LevelGenerator(envelope(floor=200), seed=0)
+    assert not [event for event in gates(generator, 10) if event[1] == 'obstacle']
+
+
+@pytest.mark.parametrize('env', [ENVELOPE, envelope(start_y=60, climb=100, gravity=100, floor=450), envelope(floor=200)])
+def test_chunks_cover_their_time_in_order(env):
+    generator = LevelGenerator(env, seed=3)
+    for i in range(20):
+        events = generator.chunk()
+        times = [event[0] for event in events]
+        assert times == sorted(times)
+        assert all(i * level.LEVEL_CHUNK_SECONDS <= t < (i + 1) * level.LEVEL_CHUNK_SECONDS for t in times)
+        assert all(t >= 0 for t in times)
+
+
+def test_same_seed_same_course():
+    a, b = LevelGenerator(ENVELOPE, seed=7), LevelGenerator(ENVELOPE, seed=7)
+    assert [a.chunk() for _ in range(5)] == [b.chunk() for _ in range(5)]
+
+
+def test_stream_hands_out_spawns_as_play_time_reaches_them():
+    stream = LevelStream(ENVELOPE, seed=2)
+    stream.start()
+    try:
+        generator = LevelGenerator(ENVELOPE, seed=2)
+        expected = [(t, kind, kwargs) for _ in range(10) for t, kind, kwargs in generator.chunk()]
+        due = []
+        for _ in range(300):
+            time.sleep(0.002) # frames come a while apart, and the thread builds in between
+            for kind, kwargs, late in stream.update(0.1):
+                assert 0 <= late < 0.1 + 1e-9
+                due.append((kind, kwargs))
+        assert due == [(kind, kwargs) for t, kind, kwargs in expected if t <= stream.time]
+    finally:
+        stream.stop()
+    assert stream.thread is None
@@ -0,0 +1,84 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import motion
+from motion import MotionGate
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(motion.time, 'time', clock)
+    return clock
+
+
+def frame(value):
+    return np.full((64, 64, 3), value, dtype=np.uint8)
+
+
+def test_motion_gate_sleeps_after_a_still_spell_and_wakes_on_motion(clock):
+    gate = MotionGate(wake_threshold=6, sleep_threshold=2, idle_after=20, downsample=8)
+    assert gate.update(frame(50))
+    clock.now += 19
+    assert gate.update(frame(50)) # still, but not for long enough
+    clock.now += 2
+    assert not gate.update(frame(50))
+    assert gate.update(frame(60)) # a change of 10 wakes it straight away
+
+
+def test_motion_gate_small_motion_keeps_it_awake_but_doesnt_wake_it(clock):
+    gate = MotionGate(wake_threshold=6, sleep_threshold=2, idle_after=20, downsample=8)
+    gate.update(frame(50))
+    for value in (53, 50, 53): # changes of 3: between the thresholds
+        clock.now += 15
+        assert gate.update(frame(value))
+    clock.now += 21
+    gate.update(frame(53))
+    gate.update(frame(53))
+    assert not gate.awake
+    assert not gate.update(frame(50))
+
+
+def test_motion_gate_wake_from_outside(clock):
+    gate = MotionGate(wake_threshold=6, sleep_threshold=2, idle_after=1, downsample=8)
+    gate.update(frame(50))
+    clock.now += 2
+    assert not gate.update(frame(50))
+    gate.wake() # a person was detected
+    assert gate.update(frame(50))
+
+
+def test_frame_change_reuses_near_duplicates_until_they_get_old(clock):
+    estimator = motion.FrameChangeEstimator(threshold=4, max_reuse_age=0.25, downsample=8, block=4)
+    assert not estimator.can_reuse(frame(50)) # nothing to reuse yet
+    clock.now += 0.1
+    assert estimator.can_reuse(frame(51))
+    clock.now += 0.2 # 0.3 s since the inference the result came from
+    assert not estimator.can_reuse(frame(51))
+    assert estimator.stats()['reused'] == 1 and estimator.reuse_ratio == 1 / 3
+
+
+def test_frame_change_worst_block_counts_and_drift_adds_up(clock):
+    estimator = motion.FrameChangeEstimator(threshold=4, max_reuse_age=10, downsample=8, block=4)
+    estimator.can_reuse(frame(50))
+    hand = frame(50)
+    hand[:32, :32] = 200 # a hand moving in one corner of an otherwise still picture
+    assert not estimator.can_reuse(hand)
+
+    estimator.reset()
+    estimator.can_reuse(frame(50))
+    # 2 per frame stays under the threshold frame to frame, but it's measured against the reference
+    assert estimator.can_reuse(frame(52))
+    assert not estimator.can_reuse(frame(54))
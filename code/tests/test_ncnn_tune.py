@@ -0,0 +1,29 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ncnn_tune import agreement
+
+
+def frame_detections(*xs, shift=0.0):
+    """(keypoints, boxes, scores) for people standing at each x."""
+    boxes = np.array([[x, 0.2, x + 0.2, 0.8] for x in xs], dtype=np.float32).reshape(-1, 4)
+    keypoints = np.stack([np.stack([np.full(17, x + 0.1 + shift), np.linspace(0.2, 0.8, 17)], axis=-1) for x in xs]).astype(np.float32)
+    return keypoints, boxes, np.full(len(xs), 0.9, dtype=np.float32)
+
+
+def test_same_people_in_another_order_agree():
+    reference = [frame_detections(0.1, 0.6)]
+    assert agreement([frame_detections(0.6, 0.1)], reference) == 1.0
+
+
+def test_drifted_keypoints_or_missing_people_disagree():
+    reference = [frame_detections(0.1, 0.6), frame_detections(0.1, 0.6)]
+    detections = [frame_detections(0.1, 0.6, shift=0.05), frame_detections(0.1)]
+    assert agreement(detections, reference) == 0.0
+
+
+def test_people_in_different_places_disagree():
+    assert agreement([frame_detections(0.1)], [frame_detections(0.7)]) == 0.0
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import pygame
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from particles import EFFECTS, ParticleSystem
+
+
+@pytest.fixture
+def particles():
+    np.random.seed(0)
+    return ParticleSystem(budget=100, render_scales=(1.0, 0.5))
+
+
+def test_emit_bursts_out_of_the_position(particles):
+    assert particles.emit('coin', (200, 100)) == EFFECTS['coin']['count']
+    n = particles.count
+    assert (particles.pos[:n] == (200, 100)).all()
+    speed = np.linalg.norm(particles.vel[:n], axis=1)
+    assert (speed >= 0.3 * EFFECTS['coin']['speed'] - 1e-3).all() and (speed <= EFFECTS['coin']['speed'] + 1e-3).all()
+    assert set(particles.color[:n].tolist()) <= set(EFFECTS['coin']['colors'])
+
+
+def test_update_moves_and_pulls_down(particles):
+    particles.emit('crash', (200, 100))
+    n = particles.count
+    before = particles.vel[:n, 1].copy()
+    particles.update(0.01)
+    # gravity adds 150 px/s^2 * 0.01 s before drag takes its 1.5 %
+    assert particles.vel[:n, 1] == pytest.approx((before + 1.5) * (1 - 0.015), abs=1e-3)
+    assert particles.pos[:n] == pytest.approx(np.array([200, 100]) + particles.vel[:n] * 0.01, abs=1e-3)
+
+
+def test_expired_particles_drop_out_and_the_rest_stay_packed(particles):
+    particles.emit('coin', (0, 0)) # lives 0.3-0.5 s
+    crash = particles.emit('crash', (500, 500)) # lives 0.72-1.2 s
+    particles.update(0.6)
+    assert particles.count == crash
+    assert (particles.life[:crash] > 0).all()
+    assert set(particles.color[:crash].tolist()) <= set(EFFECTS['crash']['colors'])
+    particles.update(1.0)
+    assert particles.count == 0
+
+
+def test_a_full_system_drops_new_particles_until_some_expire(particles):
+    assert particles.emit('crash', (0, 0)) == 80
+    assert particles.emit('coin', (0, 0)) == 20 # what the budget has left
+    assert particles.emit('coin', (0, 0)) == 0
+    assert particles.count == particles.budget
+    particles.update(0.55) # every coin spark is gone, the crash is not
+    assert particles.count == 80
+    assert particles.emit('coin', (10, 10)) == 20 # the freed rows are reused
+    assert (particles.pos[80:100] == (10, 10)).all()
+
+
+def test_draw_at_every_render_scale(particles):
+    surface = pygame.Surface((400, 300), pygame.SRCALPHA)
+    particles.draw(surface) # nothing alive
+    assert surface.get_bounding_rect().size == (0, 0)
+    particles.emit('game_over', (200, 150))
+    particles.draw(surface)
+    assert surface.get_at((200, 150)).a > 0
+    small = pygame.Surface((200, 150), pygame.SRCALPHA)
+    particles.draw(small, 0.5)
+    assert small.get_at((100, 75)).a > 0
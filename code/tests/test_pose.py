@@ -0,0 +1,87 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import pose
+from pose import NO_PLAYER, PlayerAssigner
+
+MODES = ['confidence', 'left_to_right', 'track']
+
+
+def person(x, y=0.5):
+    """[17, 2] keypoints of someone standing around (x, y)."""
+    return np.tile(np.array([x, y], dtype=np.float32), (pose.NUM_KEYPOINTS, 1)) + np.linspace(-0.05, 0.05, pose.NUM_KEYPOINTS)[:, None]
+
+
+def people(*xs):
+    return np.array([person(x) for x in xs], dtype=np.float32).reshape(-1, pose.NUM_KEYPOINTS, 2)
+
+
+def ids(*track_ids):
+    return np.array(track_ids, dtype=int)
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_empty_frame(mode):
+    assigner = PlayerAssigner(2, mode)
+    assert list(assigner.assign(people(), ids())) == [NO_PLAYER, NO_PLAYER]
+    assigner.lock(np.array([True, False]))
+    assert list(assigner.assign(people(), ids())) == [NO_PLAYER, NO_PLAYER]
+
+
+def test_confidence_takes_the_model_order():
+    assigner = PlayerAssigner(2, 'confidence')
+    assert list(assigner.assign(people(0.8, 0.2, 0.5), ids(1, 2, 3))) == [0, 1]
+    assert list(assigner.assign(people(0.8), ids(1))) == [0, NO_PLAYER]
+
+
+def test_left_to_right_follows_the_image():
+    assigner = PlayerAssigner(2, 'left_to_right')
+    assert list(assigner.assign(people(0.8, 0.2, 0.5), ids(1, 2, 3))) == [1, 2]
+
+
+def test_track_keeps_each_slot_on_its_person():
+    assigner = PlayerAssigner(2, 'track', lost_frames=2)
+    assert list(assigner.assign(people(0.2, 0.8), ids(1, 2))) == [0, 1]
+    # they swap sides and the model lists them the other way round: the slots follow the IDs
+    assert list(assigner.assign(people(0.2, 0.8), ids(2, 1))) == [1, 0]
+    # track 1 is gone: its slot waits for it, then goes to someone new
+    for _ in range(2):
+        assert list(assigner.assign(people(0.8, 0.5), ids(2, 3))) == [NO_PLAYER, 0]
+    assert list(assigner.assign(people(0.8, 0.5), ids(2, 3))) == [1, 0]
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_lock_pins_the_joined_players(mode):
+    assigner = PlayerAssigner(2, mode)
+    assigner.assign(people(0.2, 0.8), ids(1, 2))
+    assigner.lock(np.array([True, False]))
+    # a bystander in front of the camera doesn't get the free slot, or the joined one
+    assert list(assigner.assign(people(0.9, 0.2), ids(5, 1))) == [1, NO_PLAYER]
+    assigner.reset()
+    assert list(assigner.assign(people(0.2, 0.8), ids(5, 1))) != [NO_PLAYER, NO_PLAYER]
+    assert not assigner.locked
+
+
+def test_locked_player_gets_a_new_track_back():
+    assigner = PlayerAssigner(2, 'confidence')
+    assigner.assign(people(0.2, 0.8), ids(1, 2))
+    assigner.lock(np.array([True, True]))
+    # player 1 turned away for longer than the tracker waits and came back as track 7 where they were;
+    # track 9 far from them is someone else
+    assert list(assigner.assign(people(0.8, 0.9, 0.25), ids(2, 9, 7))) == [2, 0]
+    assert list(assigner.assign(people(0.25, 0.8), ids(7, 2))) == [0, 1]
+    # too far from where either player was last seen
+    assigner.lock(np.array([True, False]))
+    assert list(assigner.assign(people(0.9), ids(11))) == [NO_PLAYER, NO_PLAYER]
+
+
+def test_a_player_joined_with_nobody_in_view_takes_the_first_person():
+    assigner = PlayerAssigner(1, 'confidence')
+    assigner.assign(people(), ids())
+    assigner.lock(np.array([True]))
+    assert list(assigner.assign(people(0.7), ids(4))) == [0]
+    assert list(assigner.assign(people(0.2, 0.7), ids(8, 4))) == [1]
@@ -0,0 +1,93 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import pose
+from pose_backends import LETTERBOX_COLOR, PoseBackend, decode, letterbox
+
+FRAME_SIZE = (640, 480) # wider than tall: the model input gets bands above and below
+IMGSZ = 320
+SCALE, PAD_X, PAD_Y = 0.5, 0, 40
+
+
+def person(x0, y0, x1, y1):
+    """(box, [17, 2] keypoints) of a person in frame pixels: keypoints spread down the box's middle."""
+    ys = np.linspace(y0 + 10, y1 - 10, pose.NUM_KEYPOINTS)
+    xs = np.where(np.arange(pose.NUM_KEYPOINTS) % 2, (x0 + x1) / 2 + 15, (x0 + x1) / 2 - 15)
+    return np.array([x0, y0, x1, y1], np.float32), np.stack([xs, ys], axis=1).astype(np.float32)
+
+
+def anchor(box, keypoints, score, visibility=0.9):
+    """One column of the exported model's [56, anchors] output, in model pixels."""
+    box = box.reshape(2, 2) * SCALE + (PAD_X, PAD_Y)
+    center, size = box.mean(axis=0), box[1] - box[0]
+    points = keypoints * SCALE + (PAD_X, PAD_Y)
+    visible = np.full((pose.NUM_KEYPOINTS, 1), visibility, np.float32)
+    visible[0] = 0.1 # a nose the model isn't sure about
+    return np.concatenate([center, size, [score], np.concatenate([points, visible], axis=1).reshape(-1)]).astype(np.float32)
+
+
+class ScriptedBackend(PoseBackend):
+    """Returns a fixed output tensor, and keeps the image it was given."""
+
+    def __init__(self, output):
+        super().__init__(IMGSZ)
+        self.output = output
+
+    def infer(self, image):
+        self.image = image
+        return self.output
+
+
+def test_letterbox_keeps_the_aspect_ratio_and_centres():
+    frame = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), np.uint8)
+    frame[:, :] = (0, 0, 255)
+    image, scale, pad_x, pad_y = letterbox(frame, IMGSZ)
+    assert image.shape == (IMGSZ, IMGSZ, 3)
+    assert (scale, pad_x, pad_y) == (SCALE, PAD_X, PAD_Y)
+    assert (image[:PAD_Y] == LETTERBOX_COLOR).all() and (image[IMGSZ - PAD_Y:] == LETTERBOX_COLOR).all()
+    assert (image[PAD_Y:IMGSZ - PAD_Y] == (0, 0, 255)).all()
+
+    square = np.zeros((IMGSZ, IMGSZ, 3), np.uint8)
+    image, scale, pad_x, pad_y = letterbox(square, IMGSZ)
+    assert image is square and (scale, pad_x, pad_y) == (1, 0, 0) # already model size: untouched
+
+
+def test_decode_keeps_the_best_of_overlapping_detections():
+    box, keypoints = person(200, 100, 300, 400)
+    output = np.stack([anchor(box, keypoints, 0.6), anchor(box + 4, keypoints + 4, 0.9), anchor(box, keypoints, 0.1)], axis=1)
+    boxes, scores, points = decode(output, conf=0.25, iou=0.7)
+    assert scores.tolist() == pytest.approx([0.9])
+    assert boxes[0] == pytest.approx(((box + 4).reshape(2, 2) * SCALE + (PAD_X, PAD_Y)).reshape(-1)) # model pixels, xyxy
+    assert points.shape == (1, pose.NUM_KEYPOINTS, 3)
+
+
+def test_detections_map_back_to_the_camera_frame():
+    people = [person(200, 100, 300, 400), person(450, 50, 600, 470)]
+    scores = [0.7, 0.9]
+    output = np.stack([anchor(box, keypoints, score) for (box, keypoints), score in zip(people, scores)], axis=1)
+    backend = ScriptedBackend(output)
+    frame = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), np.uint8)
+
+    keypoints, boxes, result_scores, _ = backend.estimate(frame)
+    assert backend.image.shape == (IMGSZ, IMGSZ, 3)
+    assert result_scores.tolist() == pytest.approx([0.9, 0.7]) # best first
+    size = np.array(FRAME_SIZE, np.float32)
+    for i, (box, points) in enumerate(reversed(people)):
+        assert boxes[i] == pytest.approx((box.reshape(2, 2) / size).reshape(-1), abs=1e-5)
+        assert keypoints[i, :, :2] == pytest.approx(points / size, abs=1e-5)
+        assert keypoints[i, :, 2] == pytest.approx([0.1] + [0.9] * (pose.NUM_KEYPOINTS - 1))
+
+    # the published form drops the keypoints the model isn't sure about to (0, 0)
+    xy, _, _ = backend.detect(frame)
+    assert xy[:, 0].tolist() == [[0, 0], [0, 0]]
+    assert xy[:, 1:] == pytest.approx(keypoints[:, 1:, :2])
+
+
+def test_nothing_detected():
+    backend = ScriptedBackend(np.zeros((56, 10), np.float32))
+    keypoints, boxes, scores, _ = backend.estimate(np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), np.uint8))
+    assert keypoints.shape == (0, pose.NUM_KEYPOINTS, 3) and boxes.shape == (0, 4) and scores.shape == (0,)
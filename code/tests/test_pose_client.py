@@ -0,0 +1,70 @@
+import json
+import os
+import socket
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import pose_client
+from pose_client import HEADER_LEN, recv_message, send_message
+
+
+@pytest.fixture
+def pair():
+    a, b = socket.socketpair()
+    yield a, b
+    a.close()
+    b.close()
+
+
+def test_round_trip(pair):
+    a, b = pair
+    keypoints = np.random.default_rng(0).random((3, 17, 2), dtype=np.float32)
+    track_ids = np.array([4, 7, 9])
+    send_message(a, {'type': 'pose', 't_source': 12.5}, {'keypoints': keypoints, 'track_ids': track_ids})
+    send_message(a, {'type': 'hello'})
+    message = recv_message(b)
+    assert message['type'] == 'pose' and message['t_source'] == 12.5
+    np.testing.assert_array_equal(message['keypoints'], keypoints)
+    assert message['keypoints'].dtype == np.float32
+    np.testing.assert_array_equal(message['track_ids'], track_ids)
+    assert recv_message(b) == {'type': 'hello'} # message boundaries are kept
+
+
+def test_empty_and_non_contiguous_arrays(pair):
+    a, b = pair
+    frame = np.arange(24, dtype=np.uint8).reshape(2, 3, 4)[:, ::2] # a strided view
+    send_message(a, {}, {'none': np.zeros((0, 17, 2), np.float32), 'frame': frame})
+    message = recv_message(b)
+    assert message['none'].shape == (0, 17, 2)
+    np.testing.assert_array_equal(message['frame'], frame)
+
+
+def test_closed_peer_mid_message(pair):
+    a, b = pair
+    head = json.dumps({'arrays': {'x': {'dtype': '<f4', 'shape': [4], 'offset': 0}}, 'payload': 16}).encode()
+    a.sendall(HEADER_LEN.pack(len(head)) + head + b'\0' * 8) # half the payload
+    a.close()
+    with pytest.raises(ConnectionError):
+        recv_message(b)
+
+
+def test_closed_peer_between_messages(pair):
+    a, b = pair
+    a.close()
+    with pytest.raises(ConnectionError):
+        recv_message(b)
+
+
+def test_oversized_messages_are_refused(pair):
+    a, b = pair
+    a.sendall(HEADER_LEN.pack(pose_client.MAX_MESSAGE + 1))
+    with pytest.raises(ValueError):
+        recv_message(b)
+
+    head = json.dumps({'arrays': {}, 'payload': pose_client.MAX_MESSAGE + 1}).encode()
+    a.sendall(HEADER_LEN.pack(len(head)) + head)
+    with pytest.raises(ValueError):
+        recv_message(b)
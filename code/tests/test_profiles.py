@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import hardware
+import profiles
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_truncated_calibration_falls_back_to_the_board_profile(tmp_path):
+    path = write(tmp_path / 'hardware_profile.json', '{"board": "Raspb')
+    assert profiles.load_calibration(path) is None
+    assert profiles.profile_settings(None, path) == profiles.PROFILES[profiles.board_profile()]
+
+
+def test_unknown_profile_name_falls_back(tmp_path):
+    path = write(tmp_path / 'hardware_profile.json',
+                 json.dumps({'board': hardware.board_name(), 'profile': 'pi9', 'settings': {}}))
+    assert profiles.load_calibration(path) is None
+    assert profiles.profile_settings('pi9') == profiles.PROFILES[profiles.board_profile()]
+
+
+def test_calibration_overrides_its_profile(tmp_path):
+    path = write(tmp_path / 'hardware_profile.json', json.dumps(
+        {'board': hardware.board_name(), 'profile': 'pi4', 'settings': {'FRAMERATE': 45, 'RENDER_SCALES': [1.0, 0.5]}}))
+    values = profiles.profile_settings(None, path)
+    assert values['FRAMERATE'] == 45 and values['RENDER_SCALES'] == (1.0, 0.5)
+    assert values['CAMERA_LORES_FORMAT'] == 'YUV420'
+
+
+def test_profile_fills_in_only_what_settings_leave_at_none(capsys):
+    namespace = {'FRAMERATE': 50, 'UPSCALE_METHOD': None, 'CAMERA_FPS': 30}
+    profiles.apply_profile(namespace, 'pi4')
+    assert namespace['FRAMERATE'] == 50 # set in settings.py: wins
+    assert namespace['UPSCALE_METHOD'] == 'scale' and namespace['CAMERA_LORES_FORMAT'] == 'YUV420'
+    assert capsys.readouterr().out == '' # nothing printed on import
+
+    profiles.report()
+    out = capsys.readouterr().out
+    assert "UPSCALE_METHOD='scale'" in out
+    assert 'FRAMERATE=50 (profile 30)' in out
+    assert 'CAMERA_FPS' not in out.split('\n')[1] # same as the profile: not an override
+
+
+def test_settings_import_quietly_with_every_performance_setting_filled(tmp_path):
+    # a fresh interpreter, so settings.py runs its import-time code again
+    code = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    result = subprocess.run([sys.executable, '-c', 'import settings, profiles; '
+                             'print(all(getattr(settings, key) is not None for key in profiles.PROFILES["desktop"]))'],
+                            cwd=tmp_path, env=dict(os.environ, PYTHONPATH=code), capture_output=True, text=True)
+    assert result.stdout == 'True\n'
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from resolution import ResolutionController
+
+
+def controller():
+    # a 20 ms budget: down past 18 ms, up under 12 ms
+    return ResolutionController(scales=(1.0, 0.75, 0.5), budget_ms=20, window=10, down_at=0.9, up_at=0.6)
+
+
+def feed(resolution, frame_ms, frames):
+    """The number of frames that stepped the scale."""
+    return sum(resolution.update(frame_ms) for _ in range(frames))
+
+
+def test_waits_for_a_full_window():
+    resolution = controller()
+    assert feed(resolution, 30, 9) == 0
+    assert resolution.update(30)
+    assert resolution.scale == 0.75
+
+
+def test_steps_down_one_window_at_a_time():
+    resolution = controller()
+    assert feed(resolution, 30, 10) == 1
+    assert feed(resolution, 30, 9) == 0 # a full window of frames at the new scale first
+    assert resolution.update(30)
+    assert resolution.scale == 0.5
+    assert feed(resolution, 30, 30) == 0 # nowhere further down
+    assert resolution.scale == 0.5
+
+
+def test_steps_back_up_when_there_is_headroom():
+    resolution = controller()
+    feed(resolution, 30, 20)
+    assert feed(resolution, 10, 10) == 1
+    assert resolution.scale == 0.75
+    assert feed(resolution, 10, 10) == 1
+    assert resolution.scale == 1.0
+    assert feed(resolution, 10, 30) == 0 # nowhere further up
+
+
+def test_holds_between_the_thresholds():
+    resolution = controller()
+    feed(resolution, 30, 10)
+    # 15 ms is neither over 18 nor under 12: no flapping back and forth
+    assert feed(resolution, 15, 100) == 0
+    assert resolution.scale == 0.75
+
+
+def test_a_few_slow_frames_dont_step_down():
+    resolution = controller()
+    assert feed(resolution, 10, 9) == 0
+    assert not resolution.update(40) # one spike is under the 90th percentile of the window
+    assert resolution.scale == 1.0
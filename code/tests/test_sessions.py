@@ -0,0 +1,86 @@
+import gzip
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import sessions
+from sessions import SessionStore
+
+
+def session(started, *scores):
+    return {'started': started, 'board': 'test', 'duration': 60.0, 'players': len(scores), 'pose_hz': 15.0,
+            'frame_ms_p50': 16.0, 'frame_ms_p90': 18.0, 'frame_ms_p99': 25.0, 'render_scale': 1.0,
+            'scores': [{'player': player, 'score': score, 'coins': score // 10, 'air_time': 30, 'cause': 'time_up'}
+                       for player, score in enumerate(scores)]}
+
+
+def test_records_and_keeps_the_leaderboard(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    store = SessionStore(path, top_n=3)
+    assert store.record(session(1.0, 50, 120))
+    assert store.record(session(2.0, 80))
+    assert [entry['score'] for entry in store.leaderboard()] == [120, 80, 50]
+    store.close()
+    assert not store.thread.is_alive()
+
+    # a new store starts from what the last one saved
+    store = SessionStore(path, top_n=3)
+    store.loaded.wait(5)
+    store.record(session(3.0, 100))
+    assert [entry['score'] for entry in store.leaderboard()] == [120, 100, 80]
+    store.close()
+
+    db = sessions.connect(path)
+    out = str(tmp_path / 'sessions.jsonl.gz')
+    assert sessions.export(db, out, since=2.0) == 2
+    with gzip.open(out, 'rt') as f:
+        exported = [json.loads(line) for line in f]
+    assert [s['started'] for s in exported] == [2.0, 3.0]
+    assert exported[0]['scores'] == session(2.0, 80)['scores']
+    db.close()
+
+
+def test_drops_sessions_when_the_writer_is_behind(tmp_path, monkeypatch):
+    release = threading.Event()
+    connect = sessions.connect
+
+    def slow_connect(path):
+        release.wait(5)
+        return connect(path)
+
+    monkeypatch.setattr(sessions, 'connect', slow_connect)
+    store = SessionStore(str(tmp_path / 'sessions.db'), queue_size=1)
+    assert store.record(session(1.0, 10))
+    assert not store.record(session(2.0, 20)) # dropped, not waited on
+    assert store.dropped == 1
+    assert len(store.leaderboard()) == 2 # the leaderboard still has it
+    release.set()
+    store.close()
+    assert not store.thread.is_alive()
+
+
+def test_a_failed_write_does_not_stop_the_writer(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    store = SessionStore(path)
+    bad = session(1.0, 10)
+    bad['started'] = None # NOT NULL
+    store.pending.put(bad)
+    store.record(session(2.0, 20))
+    store.close()
+    assert not store.thread.is_alive()
+    assert store.failed == 1
+    db = sessions.connect(path)
+    assert [entry['score'] for entry in sessions.top_scores(db)] == [20]
+    db.close()
+
+
+def test_an_unopenable_database_keeps_the_leaderboard_in_memory(tmp_path):
+    store = SessionStore(str(tmp_path / 'missing' / 'sessions.db'))
+    assert store.loaded.wait(5)
+    assert store.record(session(1.0, 10))
+    assert store.leaderboard()[0]['score'] == 10
+    store.close()
+    assert not store.thread.is_alive()
+    assert store.failed == 1
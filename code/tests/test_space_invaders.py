@@ -0,0 +1,72 @@
+import ast
+import math
+import os
+
+import numpy as np
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'yolo_space_invaders.py')
+
+
+def load_script(names):
+    """The script's constants and the named functions, without opening its window or running its loop."""
+    with open(SCRIPT) as f:
+        tree = ast.parse(f.read())
+    keep = [node for node in tree.body
+            if isinstance(node, ast.FunctionDef) and node.name in names
+            or isinstance(node, ast.Assign) and all(isinstance(t, ast.Name) and t.id.isupper() for t in node.targets)]
+    namespace = {'np': np}
+    exec(compile(ast.Module(keep, []), SCRIPT, 'exec'), namespace)
+    return namespace
+
+
+game = load_script(['resolve_collisions'])
+resolve_collisions = game['resolve_collisions']
+
+
+def sequential(bullets, enemies):
+    """The original per-enemy loop."""
+    bullets, enemies = [list(b) for b in bullets], [list(e) for e in enemies]
+    destroyed = []
+    for enemy in enemies[:]:
+        center = (enemy[0] + game['ENEMY_WIDTH'] // 2, enemy[1] + game['ENEMY_HEIGHT'] // 2)
+        for bullet in bullets:
+            if math.hypot(bullet[0] - center[0], bullet[1] - center[1]) < game['HIT_RADIUS']:
+                bullets.remove(bullet)
+                enemies.remove(enemy)
+                destroyed.append(center)
+                break
+    return bullets, enemies, destroyed
+
+
+def check_matches_sequential(bullets, enemies):
+    bullets, enemies = np.array(bullets, dtype=np.float32).reshape(-1, 2), np.array(enemies, dtype=np.float32).reshape(-1, 2)
+    survivors, alive, destroyed = resolve_collisions(bullets, enemies)
+    expected = sequential(bullets, enemies)
+    assert survivors.tolist() == expected[0]
+    assert alive.tolist() == expected[1]
+    assert destroyed.tolist() == [list(center) for center in expected[2]]
+
+
+def test_a_bullet_only_destroys_one_enemy():
+    check_matches_sequential([(20, 15)], [(0, 0), (2, 0)])
+
+
+def test_two_enemies_with_two_overlapping_bullets_both_go():
+    # both bullets are in range of both enemies: the first enemy takes the first bullet,
+    # the second enemy the other one
+    bullets, enemies = [(20, 15), (22, 15)], [(0, 0), (2, 0)]
+    survivors, alive, destroyed = resolve_collisions(np.array(bullets, np.float32), np.array(enemies, np.float32))
+    assert len(survivors) == 0 and len(alive) == 0 and len(destroyed) == 2
+    check_matches_sequential(bullets, enemies)
+
+
+def test_a_beaten_enemy_can_take_a_later_enemys_bullet():
+    # enemy 1 loses bullet 0 to enemy 0 and takes bullet 1, which enemy 2 wanted first
+    check_matches_sequential([(20, 15), (40, 15), (55, 15)], [(0, 0), (10, 0), (30, 0)])
+
+
+def test_matches_the_original_loop_on_crowded_screens():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        check_matches_sequential(rng.uniform(0, 150, (rng.integers(0, 12), 2)).round(),
+                                 rng.uniform(0, 150, (rng.integers(0, 12), 2)).round())
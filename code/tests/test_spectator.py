@@ -0,0 +1,61 @@
+import os
+import socket
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import pygame
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from spectator import BOUNDARY, FRAME_SIZE, SpectatorOutput
+
+cv2 = pytest.importorskip('cv2') # the encoder process needs OpenCV
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def open_stream(port, timeout=20.0):
+    """The MJPEG stream, once the encoder process is up."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return urllib.request.urlopen(f'http://127.0.0.1:{port}/stream.mjpg', timeout=5)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def test_stream_serves_a_published_frame():
+    port = free_port()
+    output = SpectatorOutput(fps=100, host='127.0.0.1', port=port)
+    try:
+        stream = open_stream(port)
+        assert stream.headers['Content-Type'] == f'multipart/x-mixed-replace; boundary={BOUNDARY}'
+
+        frame = pygame.Surface(FRAME_SIZE)
+        frame.fill((255, 0, 0))
+        deadline = time.monotonic() + 5
+        while not output.submit(frame): # nothing goes out until the encoder has counted the viewer
+            assert time.monotonic() < deadline, "the encoder never saw the viewer"
+            time.sleep(0.01)
+
+        assert stream.readline() == f'--{BOUNDARY}\r\n'.encode()
+        headers = {}
+        while (line := stream.readline().strip()):
+            name, value = line.decode().split(': ', 1)
+            headers[name] = value
+        assert headers['Content-Type'] == 'image/jpeg'
+        jpeg = stream.read(int(headers['Content-Length']))
+        image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+        assert image.shape == (FRAME_SIZE[1], FRAME_SIZE[0], 3)
+        assert tuple(image[10, 10]) == pytest.approx((0, 0, 255), abs=8) # BGR: the red frame
+        stream.close()
+    finally:
+        output.close()
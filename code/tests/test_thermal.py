@@ -0,0 +1,99 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from settings import THERMAL_LEVELS
+from thermal import SysfsThermalReader, ThermalGovernor
+
+LEVELS = THERMAL_LEVELS[:3] # the real levels; three so a test can reach the bottom
+
+
+class StubReader:
+    """Hands the governor whatever reading the test sets."""
+
+    def __init__(self, temp=50.0, throttled=0):
+        self.temp = temp
+        self.throttled = throttled
+
+    def read(self):
+        return {'temp': self.temp, 'throttled': self.throttled}
+
+
+def governor(reader):
+    return ThermalGovernor(reader, levels=LEVELS, hot_at=75.0, cool_at=65.0, lookahead=30.0,
+                           settle=20.0, poll_interval=2.0, log_path=None)
+
+
+def test_steps_down_on_a_projected_hot_reading():
+    reader = StubReader(temp=70.0)
+    gov = governor(reader)
+    assert not gov.poll(now=100.0) # 70 and steady: below hot_at
+    reader.temp = 71.0
+    # rising 0.5 C/s, so 71 + 15 projects past 75 before it gets there
+    assert gov.poll(now=102.0)
+    assert gov.level == 1
+    assert gov.settings == THERMAL_LEVELS[1] and gov.settings['pose_fps'] == 15
+
+
+def test_steps_down_on_throttle_bits_but_not_under_voltage():
+    reader = StubReader(temp=50.0, throttled=0x1) # under-voltage alone: reported, not a thermal step
+    gov = governor(reader)
+    assert not gov.poll(now=100.0)
+    assert gov.under_voltage and gov.level == 0
+    reader.throttled = 0x4 # throttled now
+    assert gov.poll(now=102.0)
+    assert gov.level == 1
+
+
+def test_throttle_bits_without_a_temperature():
+    gov = governor(StubReader(temp=None, throttled=0x50004))
+    assert gov.poll(now=100.0)
+    assert gov.level == 1
+
+
+def test_respects_settle():
+    reader = StubReader(temp=80.0)
+    gov = governor(reader)
+    assert gov.poll(now=100.0)
+    assert not gov.poll(now=110.0) # still hot, but the last step hasn't settled
+    assert gov.level == 1
+    assert gov.poll(now=120.0)
+    assert gov.level == 2
+    assert not gov.poll(now=150.0) # the lightest level: nowhere further down
+    assert gov.level == 2
+
+
+def test_steps_back_up_below_cool_at():
+    reader = StubReader(temp=80.0)
+    gov = governor(reader)
+    assert gov.poll(now=100.0)
+    reader.temp = 68.0
+    assert not gov.poll(now=130.0) # cooler, but not under cool_at
+    reader.temp = 64.0
+    assert gov.poll(now=132.0)
+    assert gov.level == 0
+    assert not gov.poll(now=160.0) # the full workload: nowhere further up
+
+
+def test_polls_no_more_often_than_the_interval():
+    gov = governor(StubReader(temp=80.0))
+    assert gov.poll(now=100.0)
+    assert not gov.poll(now=101.0)
+
+
+def test_no_sensor_is_a_no_op():
+    gov = governor(StubReader(temp=None, throttled=0))
+    for now in range(100, 200, 2):
+        assert not gov.poll(now=float(now))
+    assert gov.level == 0
+    assert not gov.history
+
+
+def test_sysfs_reader_reads_the_firmware_throttle_file(tmp_path):
+    zone, throttled = tmp_path / 'temp', tmp_path / 'get_throttled'
+    zone.write_text('71500\n')
+    throttled.write_text('50005\n')
+    reader = SysfsThermalReader(zone=str(zone), throttled_file=str(throttled))
+    assert reader.read() == {'temp': 71.5, 'throttled': 0x50005}
+    throttled.write_text('0\n')
+    assert reader.read()['throttled'] == 0
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from tracker import PoseTracker, box_iou
+
+
+def person(x, y=0.3, width=0.2):
+    """(box, [17,2] keypoints) of a person standing at x."""
+    keypoints = np.stack([np.full(17, x + width / 2), np.linspace(y, y + 0.5, 17)], axis=-1)
+    return np.array([x, y, x + width, y + 0.5], dtype=np.float32), keypoints.astype(np.float32)
+
+
+def detections(*xs):
+    boxes, keypoints = zip(*[person(x) for x in xs]) if xs else ((), ())
+    return (np.array(boxes, dtype=np.float32).reshape(-1, 4), np.array(keypoints, dtype=np.float32).reshape(-1, 17, 2),
+            np.full(len(xs), 0.9, dtype=np.float32))
+
+
+def test_box_iou():
+    a = np.array([[0, 0, 2, 2]], dtype=np.float32)
+    b = np.array([[0, 0, 2, 2], [1, 0, 3, 2], [5, 5, 6, 6]], dtype=np.float32)
+    assert np.allclose(box_iou(a, b), [[1.0, 1 / 3, 0.0]])
+
+
+def test_ids_follow_people_when_the_model_reorders_them():
+    tracker = PoseTracker()
+    first = tracker.update(*detections(0.1, 0.6))
+    second = tracker.update(*detections(0.62, 0.12)) # same people, moved a little, listed the other way round
+    assert list(second) == [first[1], first[0]]
+
+
+def test_new_person_gets_new_id_and_lost_track_expires():
+    tracker = PoseTracker(max_missed=2)
+    (a,) = tracker.update(*detections(0.1))
+    a_again, b = tracker.update(*detections(0.1, 0.6))
+    assert a_again == a and b not in (a,)
+    for _ in range(3): # b leaves the frame for longer than max_missed
+        tracker.update(*detections(0.1))
+    assert b not in tracker.ids
+    (b_back,) = tracker.update(*detections(0.6))
+    assert b_back not in (a, b)
+
+
+def test_track_stats():
+    tracker = PoseTracker()
+    ids = tracker.update(*detections(0.1))
+    ids = tracker.update(*detections(0.1))
+    age, confidence = tracker.track_stats(np.append(ids, 999))
+    assert list(age) == [2, 0]
+    assert 0 < confidence[0] <= 0.9 and confidence[1] == 0
@@ -1,19 +1,14 @@
-import cv2
-from picamera2 import Picamera2
-from ultralytics import YOLO
+import os
+import sys
 import pygame
 import numpy as np
 import random
 from collections import deque
-import threading
-import time
 import math
 
-# Load YOLO model
-model = YOLO("yolo11n-pose.pt")
-
-# This sets the resolution of the yolo model being used
-imgsz = 96
+# Pose input comes from the shared pose service (run python code/pose_service.py first)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pose_client import PoseClient
 
 # Initialize Pygame
 pygame.init()
@@ -37,45 +32,35 @@ SHIP_HEIGHT = 40
 ship_x = WINDOW_WIDTH // 2
 
 # Bullet properties
-bullets = []
+# Entities live in NumPy arrays so movement, culling and collisions are one
+# vectorized pass each, however many are on screen.
+bullets = np.zeros((0, 2), dtype=np.float32)     # x, y
 BULLET_SPEED = 20
 BULLET_RADIUS = 3
 
 # Enemy properties
-enemies = []
+enemies = np.zeros((0, 2), dtype=np.float32)     # x, y of the top-left corner
 ENEMY_WIDTH = 40
 ENEMY_HEIGHT = 30
 ENEMY_SPEED = 2
+ENEMY_SPAWN_CHANCE = 0.02  # per frame; raise for higher enemy density
+HIT_RADIUS = ENEMY_WIDTH // 2
 
-# Keypoint detection function
-def get_keypoint_position(results, keypoint_num, axis='x'):
-    """ 
-    Keypoint reference:
-        0: nose          5: left_shoulder  10: right_wrist    15: left_ankle
-        1: left_eye      6: right_shoulder 11: left_hip       16: right_ankle
-        2: right_eye     7: left_elbow     12: right_hip
-        3: left_ear     8: right_elbow    13: left_knee
-        4: right_ear    9: left_wrist     14: right_knee
-    """
-    if not 0 <= keypoint_num <= 16:
-        raise ValueError("Keypoint number must be between 0 and 16")
-    if axis.lower() not in ['x', 'y']:
-        raise ValueError("Axis must be 'x' or 'y'")
-    
-    # Get the keypoint data
-    keypoint = results[0].keypoints.xyn[0][keypoint_num]
-    
-    # Return x or y coordinate based on axis parameter
-    return keypoint[0].item() if axis.lower() == 'x' else keypoint[1].item()
+# Explosion properties
+explosions = np.zeros((0, 3), dtype=np.float32)  # x, y, frames left
+EXPLOSION_FRAMES = 10
+EXPLOSION_RADIUS = 50
 
-def draw_ship(x, y):
+# The draw_* functions below are only used to bake sprites once at startup;
+# every frame then draws all entities with a single screen.blits call.
+def draw_ship(surface, x, y, flame_color):
     # Draw triangular ship
     points = [
         (x + SHIP_WIDTH//2, y),  # Top point
         (x, y + SHIP_HEIGHT),    # Bottom left
         (x + SHIP_WIDTH, y + SHIP_HEIGHT)  # Bottom right
     ]
-    pygame.draw.polygon(screen, GREEN, points)
+    pygame.draw.polygon(surface, GREEN, points)
     
     # Draw engine flames
     flame_points = [
@@ -83,10 +68,9 @@ def draw_ship(x, y):
         (x + SHIP_WIDTH//2 - 10, y + SHIP_HEIGHT + 10),  # Left
         (x + SHIP_WIDTH//2 + 10, y + SHIP_HEIGHT + 10)   # Right
     ]
-    flame_color = (random.randint(200, 255), random.randint(100, 150), 0)
-    pygame.draw.polygon(screen, flame_color, flame_points)
+    pygame.draw.polygon(surface, flame_color, flame_points)
 
-def draw_enemy(x, y):
+def draw_enemy(surface, x, y, eye_color):
     # Main body (diamond shape)
     points = [
         (x + ENEMY_WIDTH//2, y),
@@ -94,7 +78,7 @@ def draw_enemy(x, y):
         (x + ENEMY_WIDTH//2, y + ENEMY_HEIGHT),
         (x, y + ENEMY_HEIGHT//2)
     ]
-    pygame.draw.polygon(screen, RED, points)
+    pygame.draw.polygon(surface, RED, points)
     
     # Add angular wings
     wing_points_left = [
@@ -107,19 +91,18 @@ def draw_enemy(x, y):
         (x + ENEMY_WIDTH + ENEMY_WIDTH//4, y + ENEMY_HEIGHT//2),
         (x + ENEMY_WIDTH, y + ENEMY_HEIGHT//3)
     ]
-    pygame.draw.polygon(screen, BLUE, wing_points_left)
-    pygame.draw.polygon(screen, BLUE, wing_points_right)
+    pygame.draw.polygon(surface, BLUE, wing_points_left)
+    pygame.draw.polygon(surface, BLUE, wing_points_right)
     
     # Add menacing "eye"
-    eye_color = YELLOW if random.random() > 0.5 else RED
-    pygame.draw.polygon(screen, eye_color, [
+    pygame.draw.polygon(surface, eye_color, [
         (x + ENEMY_WIDTH//2 - 5, y + ENEMY_HEIGHT//2 - 5),
         (x + ENEMY_WIDTH//2 + 5, y + ENEMY_HEIGHT//2 - 5),
         (x + ENEMY_WIDTH//2, y + ENEMY_HEIGHT//2 + 5)
     ])
 
-def draw_explosion(x, y):
-    max_radius = 50
+def draw_explosion(surface, x, y):
+    max_radius = EXPLOSION_RADIUS
     num_shapes = 8
     
     for i in range(num_shapes):
@@ -134,10 +117,41 @@ def draw_explosion(x, y):
             points.append((point_x, point_y))
         
         color = (255, max(100, 255 - i * 20), 0)
-        pygame.draw.polygon(screen, color, points)
+        pygame.draw.polygon(surface, color, points)
     
     flash_radius = random.randint(5, 15)
-    pygame.draw.circle(screen, WHITE, (int(x), int(y)), flash_radius)
+    pygame.draw.circle(surface, WHITE, (int(x), int(y)), flash_radius)
+
+def draw_bullet(surface, x, y):
+    pygame.draw.circle(surface, BLUE, (x, y), BULLET_RADIUS + 2)
+    pygame.draw.circle(surface, WHITE, (x, y), BULLET_RADIUS)
+
+# Sprite baking
+# Shapes that used to be randomized per frame (flame colour, eye colour, explosion
+# shape) get a few pre-generated variants; a random variant is picked each frame.
+SPRITE_VARIANTS = 8
+ENEMY_WING = ENEMY_WIDTH // 4   # wings stick out this far on each side of the body
+BULLET_EXTENT = BULLET_RADIUS + 2
+
+def bake_sprite(size, draw, *args):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    draw(surface, *args)
+    return surface.convert_alpha()
+
+ship_sprites = [bake_sprite((SHIP_WIDTH + 1, SHIP_HEIGHT + 11), draw_ship, 0, 0,
+                            (random.randint(200, 255), random.randint(100, 150), 0))
+                for _ in range(SPRITE_VARIANTS)]
+enemy_sprites = [bake_sprite((ENEMY_WIDTH + 2 * ENEMY_WING + 1, ENEMY_HEIGHT + 1), draw_enemy, ENEMY_WING, 0, eye_color)
+                 for eye_color in (YELLOW, RED)]
+explosion_sprites = [bake_sprite((2 * EXPLOSION_RADIUS + 1, 2 * EXPLOSION_RADIUS + 1), draw_explosion, EXPLOSION_RADIUS, EXPLOSION_RADIUS)
+                     for _ in range(SPRITE_VARIANTS)]
+bullet_sprite = bake_sprite((2 * BULLET_EXTENT + 1, 2 * BULLET_EXTENT + 1), draw_bullet, BULLET_EXTENT, BULLET_EXTENT)
+
+def sprite_blits(sprites, positions, offset):
+    """(surface, position) pairs for screen.blits: one random variant per entity, positions shifted by the sprite's anchor."""
+    variants = np.random.randint(len(sprites), size=len(positions))
+    top_left = (np.asarray(positions) - offset).astype(int).tolist()
+    return [(sprites[variant], position) for variant, position in zip(variants, top_left)]
 
 # Position smoothing
 SMOOTHING_WINDOW = 2
@@ -146,55 +160,68 @@ current_x = WINDOW_WIDTH // 2
 for _ in range(SMOOTHING_WINDOW):
     position_history.append(current_x)
 
-# Set up the camera with Picam
-picam2 = Picamera2()
-picam2.preview_configuration.main.size = (640, 640)
-picam2.preview_configuration.main.format = "RGB888"
-picam2.preview_configuration.align()
-picam2.configure("preview")
-picam2.start()
-
+# Only the nose is needed to steer
+pose_client = PoseClient(fields=('nose',))
 
 # Shared variables
 latest_x_value = 0.5
-pose_thread_running = True
-explosions = []
 
 def create_enemy():
-    return {
-        'x': random.randint(0, WINDOW_WIDTH - ENEMY_WIDTH),
-        'y': 0
-    }
+    return np.array([[random.randint(0, WINDOW_WIDTH - ENEMY_WIDTH), 0]], dtype=np.float32)
 
 def fire_bullet(x):
-    bullets.append({
-        'x': x + SHIP_WIDTH//2,
-        'y': WINDOW_HEIGHT - SHIP_HEIGHT - 10
-    })
-
-def pose_detection_thread():
-    global latest_x_value, pose_thread_running
-    while pose_thread_running:
-        frame = picam2.capture_array()
-        results = model.predict(frame, imgsz=imgsz, verbose=False)
-        try:
-            # Use the new keypoint detection function
-            nose_x = get_keypoint_position(results, 0, 'x')  # 0 is the nose keypoint
-            latest_x_value = nose_x
-        except (IndexError, AttributeError):
-            # Keep the previous value if detection fails
-            pass
-        time.sleep(0.01)
-
-# Start pose detection thread
-pose_thread = threading.Thread(target=pose_detection_thread)
-pose_thread.start()
+    return np.array([[x + SHIP_WIDTH//2, WINDOW_HEIGHT - SHIP_HEIGHT - 10]], dtype=np.float32)
+
+def update_bullets(bullets):
+    # Move every bullet up and drop the ones that left the screen
+    bullets[:, 1] -= BULLET_SPEED
+    return bullets[bullets[:, 1] >= 0]
+
+def update_enemies(enemies):
+    # Move every enemy down and drop the ones that left the screen
+    enemies[:, 1] += ENEMY_SPEED
+    return enemies[enemies[:, 1] <= WINDOW_HEIGHT]
+
+def resolve_collisions(bullets, enemies):
+    """
+    Pairwise bullet/enemy distance test over a [bullets, enemies] grid, with the same outcome
+    as the original loop: enemies in order, each destroyed by the first bullet still in flight
+    that is in range of it.
+    Returns (surviving bullets, surviving enemies, centres of destroyed enemies).
+    """
+    if len(bullets) == 0 or len(enemies) == 0:
+        return bullets, enemies, np.zeros((0, 2), dtype=np.float32)
+
+    centers = enemies + (ENEMY_WIDTH//2, ENEMY_HEIGHT//2)
+    offsets = bullets[:, None, :] - centers[None, :, :]
+    in_range = (offsets ** 2).sum(axis=-1) < HIT_RADIUS ** 2   # [B, E]
+
+    bullet_alive = np.ones(len(bullets), dtype=bool)
+    enemy_alive = np.ones(len(enemies), dtype=bool)
+    pending = in_range.any(axis=0)   # enemies some unused bullet may still hit
+    while True:
+        available = in_range & bullet_alive[:, None]
+        pending &= available.any(axis=0)
+        contenders = np.flatnonzero(pending)
+        if len(contenders) == 0:
+            break
+        first_bullet = available[:, contenders].argmax(axis=0)
+        # Claims stand up to the first enemy whose bullet an earlier enemy already claimed:
+        # that enemy looks again, and so does every one after it, since it may take their bullet
+        _, first_claims = np.unique(first_bullet, return_index=True)
+        beaten = np.setdiff1d(np.arange(len(contenders)), first_claims)
+        settled = beaten[0] if len(beaten) else len(contenders)
+        bullet_alive[first_bullet[:settled]] = False
+        enemy_alive[contenders[:settled]] = False
+        pending[contenders[:settled]] = False
+    return bullets[bullet_alive], enemies[enemy_alive], centers[~enemy_alive]
 
 # Game loop
 running = True
 shoot_cooldown = 0
 clock = pygame.time.Clock()
 score = 0
+font = pygame.font.Font(None, 36)
 
 while running:
     for event in pygame.event.get():
@@ -204,6 +231,11 @@ while running:
             if event.key == pygame.K_q:
                 running = False
 
+    # Nose X of the first detected person (keep the previous value if nobody is detected)
+    pose_frame = pose_client.latest
+    if pose_frame is not None and len(pose_frame.get('nose', ())) > 0:
+        latest_x_value = float(pose_frame['nose'][0, 0])
+
     # Update ship position with smoothing
     target_x = int(np.interp(latest_x_value, [0.1, 0.9], [WINDOW_WIDTH - SHIP_WIDTH, 0]))  # Inverted range
     position_history.append(target_x)
@@ -211,65 +243,40 @@ while running:
     ship_x = np.clip(current_x, 0, WINDOW_WIDTH - SHIP_WIDTH)
 
     # Game logic
-    if random.random() < 0.02:
-        enemies.append(create_enemy())
+    if random.random() < ENEMY_SPAWN_CHANCE:
+        enemies = np.concatenate([enemies, create_enemy()])
 
     # Auto-fire bullets
     shoot_cooldown -= 1
     if shoot_cooldown <= 0:
-        fire_bullet(ship_x)
+        bullets = np.concatenate([bullets, fire_bullet(ship_x)])
         shoot_cooldown = 12
 
-    # Update bullets
-    for bullet in bullets[:]:
-        bullet['y'] -= BULLET_SPEED
-        if bullet['y'] < 0:
-            bullets.remove(bullet)
-
-    # Update enemies and check collisions
-    for enemy in enemies[:]:
-        enemy['y'] += ENEMY_SPEED
-        if enemy['y'] > WINDOW_HEIGHT:
-            enemies.remove(enemy)
-            continue
-
-        # Check collision with bullets
-        enemy_center = (enemy['x'] + ENEMY_WIDTH//2, enemy['y'] + ENEMY_HEIGHT//2)
-        for bullet in bullets[:]:
-            distance = math.hypot(bullet['x'] - enemy_center[0], bullet['y'] - enemy_center[1])
-            if distance < ENEMY_WIDTH//2:
-                if bullet in bullets: bullets.remove(bullet)
-                if enemy in enemies: 
-                    enemies.remove(enemy)
-                    explosions.append({'x': enemy_center[0], 'y': enemy_center[1], 'timer': 10})
-                score += 10
-                break
+    # Update bullets and enemies, then check collisions
+    bullets = update_bullets(bullets)
+    enemies = update_enemies(enemies)
+    bullets, enemies, destroyed = resolve_collisions(bullets, enemies)
+    score += 10 * len(destroyed)
+    if len(destroyed):
+        new_explosions = np.column_stack([destroyed, np.full(len(destroyed), EXPLOSION_FRAMES, dtype=np.float32)])
+        explosions = np.concatenate([explosions, new_explosions])
 
     # Draw everything
     screen.fill((0, 0, 0))
     
-    # Draw ship
-    draw_ship(ship_x, WINDOW_HEIGHT - SHIP_HEIGHT)
-    
-    # Draw bullets
-    for bullet in bullets:
-        pygame.draw.circle(screen, BLUE, (int(bullet['x']), int(bullet['y'])), BULLET_RADIUS + 2)
-        pygame.draw.circle(screen, WHITE, (int(bullet['x']), int(bullet['y'])), BULLET_RADIUS)
-    
-    # Draw enemies
-    for enemy in enemies:
-        draw_enemy(enemy['x'], enemy['y'])
+    # Draw ship, bullets, enemies and explosions (in that order) with one batched blit
+    screen.blits(
+        sprite_blits(ship_sprites, [(ship_x, WINDOW_HEIGHT - SHIP_HEIGHT)], (0, 0)) +
+        sprite_blits([bullet_sprite], bullets, (BULLET_EXTENT, BULLET_EXTENT)) +
+        sprite_blits(enemy_sprites, enemies, (ENEMY_WING, 0)) +
+        sprite_blits(explosion_sprites, explosions[:, :2], (EXPLOSION_RADIUS, EXPLOSION_RADIUS)),
+        doreturn=False)
     
-    # Draw explosions
-    for explosion in explosions[:]:
-        if explosion['timer'] > 0:
-            draw_explosion(explosion['x'], explosion['y'])
-            explosion['timer'] -= 1
-        else:
-            explosions.remove(explosion)
+    # Age the explosions all at once
+    explosions[:, 2] -= 1
+    explosions = explosions[explosions[:, 2] > 0]
 
     # Draw score
-    font = pygame.font.Font(None, 36)
     score_text = font.render(f'SCORE: {score}', True, GREEN)
     pygame.draw.rect(screen, (0, 50, 0), (5, 5, score_text.get_width() + 10, 40))
     screen.blit(score_text, (10, 10))
@@ -278,7 +285,5 @@ while running:
     clock.tick(60)
 
 # Cleanup
-pose_thread_running = False
-pose_thread.join()
-picam2.stop()
+pose_client.close()
 pygame.quit()
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+Thermal- and throttle-aware workload governor.
+
+In an enclosure the Pi heats up over the first twenty minutes or so, and once the firmware
+throttles, inference latency spikes and the game stutters. The pose service polls the SoC
+temperature and the firmware's throttle flags, and steps through THERMAL_LEVELS of lighter
+workload (lower pose rate, lower frame rate cap, smaller model input) before throttling
+starts, and back once the board has cooled down. Every step is appended to THERMAL_LOG_PATH
+as a JSON line, for lining up with the latency report and frame times.
+
+Readers are pluggable: SysfsThermalReader for the real board, FileThermalReader for a JSON
+file ({"temp": 78.5, "throttled": "0x0"}) that a test or a person edits by hand.
+"""
+
+import json
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from settings import *
+
+# get_throttled bits that mean "happening now" (the upper bits only say it happened since boot).
+# Under-voltage is a power supply problem, not heat: it is reported, but lightening the workload won't fix it.
+UNDER_VOLTAGE = 0x1
+THROTTLED_NOW = 0xE # ARM frequency capped, throttled, soft temperature limit
+
+
+class SysfsThermalReader:
+    """SoC temperature from the kernel's thermal zone, throttle flags from the firmware.
+
+    The flags come from the firmware driver's sysfs file where the kernel has it. Otherwise they come from
+    vcgencmd, run on a thread of its own, so the pose service's inference loop never waits for a fork/exec.
+    """
+
+    def __init__(self, zone='/sys/class/thermal/thermal_zone0/temp',
+                 throttled_file='/sys/devices/platform/soc/soc:firmware/get_throttled', poll_interval=THERMAL_POLL_INTERVAL):
+        self.zone = zone
+        self.throttled_file = throttled_file
+        self.throttled = 0
+        self.vcgencmd = None
+        if not self.read_throttled_file():
+            self.vcgencmd = shutil.which('vcgencmd') # not there off the Pi
+            if self.vcgencmd:
+                self.poll_interval = poll_interval
+                threading.Thread(target=self.vcgencmd_loop, daemon=True).start()
+
+    def read_throttled_file(self):
+        """Updates self.throttled from the sysfs file. Returns False if the kernel doesn't have it."""
+        try:
+            with open(self.throttled_file) as f:
+                self.throttled = int(f.read().strip(), 16)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def vcgencmd_loop(self):
+        while True:
+            try:
+                output = subprocess.run([self.vcgencmd, 'get_throttled'], capture_output=True, text=True, timeout=1).stdout
+                self.throttled = int(output.strip().split('=')[1], 16) # throttled=0x50005
+            except (OSError, subprocess.SubprocessError, IndexError, ValueError):
+                pass
+            time.sleep(self.poll_interval)
+
+    def read(self):
+        """{'temp': degrees C or None, 'throttled': get_throttled bits}"""
+        try:
+            with open(self.zone) as f:
+                temp = int(f.read()) / 1000
+        except (OSError, ValueError):
+            temp = None
+        if self.vcgencmd is None:
+            self.read_throttled_file()
+        return {'temp': temp, 'throttled': self.throttled}
+
+
+class FileThermalReader:
+    """Readings from a JSON file instead of the SoC, for tests and for trying the governor on a desktop:
+        echo '{"temp": 82, "throttled": "0x4"}' > /tmp/thermal.json"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        try:
+            with open(self.path) as f:
+                reading = json.load(f)
+        except (OSError, ValueError):
+            return {'temp': None, 'throttled': 0}
+        throttled = reading.get('throttled', 0)
+        return {'temp': reading.get('temp'), 'throttled': int(throttled, 16) if isinstance(throttled, str) else int(throttled)}
+
+
+def open_reader(source=THERMAL_SOURCE):
+    """'sysfs' reads the board, anything else is the path of a JSON file for FileThermalReader."""
+    if source == 'sysfs':
+        return SysfsThermalReader()
+    return FileThermalReader(source)
+
+
+class ThermalGovernor:
+    """Steps through `levels` (THERMAL_LEVELS, full workload first) from polled readings.
+
+    It steps down a level when the temperature, projected `lookahead` seconds ahead on its
+    recent trend, reaches `hot_at`, or when the firmware says it is throttling, and back up
+    once the board is under `cool_at` and not throttling. After every step it waits `settle`
+    seconds for the temperature to respond before stepping again.
+    """
+
+    def __init__(self, reader, levels=THERMAL_LEVELS, hot_at=THERMAL_HOT_AT, cool_at=THERMAL_COOL_AT,
+                 lookahead=THERMAL_LOOKAHEAD, settle=THERMAL_SETTLE, poll_interval=THERMAL_POLL_INTERVAL,
+                 log_path=THERMAL_LOG_PATH):
+        self.reader = reader
+        self.levels = list(levels)
+        self.hot_at = hot_at
+        self.cool_at = cool_at
+        self.lookahead = lookahead
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.log_path = log_path
+
+        self.level = 0
+        self.history = deque(maxlen=max(2, round(lookahead / poll_interval))) # (time, temp) for the trend
+        self.last_poll = 0.0
+        self.last_step = 0.0
+        self.reading = None
+        self.under_voltage = False
+
+    @property
+    def settings(self):
+        """The current level's workload limits; keys that are missing mean no limit."""
+        return self.levels[self.level]
+
+    def trend(self):
+        """Degrees C per second over the recent readings."""
+        if len(self.history) < 2:
+            return 0.0
+        times, temps = np.array(self.history).T
+        if times[-1] - times[0] <= 0:
+            return 0.0
+        return float(np.polyfit(times - times[0], temps, 1)[0])
+
+    def poll(self, now=None):
+        """Reads the sensors when a poll is due. Returns True if the level changed."""
+        now = time.time() if now is None else now
+        if now - self.last_poll < self.poll_interval:
+            return False
+        self.last_poll = now
+        self.reading = self.reader.read()
+        temp, throttling = self.reading['temp'], bool(self.reading['throttled'] & THROTTLED_NOW)
+        under_voltage = bool(self.reading['throttled'] & UNDER_VOLTAGE)
+        if under_voltage != self.under_voltage:
+            self.under_voltage = under_voltage
+            print("thermal governor: under-voltage, check the power supply" if under_voltage else "thermal governor: voltage back to normal")
+        if temp is None and not throttling:
+            return False # no sensor (a desktop): nothing to govern
+        if temp is not None:
+            self.history.append((now, temp))
+        if now - self.last_step < self.settle:
+            return False
+
+        projected = None if temp is None else temp + max(0.0, self.trend()) * self.lookahead
+        if self.level < len(self.levels) - 1 and (throttling or projected >= self.hot_at):
+            self.step(self.level + 1, 'throttled' if throttling else 'hot', now, projected)
+            return True
+        if self.level > 0 and not throttling and temp is not None and temp <= self.cool_at:
+            self.step(self.level - 1, 'cool', now, projected)
+            return True
+        return False
+
+    def step(self, level, reason, now, projected):
+        record = {'time': round(now, 3), 'from': self.level, 'level': level, 'reason': reason,
+                  'temp': self.reading['temp'], 'projected': None if projected is None else round(projected, 1),
+                  'throttled': hex(self.reading['throttled']), 'settings': self.levels[level]}
+        self.level = level
+        self.last_step = now
+        self.history.clear() # the trend restarts from the new workload
+        print(f"thermal governor: level {record['from']} -> {level} ({reason}, {record['temp']} C, "
+              f"projected {record['projected']} C, throttled {record['throttled']}): {self.settings}")
+        if self.log_path:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
@@ -0,0 +1,113 @@
+import numpy as np
+
+from pose import NUM_KEYPOINTS, visible
+
+
+def box_iou(a, b):
+    """[A,B] IoU between two sets of (x1, y1, x2, y2) boxes."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+
+def keypoint_similarity(a, b, scale=0.1):
+    """[A,B] in 0..1 from the mean distance between keypoints visible in both poses."""
+    both = visible(a)[:, None, :] & visible(b)[None, :, :]                           # [A,B,17]
+    distance = np.linalg.norm(a[:, None, :, :] - b[None, :, :, :], axis=-1)       # [A,B,17]
+    mean_distance = (distance * both).sum(axis=-1) / np.maximum(both.sum(axis=-1), 1)
+    return np.where(both.any(axis=-1), np.exp(-mean_distance / scale), 0.0)
+
+
+class PoseTracker:
+    """Keeps stable IDs for the people in front of the camera across frames.
+
+    Detections are matched to existing tracks on a mix of box IoU and keypoint
+    distance, greedily from the best pair down. All scoring is NumPy over the
+    [tracks, detections] grid, which is tiny (a handful of people), so an
+    update costs well under a millisecond next to a YOLO inference.
+    """
+
+    def __init__(self, iou_weight=0.5, min_similarity=0.2, max_missed=15, confidence_smoothing=0.7):
+        self.iou_weight = iou_weight
+        self.min_similarity = min_similarity
+        self.max_missed = max_missed                    # frames a track survives without a detection
+        self.confidence_smoothing = confidence_smoothing
+        self.next_id = 1
+        self.reset()
+
+    def reset(self):
+        self.ids = np.zeros(0, dtype=int)
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.keypoints = np.zeros((0, NUM_KEYPOINTS, 2), dtype=np.float32)
+        self.age = np.zeros(0, dtype=int)               # frames since the track was created
+        self.missed = np.zeros(0, dtype=int)            # frames since the track was last matched
+        self.confidence = np.zeros(0, dtype=np.float32) # smoothed detection score
+
+    def update(self, boxes, keypoints, scores):
+        """Matches this frame's detections to tracks. Returns one track ID per detection."""
+        count = len(boxes)
+        detection_ids = np.zeros(count, dtype=int)
+
+        similarity = (self.iou_weight * box_iou(self.boxes, boxes) +
+                      (1 - self.iou_weight) * keypoint_similarity(self.keypoints, keypoints))
+        similarity[similarity < self.min_similarity] = -1
+
+        # Greedy best-first matching; at most min(tracks, detections) rounds
+        track_rows, detection_rows = [], []
+        while similarity.size and similarity.max() >= 0:
+            t, d = np.unravel_index(similarity.argmax(), similarity.shape)
+            track_rows.append(t)
+            detection_rows.append(d)
+            similarity[t, :] = -1
+            similarity[:, d] = -1
+        track_rows = np.array(track_rows, dtype=int)
+        detection_rows = np.array(detection_rows, dtype=int)
+        detection_ids[detection_rows] = self.ids[track_rows]
+        matched_tracks = np.zeros(len(self.ids), dtype=bool)
+        matched_tracks[track_rows] = True
+        matched_detections = np.zeros(count, dtype=bool)
+        matched_detections[detection_rows] = True
+
+        # Update matched tracks from their detections
+        self.boxes[track_rows] = boxes[detection_rows]
+        self.keypoints[track_rows] = keypoints[detection_rows]
+        self.confidence[track_rows] = (self.confidence_smoothing * self.confidence[track_rows] +
+                                       (1 - self.confidence_smoothing) * scores[detection_rows])
+        self.missed[track_rows] = 0
+        self.missed[~matched_tracks] += 1
+        self.confidence[~matched_tracks] *= self.confidence_smoothing
+        self.age += 1
+
+        # Drop tracks that have been gone too long
+        keep = self.missed <= self.max_missed
+        self.ids, self.boxes, self.keypoints = self.ids[keep], self.boxes[keep], self.keypoints[keep]
+        self.age, self.missed, self.confidence = self.age[keep], self.missed[keep], self.confidence[keep]
+
+        # Unmatched detections start new tracks
+        new = np.flatnonzero(~matched_detections)
+        if len(new):
+            new_ids = np.arange(self.next_id, self.next_id + len(new))
+            self.next_id += len(new)
+            detection_ids[new] = new_ids
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, boxes[new]])
+            self.keypoints = np.concatenate([self.keypoints, keypoints[new]])
+            self.age = np.concatenate([self.age, np.ones(len(new), dtype=int)])
+            self.missed = np.concatenate([self.missed, np.zeros(len(new), dtype=int)])
+            self.confidence = np.concatenate([self.confidence, scores[new].astype(np.float32)])
+        return detection_ids
+
+    def track_stats(self, track_ids):
+        """(age, confidence) arrays for the given track IDs; 0 for IDs that aren't tracked."""
+        track_ids = np.asarray(track_ids)
+        matches = track_ids[:, None] == self.ids[None, :]
+        found = matches.any(axis=1)
+        rows = matches.argmax(axis=1)
+        age = np.where(found, self.age[rows] if len(self.ids) else 0, 0)
+        confidence = np.where(found, self.confidence[rows] if len(self.ids) else 0.0, 0.0)
+        return age, confidence